@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import PerfilUsuario, CentroResponsabilidade, Afericao
+from .models import PerfilUsuario, CentroResponsabilidade, Afericao, DesempenhoMensal, AlertaGestor
 
 @admin.register(PerfilUsuario)
 class PerfilUsuarioAdmin(admin.ModelAdmin):
@@ -53,4 +53,37 @@ class AfericaoAdmin(admin.ModelAdmin):
         'desempenho_mat_ql',
         'desempenho_mat_rep',
     )
-    raw_id_fields = ('fiscal', 'centro_responsabilidade')
\ No newline at end of file
+    raw_id_fields = ('fiscal', 'centro_responsabilidade')
+
+@admin.register(DesempenhoMensal)
+class DesempenhoMensalAdmin(admin.ModelAdmin):
+    """
+    Configuração da admin para DesempenhoMensal (somente consulta).
+    A tabela é mantida automaticamente pelas aferições.
+    """
+    list_display = ('centro_responsabilidade', 'secretaria_responsavel', 'mes', 'qtd_afericoes')
+    list_filter = ('secretaria_responsavel', 'mes')
+    raw_id_fields = ('centro_responsabilidade',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AlertaGestor)
+class AlertaGestorAdmin(admin.ModelAdmin):
+    """
+    Configuração da admin para AlertaGestor (fila de e-mails, somente consulta).
+    Permite acompanhar o envio e as falhas do comando 'enviar_alertas'.
+    """
+    list_display = ('afericao', 'gestor', 'motivo', 'status', 'tentativas', 'criado_em', 'enviado_em')
+    list_filter = ('status', 'motivo')
+    raw_id_fields = ('afericao', 'gestor')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
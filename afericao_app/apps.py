@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AfericaoAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'afericao_app'
+
+    def ready(self):
+        # Conecta os receptores de sinais (sincronização, cache etc.)
+        from . import signals  # noqa: F401
@@ -0,0 +1,137 @@
+# /opt/galp-backend/afericao_app/authentication.py
+
+import hashlib
+
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+
+# Alias do cache de tokens (ver CACHES['auth'] em settings.py)
+CACHE_ALIAS = 'auth'
+
+_SEM_PERFIL = object()
+
+
+def _chave(key):
+    # Guardamos o hash, nunca o token em si, como chave do cache
+    return 'galp:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def esquecer_token(key):
+    """Remove um token do cache (logout, exclusão do token, etc.)."""
+    caches[CACHE_ALIAS].delete(_chave(key))
+
+
+def esquecer_tokens_do_usuario(user_id):
+    """Remove do cache os tokens de um usuário (ex: usuário desativado)."""
+    esquecer_tokens_dos_usuarios([user_id])
+
+
+def esquecer_tokens_dos_usuarios(user_ids):
+    """Mesmo que 'esquecer_tokens_do_usuario' para vários (ex: carga em lote)."""
+    keys = Token.objects.filter(user_id__in=user_ids).values_list('key', flat=True)
+    caches[CACHE_ALIAS].delete_many([_chave(key) for key in keys])
+
+
+def get_perfil(request):
+    """
+    PerfilUsuario do usuário autenticado, ou None se ele não tiver perfil.
+
+    Com a CachedTokenAuthentication o perfil já vem em 'request.perfil',
+    sem consulta. Outros autenticadores (ex: testes com force_authenticate)
+    caem na relação 'user.perfilusuario'.
+    """
+    perfil = getattr(request, 'perfil', _SEM_PERFIL)
+    if perfil is _SEM_PERFIL:
+        perfil = getattr(request.user, 'perfilusuario', None)
+    return perfil
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication com cache do par (token -> User + PerfilUsuario).
+
+    O DRF padrão consulta o token e o usuário em toda requisição, e as views
+    ainda buscavam o perfil separadamente. Aqui a primeira requisição busca
+    token, User e Perfil em um único SELECT e guarda o resultado no cache
+    'auth' (LRU, com prazo AUTH_CACHE_TTL); as seguintes não tocam o banco.
+
+    O perfil fica disponível em 'request.perfil' (ver 'get_perfil').
+    Logout, exclusão do token e alterações no User/Perfil tiram a entrada
+    do cache na hora (ver signals.py).
+    """
+
+    def authenticate(self, request):
+        resultado = super().authenticate(request)
+        if resultado is not None:
+            user, _ = resultado
+            request.perfil = getattr(user, 'perfilusuario', None)
+        return resultado
+
+    def authenticate_credentials(self, key):
+        cache = caches[CACHE_ALIAS]
+        chave = _chave(key)
+
+        token = cache.get(chave)
+        if token is None:
+            try:
+                # 'user__perfilusuario' deixa o perfil (ou a ausência dele)
+                # já carregado no objeto User que vai para o cache.
+                token = Token.objects.select_related('user__perfilusuario').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            cache.set(chave, token)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
+
+
+def _chave_do_cabecalho(request):
+    """
+    Chave de 'Authorization: Token <chave>', ou None sem esse cabeçalho.
+    Mesmas validações (e mensagens) do TokenAuthentication do DRF.
+    """
+    partes = get_authorization_header(request).split()
+    if not partes or partes[0].lower() != b'token':
+        return None
+    if len(partes) == 1:
+        raise exceptions.AuthenticationFailed(_('Invalid token header. No credentials provided.'))
+    if len(partes) > 2:
+        raise exceptions.AuthenticationFailed(_('Invalid token header. Token string should not contain spaces.'))
+    try:
+        return partes[1].decode()
+    except UnicodeError:
+        raise exceptions.AuthenticationFailed(
+            _('Invalid token header. Token string should not contain invalid characters.')
+        )
+
+
+async def autenticar_async(request):
+    """
+    Equivalente assíncrono da CachedTokenAuthentication, para as views
+    ASGI (ver views_async.py): lê o mesmo cache 'auth' e, se preciso, faz
+    a mesma consulta pelo ORM assíncrono. Devolve o Token (com User e
+    Perfil carregados), ou None se o cabeçalho faltar; um token inválido
+    levanta AuthenticationFailed com a mesma mensagem da view síncrona.
+    """
+    key = _chave_do_cabecalho(request)
+    if key is None:
+        return None
+    cache = caches[CACHE_ALIAS]
+    chave = _chave(key)
+
+    token = await cache.aget(chave)
+    if token is None:
+        try:
+            token = await Token.objects.select_related('user__perfilusuario').aget(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        await cache.aset(chave, token)
+
+    if not token.user.is_active:
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+    return token
@@ -0,0 +1,168 @@
+# /opt/galp-backend/afericao_app/banco.py
+
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject, empty
+
+# --- Réplica de leitura ---
+# Relatórios, exportações e listagens podem ler de uma réplica
+# (settings.DB_REPLICA_ALIAS), aliviando o primário. Só as views marcadas
+# com '@leitura_na_replica' vão para ela; todo o resto (e toda escrita)
+# continua no primário.
+#
+# Leitura após escrita: a réplica pode estar alguns segundos atrasada.
+# Depois que o usuário grava algo, as leituras dele ficam fixadas no
+# primário até o fim da requisição e por DB_REPLICA_FIXACAO segundos nas
+# seguintes, para que ele sempre veja o que acabou de enviar. O mesmo vale
+# dentro de uma transação aberta no primário: a réplica não vê o que ela
+# ainda não confirmou.
+
+CHAVE_FIXACAO = 'galp:banco:primario:{user_id}'
+
+
+class EstadoRoteamento:
+    """Estado da requisição em andamento, visto pelo router."""
+
+    def __init__(self, request):
+        self.request = request
+        self.replica = False # Dentro de uma view '@leitura_na_replica'
+        self.escreveu = False # Houve escrita nesta requisição
+        self._fixado = None
+
+    def usuario_id(self):
+        # Só usa o usuário já autenticado: avaliar o 'request.user' preguiçoso
+        # aqui consultaria a sessão, e essa consulta passaria de novo pelo router
+        user = self.request.__dict__.get('user')
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            return None
+        return getattr(user, 'pk', None)
+
+    def fixado(self):
+        """O usuário gravou algo há menos de DB_REPLICA_FIXACAO segundos."""
+        if self._fixado is None:
+            user_id = self.usuario_id()
+            self._fixado = bool(user_id and cache.get(CHAVE_FIXACAO.format(user_id=user_id)))
+        return self._fixado
+
+
+_estado = ContextVar('galp_roteamento_banco', default=None)
+
+
+def alias_leitura():
+    """
+    Banco de onde a leitura atual deve sair: a réplica, se houver uma
+    configurada e a view pedir, ou o primário.
+    """
+    estado = _estado.get()
+    replica = settings.DB_REPLICA_ALIAS
+    if not replica or estado is None or not estado.replica or estado.escreveu:
+        return DEFAULT_DB_ALIAS
+    if transacao_aberta() or estado.fixado():
+        return DEFAULT_DB_ALIAS
+    return replica
+
+
+def transacao_aberta():
+    return connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+def leitura_na_replica(view):
+    """
+    Marca uma view (síncrona ou 'async def') cujas leituras podem sair da
+    réplica. Querysets avaliados depois que a view retorna (ex: respostas em
+    streaming) devem fixar o banco com '.using(alias_leitura())'.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            estado = _estado.get()
+            if estado is None:
+                return await view(*args, **kwargs)
+            anterior, estado.replica = estado.replica, True
+            try:
+                return await view(*args, **kwargs)
+            finally:
+                estado.replica = anterior
+        return wrapper
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        estado = _estado.get()
+        if estado is None:
+            return view(*args, **kwargs)
+        anterior, estado.replica = estado.replica, True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            estado.replica = anterior
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Router do GALP (settings.DATABASE_ROUTERS). Escritas e migrações vão
+    sempre para o primário; leituras seguem 'alias_leitura()'.
+    """
+
+    def db_for_read(self, model, **hints):
+        return alias_leitura()
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado is not None:
+            estado.escreveu = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica e primário têm os mesmos dados
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # A réplica recebe o esquema por replicação, nunca por 'migrate'
+        return db == DEFAULT_DB_ALIAS
+
+
+class RoteamentoBancoMiddleware(MiddlewareMixin):
+    """
+    Abre o estado de roteamento de cada requisição e, se ela gravou algo,
+    fixa o usuário no primário pelas próximas DB_REPLICA_FIXACAO segundos.
+    """
+
+    def process_request(self, request):
+        _estado.set(EstadoRoteamento(request))
+
+    def process_response(self, request, response):
+        estado = _estado.get()
+        if estado is not None and estado.escreveu and settings.DB_REPLICA_ALIAS:
+            user_id = estado.usuario_id()
+            if user_id:
+                cache.set(CHAVE_FIXACAO.format(user_id=user_id), True, timeout=settings.DB_REPLICA_FIXACAO)
+        _estado.set(None)
+        return response
+
+
+# --- Saúde das conexões ---
+
+def estatisticas_conexoes():
+    """
+    Situação das conexões deste processo, por alias: se há conexão aberta
+    e, com DB_POOL=True, as métricas do pool do psycopg (tamanho, conexões
+    livres, requisições esperando, tempo de espera, erros...).
+    """
+    dados = {}
+    for alias in connections:
+        conexao = connections[alias]
+        pool = getattr(conexao, 'pool', None) # Só o backend PostgreSQL com pool tem
+        dados[alias] = {
+            'vendor': conexao.vendor,
+            'conectado': conexao.connection is not None,
+            'conn_max_age': conexao.settings_dict['CONN_MAX_AGE'],
+            'pool': pool.get_stats() if pool is not None else None,
+        }
+    return dados
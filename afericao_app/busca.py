@@ -0,0 +1,41 @@
+# /opt/galp-backend/afericao_app/busca.py
+
+from functools import reduce
+from operator import and_, or_
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q
+
+# --- Busca textual nas observações das aferições (?q=) ---
+# No PostgreSQL, a coluna 'busca' (tsvector em português, mantida por um
+# gatilho do banco, ver migração 0011) tem um índice GIN: a busca lê só as
+# aferições que contêm os termos, em qualquer tamanho de histórico, e o
+# resultado vem ordenado por relevância.
+#
+# Nos demais bancos (ex: SQLite dos testes) não há 'tsvector': cada palavra
+# precisa aparecer em alguma das observações (icontains), sem ranking.
+
+CONFIGURACAO = 'portuguese'
+CAMPOS_OBSERVACAO = ['postos_obs', 'mat_obs', 'maq_obs', 'epi_obs']
+
+
+def buscar(queryset, texto):
+    """
+    Filtra as aferições pelo texto das observações. Aceita a sintaxe de
+    busca web do PostgreSQL: "frase exata", OR e -palavra.
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        consulta = SearchQuery(texto, config=CONFIGURACAO, search_type='websearch')
+        return (
+            queryset.filter(busca=consulta)
+            .annotate(relevancia=SearchRank(F('busca'), consulta))
+            .order_by('-relevancia', '-data_afericao', 'cod_afericao')
+        )
+
+    palavras = texto.replace('"', ' ').split()
+    condicoes = [
+        reduce(or_, (Q(**{f'{campo}__icontains': palavra}) for campo in CAMPOS_OBSERVACAO))
+        for palavra in palavras
+    ]
+    return queryset.filter(reduce(and_, condicoes)) if condicoes else queryset
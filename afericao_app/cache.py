@@ -0,0 +1,119 @@
+# /opt/galp-backend/afericao_app/cache.py
+
+import time
+
+from django.core.cache import cache
+
+# --- Versão da lista de Centros de Responsabilidade ---
+# Toda alteração em CR/Perfil/User troca a versão (ver signals.py). A lista
+# serializada fica guardada sob a versão atual, e a própria versão serve de
+# ETag: o app que já tem a versão corrente recebe 304 sem consulta ao banco.
+
+CHAVE_VERSAO_CENTROS = 'galp:centros:versao'
+CHAVE_LISTA_CENTROS = 'galp:centros:lista:{versao}'
+
+
+def _nova_versao():
+    agora = time.time()
+    return {'versao': f'{time.time_ns():x}', 'modificado_em': agora}
+
+
+def versao_centros():
+    """
+    Devolve {'versao': str, 'modificado_em': timestamp} da lista de CRs.
+    Se o cache foi esvaziado, começa uma versão nova (o que só custa uma
+    nova serialização da lista, nunca um dado desatualizado).
+    """
+    versao = cache.get(CHAVE_VERSAO_CENTROS)
+    if versao is None:
+        cache.add(CHAVE_VERSAO_CENTROS, _nova_versao(), timeout=None)
+        versao = cache.get(CHAVE_VERSAO_CENTROS)
+    return versao
+
+
+def invalidar_centros():
+    """Troca a versão; a lista antiga expira sozinha no cache."""
+    cache.set(CHAVE_VERSAO_CENTROS, _nova_versao(), timeout=None)
+
+
+def lista_centros(versao, gerar):
+    """
+    Lista serializada dos CRs para a versão informada. 'gerar' é chamada
+    (e o resultado guardado) apenas quando a versão ainda não está no cache.
+    """
+    chave = CHAVE_LISTA_CENTROS.format(versao=versao['versao'])
+    dados = cache.get(chave)
+    if dados is None:
+        dados = gerar()
+        cache.set(chave, dados, timeout=24 * 60 * 60)
+    return dados
+
+
+async def versao_centros_async():
+    """Mesmo que 'versao_centros', para as views ASGI."""
+    versao = await cache.aget(CHAVE_VERSAO_CENTROS)
+    if versao is None:
+        await cache.aadd(CHAVE_VERSAO_CENTROS, _nova_versao(), timeout=None)
+        versao = await cache.aget(CHAVE_VERSAO_CENTROS)
+    return versao
+
+
+async def lista_centros_async(versao, gerar):
+    """Mesmo que 'lista_centros', com 'gerar' sendo uma corrotina."""
+    chave = CHAVE_LISTA_CENTROS.format(versao=versao['versao'])
+    dados = await cache.aget(chave)
+    if dados is None:
+        dados = await gerar()
+        await cache.aset(chave, dados, timeout=24 * 60 * 60)
+    return dados
+
+
+# --- Versão das aferições (geral e por fiscal) ---
+# Usada pelo /api/me/bootstrap/: o fiscal só perde o cache quando uma
+# aferição dele muda; quem vê todas as aferições usa a versão geral.
+
+CHAVE_VERSAO_AFERICOES = 'galp:afericoes:versao'
+CHAVE_VERSAO_AFERICOES_FISCAL = 'galp:afericoes:versao:fiscal:{fiscal_id}'
+
+
+def versao_afericoes(fiscal_id=None):
+    chave = (
+        CHAVE_VERSAO_AFERICOES_FISCAL.format(fiscal_id=fiscal_id)
+        if fiscal_id is not None else CHAVE_VERSAO_AFERICOES
+    )
+    versao = cache.get(chave)
+    if versao is None:
+        cache.add(chave, _nova_versao()['versao'], timeout=None)
+        versao = cache.get(chave)
+    return versao
+
+
+def invalidar_afericoes(*fiscal_ids):
+    """Troca a versão geral e a dos fiscais informados."""
+    versao = _nova_versao()['versao']
+    chaves = [CHAVE_VERSAO_AFERICOES] + [
+        CHAVE_VERSAO_AFERICOES_FISCAL.format(fiscal_id=fiscal_id) for fiscal_id in set(fiscal_ids)
+    ]
+    cache.set_many({chave: versao for chave in chaves}, timeout=None)
+
+
+# --- Mapa de CRs agrupados (/api/centros/mapa/) ---
+# Depende dos CRs e da última aferição de cada um: a chave leva as duas
+# versões, então qualquer alteração gera um mapa novo e o antigo expira.
+
+CHAVE_MAPA = 'galp:mapa:{nivel}:{centros}:{afericoes}'
+
+
+def mapa_centros(nivel, gerar):
+    """
+    Dados do mapa para um nível ('pontos' ou um zoom) nas versões atuais.
+    'gerar' só é chamada quando o nível ainda não está no cache.
+    """
+    chave = CHAVE_MAPA.format(
+        nivel=nivel, centros=versao_centros()['versao'], afericoes=versao_afericoes()
+    )
+    dados = cache.get(chave)
+    if dados is None:
+        dados = gerar()
+        cache.set(chave, dados, timeout=24 * 60 * 60)
+    return dados
@@ -0,0 +1,83 @@
+# /opt/galp-backend/afericao_app/compressao.py
+
+import gzip
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele, só gzip
+    brotli = None
+
+# --- Compressão das respostas (Accept-Encoding) ---
+# Listas de aferições e de CRs em JSON comprimem para um décimo do tamanho,
+# o que pesa nas redes móveis dos fiscais. O formato e o nível dependem do
+# tamanho da resposta:
+# - menos de COMPRESSAO_MIN_BYTES: não compensa a CPU, segue como está;
+# - até COMPRESSAO_GRANDE_BYTES: brotli (COMPRESSAO_BROTLI_QUALIDADE), se
+#   instalado e aceito pelo cliente, senão o gzip do Django (nível 6);
+# - respostas grandes: níveis mais leves (NIVEIS_GRANDES), que custam
+#   metade da CPU e perdem pouco na compressão.
+# Respostas em streaming (exportação CSV) usam o gzip do Django.
+
+# Conteúdos que já vêm comprimidos: comprimir de novo só gasta CPU
+TIPOS_COMPRIMIDOS = (
+    'application/vnd.openxmlformats', 'application/zip', 'application/gzip', 'image/',
+)
+NIVEIS_GRANDES = {'br': 3, 'gzip': 3}
+
+
+def aceita(request, codificacao):
+    """Se o Accept-Encoding da requisição aceita 'codificacao' (q > 0)."""
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        nome, _, parametros = item.partition(';')
+        if nome.strip().lower() not in (codificacao, '*'):
+            continue
+        parametro, _, valor = parametros.partition('=')
+        if parametro.strip().lower() != 'q':
+            return True
+        try:
+            return float(valor) > 0
+        except ValueError:
+            return False
+    return False
+
+
+class CompressaoMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware do Django com brotli e tamanhos configuráveis.
+    Deve vir logo depois do MetricasMiddleware: o /metrics registra o
+    tamanho já comprimido, o que de fato trafega.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.COMPRESSAO_MIN_BYTES:
+            return response
+        if response.get('Content-Type', '').startswith(TIPOS_COMPRIMIDOS):
+            return response
+        if response.streaming or response.has_header('Content-Encoding'):
+            return super().process_response(request, response)
+
+        grande = len(response.content) >= settings.COMPRESSAO_GRANDE_BYTES
+        if brotli is not None and aceita(request, 'br'):
+            qualidade = NIVEIS_GRANDES['br'] if grande else settings.COMPRESSAO_BROTLI_QUALIDADE
+            return self._comprimir(response, 'br', brotli.compress(response.content, quality=qualidade))
+        if grande and aceita(request, 'gzip'):
+            nivel = NIVEIS_GRANDES['gzip']
+            return self._comprimir(response, 'gzip', gzip.compress(response.content, compresslevel=nivel))
+        return super().process_response(request, response)
+
+    def _comprimir(self, response, codificacao, comprimido):
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(comprimido) >= len(response.content):
+            return response
+        response.content = comprimido
+        response.headers['Content-Length'] = str(len(comprimido))
+        # Como no gzip do Django: o ETag forte passa a fraco (RFC 9110, 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codificacao
+        return response
@@ -0,0 +1,99 @@
+# /opt/galp-backend/afericao_app/exportacao.py
+
+import csv
+import tempfile
+
+from django.utils import timezone
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # openpyxl é opcional: sem ele, apenas CSV
+    Workbook = None
+
+# Tamanho do lote lido do cursor do banco a cada ida ao servidor
+CHUNK_SIZE = 2000
+
+# (cabeçalho da planilha, campo do banco)
+COLUNAS = [
+    ('Cod_Afericao', 'cod_afericao'),
+    ('Data_Afericao', 'data_afericao'),
+    ('Data_Ultima_Revisao', 'data_ultima_revisao'),
+    ('Cod_CR', 'centro_responsabilidade_id'),
+    ('Nome_CR', 'centro_responsabilidade__nome_cr'),
+    ('Secretaria_Responsavel', 'centro_responsabilidade__secretaria_responsavel'),
+    ('CPF_Fiscal', 'fiscal__cpf'),
+    ('Nome_Fiscal_Primeiro', 'fiscal__user__first_name'),
+    ('Nome_Fiscal_Ultimo', 'fiscal__user__last_name'),
+    ('Postos_Prev', 'postos_prev'),
+    ('Postos_Ocup', 'postos_ocup'),
+    ('Postos_Obs', 'postos_obs'),
+    ('Serv_Nota', 'serv_nota'),
+    ('Mat_Qt_Nota', 'mat_qt_nota'),
+    ('Mat_Ql_Nota', 'mat_ql_nota'),
+    ('Mat_Rep_Nota', 'mat_rep_nota'),
+    ('Mat_Obs', 'mat_obs'),
+    ('Uso_Maq', 'uso_maq'),
+    ('Maq_Obs', 'maq_obs'),
+    ('Uso_EPI', 'uso_epi'),
+    ('EPI_Obs', 'epi_obs'),
+    ('Status_Revisao', 'status_revisao'),
+    ('Desempenho_Serv', 'desempenho_serv'),
+    ('Desempenho_Mat_Qt', 'desempenho_mat_qt'),
+    ('Desempenho_Mat_Ql', 'desempenho_mat_ql'),
+    ('Desempenho_Mat_Rep', 'desempenho_mat_rep'),
+]
+CABECALHO = [titulo for titulo, _ in COLUNAS]
+CAMPOS = [campo for _, campo in COLUNAS]
+
+# Posições das datas na linha, para convertê-las ao fuso local
+_POSICOES_DATA = [CAMPOS.index('data_afericao'), CAMPOS.index('data_ultima_revisao')]
+
+
+class _Echo:
+    """Pseudo-arquivo: o csv.writer 'escreve' e recebemos a linha de volta."""
+    def write(self, value):
+        return value
+
+
+def linhas(queryset):
+    """
+    Percorre o queryset com um cursor no servidor ('.iterator'), trazendo
+    CHUNK_SIZE linhas por vez como tuplas (sem instanciar modelos). A
+    memória usada é a de um lote, não a da exportação inteira.
+    """
+    for linha in queryset.values_list(*CAMPOS).iterator(chunk_size=CHUNK_SIZE):
+        linha = list(linha)
+        for posicao in _POSICOES_DATA:
+            if linha[posicao] is not None:
+                linha[posicao] = timezone.localtime(linha[posicao]).replace(tzinfo=None)
+        yield linha
+
+
+def gerar_csv(queryset):
+    """
+    Gera o CSV linha a linha, para ser usado num StreamingHttpResponse.
+    Separador ';' e BOM UTF-8 para o Excel em pt-BR abrir corretamente.
+    """
+    writer = csv.writer(_Echo(), delimiter=';')
+    yield '\ufeff' + writer.writerow(CABECALHO)
+    for linha in linhas(queryset):
+        yield writer.writerow(linha)
+
+
+def gerar_xlsx(queryset):
+    """
+    Gera o XLSX com o openpyxl em modo 'write_only', que despeja as linhas
+    num arquivo temporário em vez de mantê-las na memória. Como o formato
+    é um ZIP, ele só pode ser enviado depois de completo: devolvemos o
+    arquivo temporário pronto para um FileResponse.
+    """
+    workbook = Workbook(write_only=True)
+    planilha = workbook.create_sheet('Afericoes')
+    planilha.append(CABECALHO)
+    for linha in linhas(queryset):
+        planilha.append(linha)
+
+    arquivo = tempfile.TemporaryFile(suffix='.xlsx')
+    workbook.save(arquivo)
+    arquivo.seek(0)
+    return arquivo
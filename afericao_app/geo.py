@@ -0,0 +1,190 @@
+# /opt/galp-backend/afericao_app/geo.py
+
+import threading
+from collections import defaultdict
+from heapq import heappush, heapreplace
+from math import asin, cos, floor, fsum, radians, sin, sqrt
+
+from django.db.models import OuterRef, Subquery
+
+from .cache import versao_centros
+from .models import Afericao, CentroResponsabilidade
+
+# Raio médio da Terra e comprimento de 1 grau de latitude, em km
+RAIO_TERRA_KM = 6371.0
+KM_POR_GRAU = 111.195
+
+# Lado da célula da grade, em graus (~1,1 km de latitude)
+CELULA_GRAUS = 0.01
+
+
+def distancia_km(lat1, lon1, lat2, lon2):
+    """Distância (haversine) entre dois pontos, em km."""
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * asin(min(1.0, sqrt(a)))
+
+
+# --- Índice espacial em grade ---
+
+class IndiceEspacial:
+    """
+    Grade regular de células de 'celula' graus; cada célula guarda os
+    pontos que caem nela. A busca dos k mais próximos percorre anéis de
+    células em volta do ponto consultado e para assim que nenhum anel
+    seguinte pode conter algo mais perto que o k-ésimo já encontrado.
+    Assim só a vizinhança é examinada, não a tabela inteira.
+    """
+
+    def __init__(self, pontos, celula=CELULA_GRAUS):
+        # pontos: (latitude, longitude, chave única, dados)
+        self.celula = celula
+        self.celulas = defaultdict(list)
+        self.total = 0
+        self.lat_abs_max = 0.0
+        for ponto in pontos:
+            self.celulas[self._celula(ponto[0], ponto[1])].append(ponto)
+            self.lat_abs_max = max(self.lat_abs_max, abs(ponto[0]))
+            self.total += 1
+        if self.celulas:
+            linhas = [i for i, _ in self.celulas]
+            colunas = [j for _, j in self.celulas]
+            self.i_min, self.i_max = min(linhas), max(linhas)
+            self.j_min, self.j_max = min(colunas), max(colunas)
+
+    def _celula(self, lat, lon):
+        return floor(lat / self.celula), floor(lon / self.celula)
+
+    def _anel(self, ci, cj, r):
+        """Células a exatamente 'r' células de (ci, cj), limitadas à grade."""
+        if r == 0:
+            yield ci, cj
+            return
+        i_ini, i_fim = max(ci - r, self.i_min), min(ci + r, self.i_max)
+        j_ini, j_fim = max(cj - r, self.j_min), min(cj + r, self.j_max)
+        for i in range(i_ini, i_fim + 1):
+            if abs(i - ci) == r:
+                for j in range(j_ini, j_fim + 1):
+                    yield i, j
+            else:
+                for j in (cj - r, cj + r):
+                    if j_ini <= j <= j_fim:
+                        yield i, j
+
+    def proximos(self, lat, lon, k):
+        """Lista de (distância em km, dados) dos k pontos mais próximos."""
+        if not self.total or k <= 0:
+            return []
+        ci, cj = self._celula(lat, lon)
+        # Consulta fora da grade começa direto no primeiro anel que a toca
+        r = max(0, self.i_min - ci, ci - self.i_max, self.j_min - cj, cj - self.j_max)
+        r_max = max(abs(ci - self.i_min), abs(ci - self.i_max), abs(cj - self.j_min), abs(cj - self.j_max))
+        # Distância mínima (km) por anel de células: a longitude encolhe com
+        # o cosseno da latitude, então usa a maior latitude envolvida.
+        km_por_anel = KM_POR_GRAU * self.celula * cos(radians(min(89.9, max(self.lat_abs_max, abs(lat)))))
+
+        melhores = []  # heap de (-distância, chave, dados) com no máximo k itens
+        while r <= r_max:
+            for celula in self._anel(ci, cj, r):
+                for p_lat, p_lon, chave, dados in self.celulas.get(celula, ()):
+                    item = (-distancia_km(lat, lon, p_lat, p_lon), chave, dados)
+                    if len(melhores) < k:
+                        heappush(melhores, item)
+                    elif item > melhores[0]:
+                        heapreplace(melhores, item)
+            # Pontos dos próximos anéis estão a pelo menos r células de distância
+            if len(melhores) == k and -melhores[0][0] <= r * km_por_anel:
+                break
+            r += 1
+
+        return [(-distancia, dados) for distancia, _, dados in sorted(melhores, reverse=True)]
+
+
+# --- Índice dos Centros de Responsabilidade ---
+# Montado sob demanda na primeira consulta de cada processo e refeito quando
+# a versão da lista de CRs muda (qualquer alteração em CR, ver signals.py).
+
+_trava = threading.Lock()
+_indice_centros = None  # (versão, IndiceEspacial)
+
+
+def _montar_indice_centros():
+    crs = (
+        CentroResponsabilidade.objects
+        .filter(latitude__isnull=False, longitude__isnull=False)
+        .values('cod_cr', 'nome_cr', 'endereco_cr', 'secretaria_responsavel', 'latitude', 'longitude')
+    )
+    return IndiceEspacial(
+        (cr['latitude'], cr['longitude'], cr['cod_cr'], cr) for cr in crs.iterator(chunk_size=5000)
+    )
+
+
+def indice_centros():
+    global _indice_centros
+    # A versão é lida antes dos dados: uma alteração durante a montagem
+    # troca a versão de novo e força outra montagem na próxima consulta.
+    versao = versao_centros()['versao']
+    atual = _indice_centros
+    if atual is None or atual[0] != versao:
+        with _trava:
+            atual = _indice_centros
+            if atual is None or atual[0] != versao:
+                atual = _indice_centros = (versao, _montar_indice_centros())
+    return atual[1]
+
+
+# --- Agrupamento dos CRs para o mapa ---
+# Cada zoom divide o mapa em uma grade (4 células por tile de 256 px) e
+# cada célula vira um grupo com quantidade, centróide e desempenho da
+# última aferição dos CRs dela.
+
+ZOOM_MAX = 20
+CELULAS_POR_TILE = 4
+
+
+def celula_do_zoom(zoom):
+    """Lado da célula da grade (em graus) no nível de zoom informado."""
+    return 360.0 / (2 ** zoom) / CELULAS_POR_TILE
+
+
+def pontos_mapa():
+    """
+    (cod_cr, latitude, longitude, desempenho_serv da última aferição) de
+    cada CR com coordenadas. A última aferição vem de uma subconsulta por
+    CR, atendida pelo índice (centro_responsabilidade, data_afericao).
+    """
+    ultima = (
+        Afericao.objects
+        .filter(centro_responsabilidade=OuterRef('pk'))
+        .order_by('-data_afericao')
+        .values('desempenho_serv')[:1]
+    )
+    return list(
+        CentroResponsabilidade.objects
+        .filter(latitude__isnull=False, longitude__isnull=False)
+        .annotate(ultimo_desempenho_serv=Subquery(ultima))
+        .values_list('cod_cr', 'latitude', 'longitude', 'ultimo_desempenho_serv')
+    )
+
+
+def agrupar(pontos, zoom):
+    """Grupos (um por célula ocupada) dos pontos de 'pontos_mapa' no zoom."""
+    celula = celula_do_zoom(zoom)
+    grupos = defaultdict(list)
+    for ponto in pontos:
+        grupos[floor(ponto[1] / celula), floor(ponto[2] / celula)].append(ponto)
+
+    clusters = []
+    for membros in grupos.values():
+        notas = [p[3] for p in membros if p[3] is not None]
+        clusters.append({
+            'latitude': round(fsum(p[1] for p in membros) / len(membros), 6),
+            'longitude': round(fsum(p[2] for p in membros) / len(membros), 6),
+            'qtd_centros': len(membros),
+            'qtd_avaliados': len(notas),
+            'media_desempenho_serv': round(fsum(notas) / len(notas), 2) if notas else None,
+            'min_desempenho_serv': min(notas, default=None),
+            # Grupo de um CR só: o mapa pode abrir o CR direto
+            'cod_cr': membros[0][0] if len(membros) == 1 else None,
+        })
+    return clusters
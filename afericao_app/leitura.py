@@ -0,0 +1,102 @@
+# /opt/galp-backend/afericao_app/leitura.py
+
+from rest_framework import serializers
+
+from .serializers import AfericaoDetailSerializer
+
+# --- Leitura rápida da listagem e do detalhe de aferições ---
+# Em páginas grandes, instanciar modelos e passar cada campo pelo
+# 'to_representation' do ModelSerializer domina o tempo da requisição.
+# Aqui a consulta pede só as colunas necessárias ('.values()') e cada
+# linha vira um dicionário direto, com a MESMA saída dos serializers
+# AfericaoListSerializer e AfericaoDetailSerializer (ver
+# AfericaoLeituraRapidaTests). Os serializers continuam sendo a referência
+# e atendem as gravações.
+
+# Mesma formatação de data/hora do DRF (fuso local, ISO 8601)
+_DATA_HORA = serializers.DateTimeField()
+
+
+def _data_hora(valor):
+    return None if valor is None else _DATA_HORA.to_representation(valor)
+
+
+def _float(valor):
+    return None if valor is None else float(valor)
+
+
+def _fiscal(linha):
+    # PerfilUsuario.__str__: nome completo do User ou, sem nome, o username
+    nome = f"{linha['fiscal__user__first_name']} {linha['fiscal__user__last_name']}".strip()
+    return nome or linha['fiscal__user__username']
+
+
+def _centro(linha):
+    # CentroResponsabilidade.__str__
+    return f"{linha['centro_responsabilidade_id']} - {linha['centro_responsabilidade__nome_cr']}"
+
+
+# Campo da listagem -> (colunas lidas, conversão da linha)
+LISTA = {
+    'cod_afericao': (['cod_afericao'], lambda linha: linha['cod_afericao']),
+    'data_afericao': (['data_afericao'], lambda linha: _data_hora(linha['data_afericao'])),
+    'centro_responsabilidade': (
+        ['centro_responsabilidade_id', 'centro_responsabilidade__nome_cr'], _centro
+    ),
+    'fiscal': (
+        ['fiscal__user__first_name', 'fiscal__user__last_name', 'fiscal__user__username'], _fiscal
+    ),
+    'serv_nota': (['serv_nota'], lambda linha: linha['serv_nota']),
+    'desempenho_serv': (['desempenho_serv'], lambda linha: _float(linha['desempenho_serv'])),
+}
+
+# Campos do detalhe que precisam de conversão; os demais saem como vêm do banco
+CONVERSOES_DETALHE = {
+    'data_ultima_revisao': _data_hora,
+    'desempenho_serv': _float,
+    'desempenho_mat_qt': _float,
+    'desempenho_mat_ql': _float,
+    'desempenho_mat_rep': _float,
+}
+COLUNAS_DETALHE = {
+    campo: {'fiscal': 'fiscal_id', 'centro_responsabilidade': 'centro_responsabilidade_id'}.get(campo, campo)
+    for campo in AfericaoDetailSerializer.Meta.fields
+}
+
+
+def valores_lista(queryset, campos=None):
+    """
+    Queryset de dicionários com as colunas que a listagem exibe (todos os
+    campos ou só os de 'campos'). 'cod_afericao' e 'data_afericao' vêm
+    sempre: a paginação por cursor usa os dois.
+    """
+    colunas = ['cod_afericao', 'data_afericao']
+    for campo, (colunas_campo, _) in LISTA.items():
+        if not campos or campo in campos:
+            colunas += [coluna for coluna in colunas_campo if coluna not in colunas]
+    return queryset.values(*colunas)
+
+
+def representar_lista(linhas, campos=None):
+    """
+    As linhas de 'valores_lista' no formato do AfericaoListSerializer
+    (campos na ordem de Meta.fields, qualquer que seja a ordem de 'campos').
+    """
+    conversoes = [
+        (campo, converter) for campo, (_, converter) in LISTA.items() if not campos or campo in campos
+    ]
+    return [{campo: converter(linha) for campo, converter in conversoes} for linha in linhas]
+
+
+def valores_detalhe(queryset):
+    """Queryset de dicionários com as colunas do AfericaoDetailSerializer."""
+    return queryset.values(*COLUNAS_DETALHE.values())
+
+
+def representar_detalhe(linha):
+    """Uma linha de 'valores_detalhe' no formato do AfericaoDetailSerializer."""
+    dados = {}
+    for campo, coluna in COLUNAS_DETALHE.items():
+        valor = linha[coluna]
+        dados[campo] = CONVERSOES_DETALHE[campo](valor) if campo in CONVERSOES_DETALHE else valor
+    return dados
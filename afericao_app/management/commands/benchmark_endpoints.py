@@ -0,0 +1,194 @@
+import json
+import statistics
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from afericao_app.management.commands.gerar_dados_sinteticos import SENHA_PADRAO
+from afericao_app.models import Afericao, CentroResponsabilidade, PerfilUsuario
+
+# Papel -> perfil (PerfilUsuario.PERFIL_CHOICES)
+PAPEIS = {
+    'fiscal': 'Fiscal de Equipamento',
+    'coordenador': 'Coordenador',
+    'gestor': 'Gestor Contrato',
+}
+ENDPOINTS = ['afericoes-list', 'afericoes-check-exists', 'centros-list', 'login']
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede os endpoints principais da API (latência p50/p95/p99, consultas SQL e '
+        'pico de memória por requisição), por endpoint e por papel, dentro do próprio '
+        'processo, e compara com um arquivo de baseline. Rode sobre uma massa do '
+        "'gerar_dados_sinteticos', nunca em produção (o login cria tokens)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeticoes', type=int, default=50,
+            help='Requisições medidas por endpoint e papel (padrão: 50)'
+        )
+        parser.add_argument(
+            '--aquecimento', type=int, default=3,
+            help='Requisições descartadas antes de medir (padrão: 3)'
+        )
+        parser.add_argument(
+            '--endpoint', action='append', choices=ENDPOINTS,
+            help='Mede só este endpoint (repetível; padrão: todos)'
+        )
+        parser.add_argument(
+            '--papel', action='append', choices=list(PAPEIS),
+            help='Mede só este papel (repetível; padrão: todos)'
+        )
+        parser.add_argument(
+            '--senha', default=SENHA_PADRAO,
+            help=f'Senha dos usuários, para o login (padrão: {SENHA_PADRAO})'
+        )
+        parser.add_argument('--salvar-baseline', help='Grava o resultado neste arquivo JSON')
+        parser.add_argument('--baseline', help='Compara com um resultado gravado antes')
+        parser.add_argument(
+            '--tolerancia', type=float, default=0.2,
+            help='Piora aceita na latência mediana (p50) em relação à baseline (padrão: 0.2 = 20%%)'
+        )
+        parser.add_argument('--json', action='store_true', help='Imprime o resultado em JSON')
+
+    # --- Cenários ---
+
+    def _usuario(self, perfil):
+        """Um usuário do papel; para o fiscal, o autor da aferição mais recente."""
+        perfis = PerfilUsuario.objects.filter(perfil=perfil).select_related('user')
+        if perfil == PAPEIS['fiscal']:
+            ultima = Afericao.objects.order_by('-data_afericao').values_list('fiscal_id', flat=True).first()
+            perfis = perfis.filter(pk=ultima) if ultima else perfis
+        return perfis.order_by('pk').first()
+
+    def _pedidos(self, perfil, endpoints, senha):
+        """(endpoint, método, caminho, dados) de cada cenário do papel."""
+        afericoes = Afericao.objects.order_by('-data_afericao')
+        if perfil.perfil == PAPEIS['fiscal']:
+            afericoes = afericoes.filter(fiscal=perfil)
+        ultima = afericoes.values('centro_responsabilidade_id', 'data_afericao').first()
+        if ultima:
+            cr, data = ultima['centro_responsabilidade_id'], timezone.localdate(ultima['data_afericao'])
+        else:
+            cr, data = CentroResponsabilidade.objects.values_list('pk', flat=True).first(), None
+
+        pedidos = {
+            'afericoes-list': ('get', '/api/afericoes/', None),
+            'afericoes-check-exists': (
+                'get', '/api/afericoes/check_exists/', {'cr': cr, 'data': (data or '2025-01-01')},
+            ),
+            'centros-list': ('get', '/api/centros/', None),
+            'login': ('post', '/api/login/', {'username': perfil.user.username, 'password': senha}),
+        }
+        return [(endpoint, *pedidos[endpoint]) for endpoint in endpoints]
+
+    # --- Medição ---
+
+    def _medir(self, client, metodo, caminho, dados, repeticoes, aquecimento):
+        requisitar = getattr(client, metodo)
+        for _ in range(aquecimento):
+            requisitar(caminho, dados)
+
+        latencias, erros = [], 0
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            response = requisitar(caminho, dados)
+            latencias.append(time.perf_counter() - inicio)
+            erros += response.status_code >= 400
+
+        # Consultas e memória numa requisição à parte: os dois instrumentos
+        # atrasam a requisição e distorceriam a latência
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as consultas:
+                requisitar(caminho, dados)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        percentis = statistics.quantiles(latencias, n=100) if len(latencias) > 1 else latencias * 99
+        return {
+            'requisicoes': repeticoes,
+            'erros': erros,
+            'p50_ms': round(percentis[49] * 1000, 2),
+            'p95_ms': round(percentis[94] * 1000, 2),
+            'p99_ms': round(percentis[98] * 1000, 2),
+            'consultas': len(consultas.captured_queries),
+            'pico_memoria_kb': round(pico / 1024, 1),
+        }
+
+    # --- Baseline ---
+
+    def _comparar(self, resultados, baseline, tolerancia):
+        """
+        Variação da mediana (p50) de cada cenário em relação à baseline e as
+        regressões: mediana acima da tolerância ou mais consultas SQL. A
+        mediana, e não o p95, decide: numa máquina compartilhada a cauda
+        oscila demais entre duas execuções iguais.
+        """
+        variacoes, regressoes = {}, []
+        for chave, atual in resultados.items():
+            anterior = baseline.get(chave)
+            if anterior is None:
+                continue
+            variacao = (atual['p50_ms'] - anterior['p50_ms']) / anterior['p50_ms'] if anterior['p50_ms'] else 0
+            variacoes[chave] = variacao
+            if variacao > tolerancia:
+                regressoes.append(f"{chave}: p50 {anterior['p50_ms']} -> {atual['p50_ms']} ms")
+            if atual['consultas'] > anterior['consultas']:
+                regressoes.append(f"{chave}: consultas {anterior['consultas']} -> {atual['consultas']}")
+        return variacoes, regressoes
+
+    def handle(self, *args, **options):
+        endpoints = options['endpoint'] or ENDPOINTS
+        papeis = options['papel'] or list(PAPEIS)
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as erro:
+                raise CommandError(f'Não foi possível ler a baseline: {erro}')
+
+        resultados = {}
+        for papel in papeis:
+            perfil = self._usuario(PAPEIS[papel])
+            if perfil is None:
+                self.stderr.write(self.style.WARNING(f'Nenhum usuário com o papel {papel!r}; pulando.'))
+                continue
+            token, _ = Token.objects.get_or_create(user=perfil.user)
+            # Mesmo caminho da produção: autenticação por token e host permitido
+            client = Client(SERVER_NAME='localhost', HTTP_AUTHORIZATION=f'Token {token.key}')
+            for endpoint, metodo, caminho, dados in self._pedidos(perfil, endpoints, options['senha']):
+                resultados[f'{endpoint}:{papel}'] = self._medir(
+                    client, metodo, caminho, dados, options['repeticoes'], options['aquecimento']
+                )
+        if not resultados:
+            raise CommandError('Nada medido: gere uma massa com o comando gerar_dados_sinteticos.')
+
+        variacoes, regressoes = self._comparar(resultados, baseline, options['tolerancia']) if baseline else ({}, [])
+        if options['salvar_baseline']:
+            with open(options['salvar_baseline'], 'w') as f:
+                json.dump(resultados, f, indent=2, sort_keys=True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(resultados))
+        else:
+            for chave, medida in resultados.items():
+                self.stdout.write(
+                    f"  {chave:<36} p50 {medida['p50_ms']:>8} ms  p95 {medida['p95_ms']:>8} ms  "
+                    f"p99 {medida['p99_ms']:>8} ms  {medida['consultas']:>3} consultas  "
+                    f"{medida['pico_memoria_kb']:>8} KB  {medida['erros']} erros"
+                    + (f"  (p50 {variacoes[chave]:+.0%})" if chave in variacoes else '')
+                )
+
+        if regressoes:
+            raise CommandError('Regressões em relação à baseline:\n' + '\n'.join(regressoes))
+        if baseline:
+            self.stdout.write(self.style.SUCCESS('Sem regressões em relação à baseline.'))
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import os
+import statistics
+import time
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand, CommandError
+
+class Command(BaseCommand):
+    help = (
+        'Gera carga HTTP concorrente contra um servidor em execução (WSGI ou ASGI) e '
+        'mede requisições por segundo, latência e memória (RSS) dos workers. '
+        'Ex: rode contra o gunicorn e contra o uvicorn com o mesmo número de workers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Ex: http://127.0.0.1:8001/api/afericoes/check_exists/?cr=900&data=2025-11-12')
+        parser.add_argument('--token', help='Token de autenticação (cabeçalho Authorization: Token ...)')
+        parser.add_argument(
+            '--concorrencia', type=int, default=50,
+            help='Conexões simultâneas (padrão: 50)'
+        )
+        parser.add_argument(
+            '--duracao', type=float, default=10,
+            help='Segundos de carga (padrão: 10)'
+        )
+        parser.add_argument(
+            '--pid', type=int, action='append', default=[],
+            help='PID do processo mestre do servidor (repetível); soma o RSS dele e dos filhos'
+        )
+        parser.add_argument('--json', action='store_true', help='Imprime o resultado em JSON')
+
+    # --- Memória (Linux: /proc) ---
+
+    def _processos(self, pid):
+        pids = [pid]
+        for tarefa in os.listdir(f'/proc/{pid}/task'):
+            try:
+                with open(f'/proc/{pid}/task/{tarefa}/children') as f:
+                    for filho in f.read().split():
+                        pids += self._processos(int(filho))
+            except OSError:
+                continue
+        return pids
+
+    def _rss_mb(self, pids):
+        total = 0
+        for pid in {p for mestre in pids for p in self._processos(mestre)}:
+            try:
+                with open(f'/proc/{pid}/status') as f:
+                    linha = next(linha for linha in f if linha.startswith('VmRSS:'))
+                total += int(linha.split()[1])
+            except (OSError, StopIteration):
+                continue
+        return total / 1024
+
+    async def _medir_memoria(self, pids, fim, picos):
+        while time.monotonic() < fim:
+            picos.append(self._rss_mb(pids))
+            await asyncio.sleep(0.5)
+
+    # --- Carga ---
+
+    async def _conectar(self, url):
+        porta = url.port or (443 if url.scheme == 'https' else 80)
+        return await asyncio.open_connection(url.hostname, porta, ssl=url.scheme == 'https')
+
+    async def _ler_resposta(self, reader):
+        status = int((await reader.readline()).split()[1])
+        cabecalhos = {}
+        while (linha := await reader.readline()) not in (b'\r\n', b'\n', b''):
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            cabecalhos[nome.strip().lower()] = valor.strip().lower()
+
+        if cabecalhos.get('transfer-encoding') == 'chunked':
+            while tamanho := int((await reader.readline()).split(b';')[0], 16):
+                await reader.readexactly(tamanho + 2)
+            await reader.readline()
+        else:
+            await reader.readexactly(int(cabecalhos.get('content-length', 0)))
+        return status, cabecalhos.get('connection') == 'close'
+
+    async def _cliente(self, url, pedido, fim, latencias, erros):
+        reader, writer = await self._conectar(url)
+        try:
+            while time.monotonic() < fim:
+                inicio = time.perf_counter()
+                writer.write(pedido)
+                await writer.drain()
+                status, fechar = await self._ler_resposta(reader)
+                latencias.append(time.perf_counter() - inicio)
+                if status >= 400:
+                    erros.append(status)
+                if fechar:
+                    writer.close()
+                    reader, writer = await self._conectar(url)
+        finally:
+            writer.close()
+
+    async def _executar(self, url, pedido, options):
+        latencias, erros, picos = [], [], []
+        fim = time.monotonic() + options['duracao']
+        tarefas = [self._cliente(url, pedido, fim, latencias, erros) for _ in range(options['concorrencia'])]
+        if options['pid']:
+            tarefas.append(self._medir_memoria(options['pid'], fim, picos))
+        inicio = time.perf_counter()
+        await asyncio.gather(*tarefas)
+        return latencias, erros, picos, time.perf_counter() - inicio
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme not in ('http', 'https') or not url.hostname:
+            raise CommandError('Informe uma URL http(s) completa.')
+        caminho = url.path + (f'?{url.query}' if url.query else '')
+        cabecalhos = f'GET {caminho or "/"} HTTP/1.1\r\nHost: {url.netloc}\r\nAccept: application/json\r\n'
+        if options['token']:
+            cabecalhos += f"Authorization: Token {options['token']}\r\n"
+        pedido = (cabecalhos + '\r\n').encode()
+
+        latencias, erros, picos, tempo = asyncio.run(self._executar(url, pedido, options))
+        if not latencias:
+            raise CommandError('Nenhuma resposta recebida.')
+
+        percentis = statistics.quantiles(latencias, n=100) if len(latencias) > 1 else latencias * 99
+        resultado = {
+            'url': options['url'],
+            'concorrencia': options['concorrencia'],
+            'requisicoes': len(latencias),
+            'erros': len(erros),
+            'req_por_segundo': round(len(latencias) / tempo, 1),
+            'latencia_p50_ms': round(percentis[49] * 1000, 2),
+            'latencia_p95_ms': round(percentis[94] * 1000, 2),
+            'latencia_p99_ms': round(percentis[98] * 1000, 2),
+            'rss_pico_mb': round(max(picos), 1) if picos else None,
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(resultado))
+            return
+        for chave, valor in resultado.items():
+            self.stdout.write(f'  {chave}: {valor}')
+        if resultado['rss_pico_mb']:
+            self.stdout.write(self.style.SUCCESS(
+                f"{resultado['req_por_segundo'] / resultado['rss_pico_mb']:.2f} req/s por MB de RSS"
+            ))
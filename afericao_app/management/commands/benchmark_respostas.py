@@ -0,0 +1,77 @@
+import gzip
+import statistics
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from afericao_app import leitura
+from afericao_app.compressao import NIVEIS_GRANDES, brotli
+from afericao_app.models import Afericao
+from afericao_app.renderers import MessagePackRenderer, ORJSONRenderer, msgpack, orjson
+from afericao_app.serializers import CentroResponsabilidadeSerializer
+from afericao_app.views import CentroResponsabilidadeViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a codificação (JSON do DRF, orjson, MessagePack) e a compressão (gzip, '
+        'brotli) das listas grandes da API: tempo mediano e bytes de cada formato. '
+        "Rode sobre uma massa do 'gerar_dados_sinteticos'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--linhas', type=int, default=5000, help='Aferições na lista medida (padrão: 5000)'
+        )
+        parser.add_argument('--repeticoes', type=int, default=10, help='Medições de cada formato (padrão: 10)')
+
+    def _medir(self, repeticoes, funcao, entrada):
+        """Mediana (ms) e o resultado de 'funcao(entrada)'."""
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            saida = funcao(entrada)
+            tempos.append(time.perf_counter() - inicio)
+        return statistics.median(tempos) * 1000, saida
+
+    def _linha(self, nome, ms, tamanho, referencia):
+        self.stdout.write(
+            f'  {nome:<22} {ms:>9.2f} ms  {tamanho / 1024:>10.1f} KB  ({tamanho / referencia:.0%})'
+        )
+
+    def handle(self, *args, **options):
+        repeticoes = options['repeticoes']
+        # Mesmos dados das respostas: a leitura rápida da listagem e a lista de CRs
+        afericoes = leitura.representar_lista(
+            leitura.valores_lista(Afericao.objects.order_by('-data_afericao', 'cod_afericao')[:options['linhas']])
+        )
+        if not afericoes:
+            raise CommandError('Nenhuma aferição: gere uma massa com o comando gerar_dados_sinteticos.')
+        centros = CentroResponsabilidadeSerializer(CentroResponsabilidadeViewSet.queryset.all(), many=True).data
+
+        codificadores = [('JSON (DRF)', JSONRenderer().render)]
+        if orjson is not None:
+            codificadores.append(('orjson', ORJSONRenderer().render))
+        if msgpack is not None:
+            codificadores.append(('MessagePack', MessagePackRenderer().render))
+        # Os níveis do CompressaoMiddleware: o padrão e o das respostas grandes
+        compressores = [
+            (f'gzip {nivel}', lambda corpo, nivel=nivel: gzip.compress(corpo, compresslevel=nivel))
+            for nivel in (6, NIVEIS_GRANDES['gzip'])
+        ]
+        if brotli is not None:
+            compressores += [
+                (f'brotli {nivel}', lambda corpo, nivel=nivel: brotli.compress(corpo, quality=nivel))
+                for nivel in (settings.COMPRESSAO_BROTLI_QUALIDADE, NIVEIS_GRANDES['br'])
+            ]
+
+        for nome, dados in [(f'aferições ({len(afericoes)} linhas)', afericoes), (f'CRs ({len(centros)})', centros)]:
+            self.stdout.write(nome)
+            referencia = None
+            for codificador, render in codificadores:
+                ms, corpo = self._medir(repeticoes, render, dados)
+                referencia = referencia or len(corpo)
+                self._linha(codificador, ms, len(corpo), referencia)
+                for compressor, comprimir in compressores:
+                    ms_compressao, comprimido = self._medir(repeticoes, comprimir, corpo)
+                    self._linha(f'  + {compressor}', ms_compressao, len(comprimido), referencia)
@@ -0,0 +1,68 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from afericao_app import leitura
+from afericao_app.models import Afericao
+from afericao_app.serializers import AfericaoDetailSerializer, AfericaoListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara a leitura rápida da listagem e do detalhe de aferições (leitura.py) '
+        'com os serializers do DRF: tempo mediano para ler e montar uma página, '
+        'separando o tempo de serialização. Rode sobre uma massa do '
+        "'gerar_dados_sinteticos'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=500, help='Aferições por página (padrão: 500)')
+        parser.add_argument('--repeticoes', type=int, default=20, help='Medições de cada caminho (padrão: 20)')
+
+    def _medir(self, repeticoes, ler, montar):
+        """Medianas (ms) do total e só da montagem da resposta."""
+        totais, montagens = [], []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            linhas = ler()
+            meio = time.perf_counter()
+            montar(linhas)
+            fim = time.perf_counter()
+            totais.append(fim - inicio)
+            montagens.append(fim - meio)
+        return statistics.median(totais) * 1000, statistics.median(montagens) * 1000
+
+    def handle(self, *args, **options):
+        linhas, repeticoes = options['linhas'], options['repeticoes']
+        # Mesmo queryset da listagem (ver views.afericoes_visiveis)
+        queryset = Afericao.objects.order_by('-data_afericao', 'cod_afericao')
+        modelos = queryset.select_related('fiscal__user', 'centro_responsabilidade').defer('busca')
+        if not queryset.exists():
+            raise CommandError('Nenhuma aferição: gere uma massa com o comando gerar_dados_sinteticos.')
+        pk = queryset.values_list('pk', flat=True).first()
+
+        cenarios = [
+            (f'lista ({linhas} linhas)', [
+                ('serializer', lambda: list(modelos[:linhas]),
+                 lambda pagina: AfericaoListSerializer(pagina, many=True).data),
+                ('leitura rápida', lambda: list(leitura.valores_lista(queryset)[:linhas]),
+                 leitura.representar_lista),
+            ]),
+            ('detalhe', [
+                ('serializer', lambda: queryset.defer('busca').get(pk=pk),
+                 lambda afericao: AfericaoDetailSerializer(afericao).data),
+                ('leitura rápida', lambda: leitura.valores_detalhe(queryset).get(pk=pk),
+                 leitura.representar_detalhe),
+            ]),
+        ]
+        for nome, caminhos in cenarios:
+            self.stdout.write(nome)
+            medidas = {}
+            for caminho, ler, montar in caminhos:
+                ler(), montar(ler()) # Aquecimento
+                medidas[caminho] = total, montagem = self._medir(repeticoes, ler, montar)
+                self.stdout.write(f'  {caminho:<16} total {total:>9.2f} ms  serialização {montagem:>9.2f} ms')
+            (total_ref, montagem_ref), (total, montagem) = medidas.values()
+            self.stdout.write(self.style.SUCCESS(
+                f'  {total_ref / total:.1f}x mais rápido no total, '
+                f'{montagem_ref / montagem:.1f}x na serialização'
+            ))
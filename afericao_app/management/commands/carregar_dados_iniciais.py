@@ -1,27 +1,59 @@
 import csv
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.db import transaction
+from afericao_app.authentication import esquecer_tokens_dos_usuarios
+from afericao_app.cache import invalidar_centros
 from afericao_app.models import PerfilUsuario, CentroResponsabilidade
+from afericao_app.utils import float_br, hash_senha, inicializar_worker
+
+
+def _em_lotes(iteravel, tamanho):
+    """Agrupa um iterável em listas de até 'tamanho' itens, sem ler tudo."""
+    iterador = iter(iteravel)
+    while lote := list(islice(iterador, tamanho)):
+        yield lote
+
 
 class Command(BaseCommand):
     help = 'Carrega os dados iniciais dos arquivos BD_Usuários.csv e BD_CR.csv'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bulk', action='store_true',
+            help='Modo em lote: upsert com bulk_create em uma única transação (para cadastros grandes)'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='(Modo em lote) Processa tudo e desfaz a transação no final, sem gravar nada'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='(Modo em lote) Linhas do CSV processadas por vez (padrão: 1000)'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='(Modo em lote) Processos para gerar as senhas dos novos usuários (padrão: nº de CPUs)'
+        )
+
     def _clean_float(self, s):
         """Helper para converter strings numéricas formatadas (BR) para float."""
-        if not s:
-            return None
         try:
-            s_cleaned = s.strip()            # 1. Remove espaços
-            s_cleaned = s_cleaned.replace('.', '')   # 2. Remove separador de milhar
-            s_cleaned = s_cleaned.replace(',', '.')   # 3. Troca vírgula decimal por ponto
-            return float(s_cleaned)
+            return float_br(s)
         except (ValueError, TypeError):
             self.stdout.write(self.style.ERROR(f'Não foi possível converter o valor flutuante: {s}'))
             return None
 
     def handle(self, *args, **kwargs):
+        if kwargs.get('bulk'):
+            return self._handle_bulk(kwargs)
+
         # --- 1. Carregar Usuários e Perfis ---
         self.stdout.write(self.style.SUCCESS('Iniciando carga de Usuários e Perfis...'))
         
@@ -113,4 +145,159 @@ class Command(BaseCommand):
                 else:
                     self.stdout.write(self.style.WARNING(f'CR {row["Nome_CR"]} já existia.'))
 
-        self.stdout.write(self.style.SUCCESS('Carga de Centros de Responsabilidade finalizada.'))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS('Carga de Centros de Responsabilidade finalizada.'))
+
+    # --- Modo em lote (--bulk) ---
+
+    def _handle_bulk(self, options):
+        """
+        Mesma carga do modo padrão, mas pensada para o cadastro completo:
+        - lê os CSVs em lotes, sem carregá-los inteiros na memória;
+        - grava cada lote com um único bulk_create(update_conflicts=True),
+          atualizando os registros que já existiam (upsert);
+        - gera as senhas dos usuários novos em paralelo (ProcessPoolExecutor);
+        - busca os perfis de Fiscal/Coordenador num mapa CPF -> perfil
+          carregado uma vez, em vez de duas consultas por CR.
+        Tudo roda em uma transação: ou a carga inteira entra, ou nada entra.
+        """
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        workers = options['workers']
+
+        pool = None
+        if workers > 1 and not dry_run:
+            # 'spawn', não 'fork': o pool sobe os processos sob demanda, já com a
+            # transação aberta, e um filho de 'fork' herdaria a conexão com o banco
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=inicializar_worker,
+            )
+
+        try:
+            with transaction.atomic():
+                total_usuarios, atualizados = self._carregar_usuarios_em_lote(batch_size, pool, dry_run)
+                total_crs = self._carregar_crs_em_lote(batch_size)
+                if dry_run:
+                    transaction.set_rollback(True)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(
+                f'Simulação concluída: {total_usuarios} usuários e {total_crs} CRs processados. '
+                'Nada foi gravado.'
+            ))
+        else:
+            # O bulk_create não dispara os sinais de post_save: o cache da lista de
+            # CRs e o dos tokens (User + Perfil) dos usuários que já existiam
+            invalidar_centros()
+            esquecer_tokens_dos_usuarios(atualizados)
+            self.stdout.write(self.style.SUCCESS(
+                f'Carga em lote finalizada: {total_usuarios} usuários e {total_crs} CRs.'
+            ))
+
+    def _carregar_usuarios_em_lote(self, batch_size, pool, dry_run):
+        self.stdout.write(self.style.SUCCESS('Iniciando carga em lote de Usuários e Perfis...'))
+        usuarios_csv_path = os.path.join(settings.BASE_DIR, 'data', 'bd_usuarios.csv')
+
+        total = 0
+        atualizados = [] # ids dos usuários que já existiam
+        with open(usuarios_csv_path, mode='r', encoding='utf-8') as f:
+            for linhas in _em_lotes(csv.DictReader(f), batch_size):
+                cpfs = [row['CPF_Usuario'] for row in linhas]
+                existentes = set(User.objects.filter(username__in=cpfs).values_list('username', flat=True))
+
+                # Senha inicial = CPF, só para quem ainda não existe (**AVISO DE SEGURANÇA**,
+                # como no modo padrão). Usuários existentes mantêm a senha atual.
+                novos = [cpf for cpf in cpfs if cpf not in existentes]
+                if dry_run:
+                    senhas = {}
+                elif pool is not None:
+                    senhas = dict(zip(novos, pool.map(hash_senha, novos, chunksize=16)))
+                else:
+                    senhas = {cpf: hash_senha(cpf) for cpf in novos}
+
+                usuarios = []
+                for row in linhas:
+                    primeiro_nome, _, ultimo_nome = row['Nome_Usuario'].partition(' ')
+                    usuarios.append(User(
+                        username=row['CPF_Usuario'],
+                        first_name=primeiro_nome,
+                        last_name=ultimo_nome,
+                        email=row['E-mail'],
+                        # Senha inutilizável para quem já existe: não entra no UPDATE
+                        password=senhas.get(row['CPF_Usuario']) or make_password(None),
+                    ))
+                User.objects.bulk_create(
+                    usuarios,
+                    update_conflicts=True,
+                    unique_fields=['username'],
+                    update_fields=['first_name', 'last_name', 'email'],
+                )
+
+                ids = dict(User.objects.filter(username__in=cpfs).values_list('username', 'id'))
+                atualizados += [ids[cpf] for cpf in existentes]
+                PerfilUsuario.objects.bulk_create(
+                    [
+                        PerfilUsuario(
+                            user_id=ids[row['CPF_Usuario']],
+                            cpf=row['CPF_Usuario'],
+                            telefone=row['Telefone'],
+                            perfil=row['Perfil'],
+                        )
+                        for row in linhas
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['user'],
+                    update_fields=['cpf', 'telefone', 'perfil'],
+                )
+
+                total += len(linhas)
+                self.stdout.write(f'  Usuários: {total} processados ({len(novos)} novos neste lote)')
+
+        return total, atualizados
+
+    def _carregar_crs_em_lote(self, batch_size):
+        self.stdout.write(self.style.SUCCESS('Iniciando carga em lote de Centros de Responsabilidade...'))
+        cr_csv_path = os.path.join(settings.BASE_DIR, 'data', 'bd_cr.csv')
+
+        # Mapa CPF -> id do perfil, carregado uma única vez
+        perfis = dict(PerfilUsuario.objects.values_list('cpf', 'pk'))
+
+        total = 0
+        with open(cr_csv_path, mode='r', encoding='utf-8') as f:
+            # Pula linhas vazias (ex: Mogi Fácil Biritiba Ussu [cite: 2])
+            linhas_validas = (row for row in csv.DictReader(f) if row['Cod_CR'])
+            for linhas in _em_lotes(linhas_validas, batch_size):
+                crs = [
+                    CentroResponsabilidade(
+                        cod_cr=int(row['Cod_CR']),
+                        nome_cr=row['Nome_CR'],
+                        endereco_cr=row['Endereco_CR'],
+                        latitude=self._clean_float(row.get('Latitude')),
+                        longitude=self._clean_float(row.get('Longitude')),
+                        secretaria_responsavel=row['Secretaria_Responsavel'],
+                        postos_trab_previstos=int(row['Postos_trab_previstos']) if row['Postos_trab_previstos'] else 0,
+                        fiscal_padrao_id=perfis.get(row['CPF_Fiscal']),
+                        coordenador_id=perfis.get(row['CPF_Coordenador']),
+                    )
+                    for row in linhas
+                ]
+                CentroResponsabilidade.objects.bulk_create(
+                    crs,
+                    update_conflicts=True,
+                    unique_fields=['cod_cr'],
+                    update_fields=[
+                        'nome_cr', 'endereco_cr', 'latitude', 'longitude',
+                        'secretaria_responsavel', 'postos_trab_previstos',
+                        'fiscal_padrao', 'coordenador', 'atualizado_em',
+                        # Gestor Contrato continua sendo preenchido via Admin
+                    ],
+                )
+
+                total += len(crs)
+                self.stdout.write(f'  CRs: {total} processados')
+
+        return total
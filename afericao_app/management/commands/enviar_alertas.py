@@ -0,0 +1,132 @@
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from afericao_app.models import AlertaGestor
+
+class Command(BaseCommand):
+    help = (
+        'Envia os alertas pendentes aos gestores de contrato: um e-mail de resumo '
+        'por gestor, todos pela mesma conexão SMTP.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limite', type=int, default=500,
+            help='Alertas processados por rodada (padrão: 500)'
+        )
+        parser.add_argument(
+            '--continuo', action='store_true',
+            help='Fica em execução, processando a fila a cada --intervalo segundos'
+        )
+        parser.add_argument(
+            '--intervalo', type=int, default=60,
+            help='Segundos entre as rodadas no modo contínuo (padrão: 60)'
+        )
+
+    # --- Montagem do resumo ---
+
+    def _linha(self, alerta):
+        afericao = alerta.afericao
+        if alerta.motivo == 'nota_servico':
+            detalhe = f"nota {afericao.get_serv_nota_display()}"
+        else:
+            detalhe = f"{afericao.postos_ocup} de {afericao.postos_prev} postos ocupados"
+        return (
+            f"- {timezone.localtime(afericao.data_afericao):%d/%m/%Y} | "
+            f"{afericao.centro_responsabilidade}: {alerta.get_motivo_display()} ({detalhe})"
+        )
+
+    def _mensagem(self, gestor, alertas, conexao):
+        linhas = '\n'.join(self._linha(alerta) for alerta in alertas)
+        corpo = (
+            f"Olá, {gestor}.\n\n"
+            f"As aferições abaixo, de CRs sob sua gestão, precisam de atenção:\n\n"
+            f"{linhas}\n\n"
+            f"Mensagem automática do GALP. Não responda este e-mail."
+        )
+        return EmailMessage(
+            subject=f"[GALP] {len(alertas)} alerta(s) de aferição",
+            body=corpo,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[gestor.user.email],
+            connection=conexao,
+        )
+
+    # --- Processamento da fila ---
+
+    def _rodada(self, limite):
+        """Processa até 'limite' alertas pendentes. Devolve (lidos, enviados, com falha)."""
+        with transaction.atomic():
+            # 'skip_locked': vários workers podem rodar sem pegar o mesmo alerta
+            alertas = list(
+                AlertaGestor.objects
+                .filter(status='pendente')
+                .select_related('afericao__centro_responsabilidade', 'gestor__user')
+                .select_for_update(skip_locked=True, of=('self',))
+                .order_by('criado_em')[:limite]
+            )
+            if not alertas:
+                return 0, 0, 0
+
+            por_gestor = defaultdict(list)
+            for alerta in alertas:
+                por_gestor[alerta.gestor_id].append(alerta)
+
+            enviados, sem_email, falhas = [], [], {}
+            try:
+                # Uma conexão SMTP aberta uma vez e reutilizada em todos os resumos
+                with get_connection() as conexao:
+                    for alertas_gestor in por_gestor.values():
+                        gestor = alertas_gestor[0].gestor
+                        if not gestor.user.email:
+                            sem_email += alertas_gestor
+                            continue
+                        try:
+                            self._mensagem(gestor, alertas_gestor, conexao).send()
+                        except Exception as erro:
+                            falhas.setdefault(str(erro), []).extend(alertas_gestor)
+                        else:
+                            enviados += alertas_gestor
+            except Exception as erro:
+                # Falha ao abrir/fechar a conexão: o que não foi enviado volta à fila
+                processados = {a.pk for a in enviados + sem_email}
+                for lista in falhas.values():
+                    processados.update(a.pk for a in lista)
+                falhas.setdefault(str(erro), []).extend(a for a in alertas if a.pk not in processados)
+
+            agora = timezone.now()
+            AlertaGestor.objects.filter(pk__in=[a.pk for a in enviados]).update(
+                status='enviado', enviado_em=agora, ultimo_erro=None
+            )
+            AlertaGestor.objects.filter(pk__in=[a.pk for a in sem_email]).update(
+                status='descartado', ultimo_erro='Gestor sem e-mail cadastrado.'
+            )
+            for erro, lista in falhas.items():
+                AlertaGestor.objects.filter(pk__in=[a.pk for a in lista]).update(
+                    tentativas=F('tentativas') + 1,
+                    ultimo_erro=erro,
+                    status=Case(
+                        When(tentativas__gte=settings.ALERTAS_MAX_TENTATIVAS - 1, then=Value('falhou')),
+                        default=Value('pendente'),
+                    ),
+                )
+        return len(alertas), len(enviados), sum(len(lista) for lista in falhas.values())
+
+    def handle(self, *args, **options):
+        limite = options['limite']
+        while True:
+            lidos, enviados, com_falha = self._rodada(limite)
+            if lidos:
+                self.stdout.write(f'  {enviados} alertas enviados, {com_falha} com falha')
+            # Fila vazia (ou servidor falhando): encerra ou espera a próxima rodada
+            if lidos < limite or com_falha:
+                if not options['continuo']:
+                    break
+                time.sleep(options['intervalo'])
+
+        self.stdout.write(self.style.SUCCESS('Fila de alertas processada.'))
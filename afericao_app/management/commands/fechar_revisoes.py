@@ -0,0 +1,46 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from afericao_app.cache import invalidar_afericoes
+from afericao_app.models import Afericao
+from afericao_app.utils import intervalo_local
+
+class Command(BaseCommand):
+    help = (
+        'Fecha para revisão (status_revisao=True) as aferições cujo prazo D+1 '
+        'terminou. Feito para rodar diariamente (cron), logo após a meia-noite.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Aferições fechadas por UPDATE (padrão: 5000)'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+
+        # Prazo D+1: a aferição de dia D pode ser revisada até o fim de
+        # D + REVISAO_PRAZO_DIAS (fuso local); fecha tudo que é anterior.
+        ultimo_dia_aberto = timezone.localdate() - timedelta(days=settings.REVISAO_PRAZO_DIAS)
+        corte, _ = intervalo_local(ultimo_dia_aberto)
+
+        # Só lê o índice parcial das aferições abertas ('afericao_revisao_aberta_idx')
+        vencidas = Afericao.objects.filter(status_revisao=False, data_afericao__lt=corte)
+
+        # UPDATE direto, sem save(): 'data_ultima_revisao' (revisão feita pelo
+        # fiscal) não muda. 'atualizado_em' avisa o /api/sync/.
+        total = 0
+        fiscais = set()
+        while lote := list(vencidas.values_list('pk', 'fiscal_id')[:chunk_size]):
+            total += Afericao.objects.filter(
+                pk__in=[chave for chave, _ in lote], status_revisao=False
+            ).update(status_revisao=True, atualizado_em=timezone.now())
+            fiscais.update(fiscal_id for _, fiscal_id in lote)
+
+        if total:
+            invalidar_afericoes(*fiscais)
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} aferições fechadas para revisão (anteriores a {ultimo_dia_aberto:%d/%m/%Y}).'
+        ))
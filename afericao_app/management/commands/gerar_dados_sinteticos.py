@@ -0,0 +1,192 @@
+import random
+from datetime import datetime, time, timedelta
+from itertools import islice
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from afericao_app.cache import invalidar_afericoes, invalidar_centros
+from afericao_app.management.commands.importar_afericoes import Command as Importador
+from afericao_app.models import CentroResponsabilidade, PerfilUsuario
+
+# Senha de todos os usuários sintéticos (usada pelo 'benchmark_endpoints' no login)
+SENHA_PADRAO = 'galp-sintetico'
+DOMINIO_EMAIL = '@sintetico.invalid'
+
+SECRETARIAS = [
+    'Gestão e Contratações Públicas', 'Educação', 'Saúde', 'Assistência Social',
+    'Cultura e Turismo', 'Esporte e Lazer', 'Meio Ambiente', 'Segurança',
+]
+TIPOS_CR = ['EM', 'EMEI', 'UBS', 'CRAS', 'Centro Esportivo', 'Biblioteca', 'Mogi Fácil', 'Sede']
+# Centro de Mogi das Cruzes e o raio (graus) em que os CRs são espalhados
+CENTRO_MAPA = (-23.5229, -46.1880)
+RAIO_MAPA = 0.15
+
+# Distribuição das notas (1 a 5): a maioria entre Regular e Ótimo
+PESOS_NOTAS = [3, 7, 20, 45, 25]
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera uma massa de dados sintética e plausível (usuários, CRs e aferições) '
+        'para testes de carga e benchmarks. Grava em lotes (COPY no PostgreSQL, '
+        'bulk_create nos demais bancos). Não use em produção.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--centros', type=int, default=2000, help='CRs criados (padrão: 2000)')
+        parser.add_argument('--fiscais', type=int, default=500, help='Fiscais criados (padrão: 500)')
+        parser.add_argument(
+            '--coordenadores', type=int, default=20,
+            help='Coordenadores e Gestores de Contrato criados, de cada (padrão: 20)'
+        )
+        parser.add_argument(
+            '--afericoes', type=int, default=1_000_000,
+            help='Aferições criadas (padrão: 1000000)'
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Semente aleatória (padrão: 42)')
+        parser.add_argument(
+            '--chunk-size', type=int, default=10000,
+            help='Aferições geradas e gravadas por transação (padrão: 10000)'
+        )
+        parser.add_argument(
+            '--senha', default=SENHA_PADRAO,
+            help=f'Senha de todos os usuários criados (padrão: {SENHA_PADRAO})'
+        )
+        parser.add_argument(
+            '--sem-consolidado', action='store_true',
+            help='Não recalcula o Desempenho Mensal ao final'
+        )
+
+    # --- Usuários e CRs ---
+
+    def _criar_perfis(self, quantidade, perfil, nome, senha_hash, proximo_cpf):
+        """Cria 'quantidade' usuários + perfis. CPFs sintéticos começam com 9."""
+        cpfs = [f'9{proximo_cpf + i:010d}' for i in range(quantidade)]
+        users = User.objects.bulk_create([
+            User(username=cpf, first_name=nome, last_name=f'Sintético {cpf[-5:]}',
+                 email=f'{cpf}{DOMINIO_EMAIL}', password=senha_hash)
+            for cpf in cpfs
+        ], batch_size=1000)
+        return PerfilUsuario.objects.bulk_create([
+            PerfilUsuario(user=user, cpf=cpf, perfil=perfil) for user, cpf in zip(users, cpfs)
+        ], batch_size=1000)
+
+    def _criar_centros(self, rnd, quantidade, fiscais, coordenadores, gestores):
+        primeiro = (CentroResponsabilidade.objects.aggregate(maior=Max('cod_cr'))['maior'] or 0) + 1
+        centros = []
+        for cod_cr in range(primeiro, primeiro + quantidade):
+            tipo = rnd.choice(TIPOS_CR)
+            centros.append(CentroResponsabilidade(
+                cod_cr=cod_cr,
+                nome_cr=f'{tipo} {cod_cr}',
+                endereco_cr=f'Rua Sintética, {rnd.randint(1, 3000)} - Mogi das Cruzes',
+                latitude=CENTRO_MAPA[0] + rnd.uniform(-RAIO_MAPA, RAIO_MAPA),
+                longitude=CENTRO_MAPA[1] + rnd.uniform(-RAIO_MAPA, RAIO_MAPA),
+                secretaria_responsavel=rnd.choice(SECRETARIAS),
+                postos_trab_previstos=rnd.randint(1, 12),
+                fiscal_padrao=rnd.choice(fiscais),
+                coordenador=rnd.choice(coordenadores) if coordenadores else None,
+                gestor_contrato=rnd.choice(gestores) if gestores else None,
+            ))
+        return CentroResponsabilidade.objects.bulk_create(centros, batch_size=1000)
+
+    # --- Aferições ---
+
+    def _afericoes(self, rnd, centros, total, agora):
+        """
+        Cada CR é aferido uma vez por dia útil, do dia de hoje para trás,
+        alternando os CRs: os códigos (AAAAMMDD + Cod_CR) nunca se repetem.
+        """
+        hoje = timezone.localdate()
+        limite_revisao = hoje - timedelta(days=settings.REVISAO_PRAZO_DIAS)
+        fuso = timezone.get_default_timezone()
+        # Cada CR tem uma "qualidade" própria: uns vão sempre bem, outros mal
+        qualidade = {cr.cod_cr: rnd.choice([-1, 0, 0, 0, 1]) for cr in centros}
+
+        dia, gerados = hoje, 0
+        while gerados < total:
+            if dia.weekday() < 5:
+                for cr in centros[:total - gerados]:
+                    notas = [
+                        min(5, max(1, nota + qualidade[cr.cod_cr]))
+                        for nota in rnd.choices(range(1, 6), weights=PESOS_NOTAS, k=4)
+                    ]
+                    postos_prev = cr.postos_trab_previstos
+                    faltas = rnd.choice([1, 2]) if rnd.random() < 0.1 else 0
+                    # Mesmas chaves de 'importar_afericoes.CAMPOS'
+                    yield {
+                        'cod_afericao': f'{dia:%Y%m%d}{cr.cod_cr}',
+                        'data_afericao': datetime.combine(
+                            dia, time(rnd.randint(7, 17), rnd.randint(0, 59)), tzinfo=fuso
+                        ),
+                        'data_ultima_revisao': None,
+                        'fiscal_id': cr.fiscal_padrao_id,
+                        'centro_responsabilidade_id': cr.cod_cr,
+                        'status_revisao': dia < limite_revisao,
+                        'postos_prev': postos_prev,
+                        'postos_ocup': max(0, postos_prev - faltas),
+                        'postos_obs': 'Falta de funcionários' if faltas else None,
+                        'serv_nota': notas[0],
+                        'mat_qt_nota': notas[1],
+                        'mat_ql_nota': notas[2],
+                        'mat_rep_nota': notas[3],
+                        'mat_obs': None,
+                        'uso_maq': rnd.choice(['Sim', 'Não']),
+                        'maq_obs': None,
+                        'uso_epi': rnd.choices(['Sim', 'Parcial', 'Não'], weights=[80, 15, 5])[0],
+                        'epi_obs': None,
+                        'atualizado_em': agora,
+                    }
+                    gerados += 1
+            dia -= timedelta(days=1)
+
+    def handle(self, *args, **options):
+        if min(options['centros'], options['fiscais']) < 1:
+            raise CommandError('--centros e --fiscais devem ser maiores que zero.')
+        rnd = random.Random(options['seed'])
+        agora = timezone.now()
+
+        # Um único hash para todos: o PBKDF2 de cada usuário levaria minutos
+        senha_hash = make_password(options['senha'])
+        proximo_cpf = User.objects.filter(email__endswith=DOMINIO_EMAIL).count()
+        with transaction.atomic():
+            perfis = {}
+            for perfil, quantidade, nome in [
+                ('Fiscal de Equipamento', options['fiscais'], 'Fiscal'),
+                ('Coordenador', options['coordenadores'], 'Coordenador'),
+                ('Gestor Contrato', options['coordenadores'], 'Gestor'),
+            ]:
+                perfis[perfil] = self._criar_perfis(quantidade, perfil, nome, senha_hash, proximo_cpf)
+                proximo_cpf += quantidade
+            centros = self._criar_centros(
+                rnd, options['centros'], perfis['Fiscal de Equipamento'],
+                perfis['Coordenador'], perfis['Gestor Contrato'],
+            )
+        invalidar_centros()
+        self.stdout.write(
+            f'  {sum(len(lista) for lista in perfis.values())} usuários e {len(centros)} CRs criados'
+        )
+
+        # Mesma gravação do 'importar_afericoes' (COPY ou bulk_create, sem duplicar)
+        importador = Importador()
+        gravar = importador._gravar_copy if connection.vendor == 'postgresql' else importador._gravar_bulk_create
+        afericoes = self._afericoes(rnd, centros, options['afericoes'], agora)
+        inseridas = 0
+        while lote := list(islice(afericoes, options['chunk_size'])):
+            with transaction.atomic():
+                inseridas += gravar(lote)
+            self.stdout.write(f'  {inseridas} aferições gravadas')
+
+        invalidar_afericoes(*(fiscal.pk for fiscal in perfis['Fiscal de Equipamento']))
+        if not options['sem_consolidado']:
+            call_command('recalcular_desempenho_mensal', stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Massa sintética gerada: {len(centros)} CRs, {inseridas} aferições '
+            f'(senha dos usuários: {options["senha"]!r}).'
+        ))
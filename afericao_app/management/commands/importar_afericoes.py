@@ -0,0 +1,272 @@
+import csv
+import io
+import math
+import os
+from datetime import datetime
+from itertools import islice
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from afericao_app.cache import invalidar_afericoes
+from afericao_app.models import Afericao, CentroResponsabilidade, PerfilUsuario
+from afericao_app.utils import float_br
+
+# Colunas gravadas, na ordem usada pelo COPY
+CAMPOS = [
+    'cod_afericao', 'data_afericao', 'data_ultima_revisao',
+    'fiscal_id', 'centro_responsabilidade_id', 'status_revisao',
+    'postos_prev', 'postos_ocup', 'postos_obs',
+    'serv_nota', 'mat_qt_nota', 'mat_ql_nota', 'mat_rep_nota', 'mat_obs',
+    'uso_maq', 'maq_obs', 'uso_epi', 'epi_obs',
+    'atualizado_em',
+]
+# Os 'desempenho_*' ficam de fora: o gatilho do banco calcula na gravação.
+# nota -> coluna no CSV
+NOTAS = {
+    'serv_nota': 'Serv_Nota',
+    'mat_qt_nota': 'Mat_Qt_Nota',
+    'mat_ql_nota': 'Mat_Ql_Nota',
+    'mat_rep_nota': 'Mat_Rep_Nota',
+}
+
+FORMATOS_DATA = ['%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d']
+VERDADEIRO = {'sim', 's', 'true', '1', 'verdadeiro'}
+FALSO = {'não', 'nao', 'n', 'false', '0', 'falso', ''}
+
+
+class LinhaInvalida(ValueError):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa o histórico de aferições (BD_Afericoes.csv). Lê o arquivo em lotes, '
+        'grava via COPY no PostgreSQL (bulk_create nos demais bancos), separa as linhas '
+        'inválidas em um arquivo de rejeitados e pode ser retomado após uma interrupção.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'arquivo', nargs='?',
+            help='Caminho do CSV (padrão: data/bd_afericoes.csv)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Linhas processadas e gravadas por transação (padrão: 5000)'
+        )
+        parser.add_argument(
+            '--rejeitados',
+            help='Arquivo para as linhas inválidas (padrão: <arquivo>.rejeitados.csv)'
+        )
+        parser.add_argument(
+            '--retomar', action='store_true',
+            help='Continua a partir do último lote gravado (arquivo <arquivo>.checkpoint)'
+        )
+        parser.add_argument(
+            '--sem-consolidado', action='store_true',
+            help='Não recalcula o Desempenho Mensal ao final'
+        )
+
+    # --- Conversões (formato brasileiro) ---
+
+    def _data(self, valor, obrigatoria=True):
+        valor = (valor or '').strip()
+        if not valor:
+            if obrigatoria:
+                raise LinhaInvalida('data vazia')
+            return None
+        for formato in FORMATOS_DATA:
+            try:
+                return timezone.make_aware(datetime.strptime(valor, formato))
+            except ValueError:
+                continue
+        raise LinhaInvalida(f'data inválida: {valor!r}')
+
+    def _inteiro(self, valor, campo):
+        try:
+            numero = float_br(valor)
+        except ValueError:
+            numero = None
+        # 'nan'/'inf' passam pelo float_br, mas não viram inteiro
+        if numero is None or not math.isfinite(numero) or numero != int(numero):
+            raise LinhaInvalida(f'{campo} inválido: {valor!r}')
+        return int(numero)
+
+    def _booleano(self, valor):
+        valor = (valor or '').strip().lower()
+        if valor in VERDADEIRO:
+            return True
+        if valor in FALSO:
+            return False
+        raise LinhaInvalida(f'Status_Revisao inválido: {valor!r}')
+
+    def _escolha(self, valor, choices, campo):
+        valor = (valor or '').strip()
+        for opcao, _ in choices:
+            if valor.lower() == opcao.lower():
+                return opcao
+        raise LinhaInvalida(f'{campo} inválido: {valor!r}')
+
+    def _texto(self, valor):
+        valor = (valor or '').strip()
+        return valor or None
+
+    def _converter(self, row, crs, perfis):
+        """Converte uma linha do CSV em um dicionário de CAMPOS."""
+        cod_afericao = (row.get('Cod_Afericao') or '').strip()
+        if not cod_afericao or len(cod_afericao) > 20:
+            raise LinhaInvalida(f'Cod_Afericao inválido: {cod_afericao!r}')
+
+        cod_cr = self._inteiro(row.get('Cod_CR'), 'Cod_CR')
+        if cod_cr not in crs:
+            raise LinhaInvalida(f'CR inexistente: {cod_cr}')
+        fiscal_id = perfis.get((row.get('CPF_Fiscal') or '').strip())
+        if fiscal_id is None:
+            raise LinhaInvalida(f"fiscal não cadastrado: {row.get('CPF_Fiscal')!r}")
+
+        dados = {
+            'cod_afericao': cod_afericao,
+            'data_afericao': self._data(row.get('Data_Afericao')),
+            'data_ultima_revisao': self._data(row.get('Data_Ultima_Revisao'), obrigatoria=False),
+            'fiscal_id': fiscal_id,
+            'centro_responsabilidade_id': cod_cr,
+            'status_revisao': self._booleano(row.get('Status_Revisao')),
+            'postos_prev': self._inteiro(row.get('Postos_Prev'), 'Postos_Prev'),
+            'postos_ocup': self._inteiro(row.get('Postos_Ocup'), 'Postos_Ocup'),
+            'postos_obs': self._texto(row.get('Postos_Obs')),
+            'mat_obs': self._texto(row.get('Mat_Obs')),
+            'uso_maq': self._escolha(row.get('Uso_Maq'), Afericao.USO_MAQ_CHOICES, 'Uso_Maq'),
+            'maq_obs': self._texto(row.get('Maq_Obs')),
+            'uso_epi': self._escolha(row.get('Uso_EPI'), Afericao.USO_EPI_CHOICES, 'Uso_EPI'),
+            'epi_obs': self._texto(row.get('EPI_Obs')),
+        }
+        for nota, coluna in NOTAS.items():
+            valor = self._inteiro(row.get(coluna), coluna)
+            if not 1 <= valor <= 5:
+                raise LinhaInvalida(f'{coluna} fora de 1 a 5: {valor}')
+            dados[nota] = valor
+        return dados
+
+    # --- Gravação ---
+
+    def _gravar_copy(self, lote):
+        """
+        PostgreSQL: COPY para uma tabela temporária e INSERT ... ON CONFLICT
+        DO NOTHING na tabela real, para que reimportar um lote (ex: após
+        uma interrupção) não duplique nem falhe.
+        """
+        tabela = Afericao._meta.db_table
+        colunas = ', '.join(CAMPOS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE IF NOT EXISTS _importacao_afericao '
+                f'(LIKE {tabela} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS'
+            )
+            sql_copy = f'COPY _importacao_afericao ({colunas}) FROM STDIN'
+            bruto = cursor.cursor
+            if hasattr(bruto, 'copy'):  # psycopg 3
+                with bruto.copy(sql_copy) as copy:
+                    for dados in lote:
+                        copy.write_row([dados[campo] for campo in CAMPOS])
+            else:  # psycopg2
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for dados in lote:
+                    writer.writerow([
+                        '' if dados[campo] is None else
+                        dados[campo].isoformat() if isinstance(dados[campo], datetime) else
+                        dados[campo]
+                        for campo in CAMPOS
+                    ])
+                buffer.seek(0)
+                bruto.copy_expert(f"{sql_copy} WITH (FORMAT csv)", buffer)
+            cursor.execute(
+                f'INSERT INTO {tabela} ({colunas}) SELECT {colunas} FROM _importacao_afericao '
+                f'ON CONFLICT (cod_afericao) DO NOTHING'
+            )
+            return cursor.rowcount
+
+    def _gravar_bulk_create(self, lote):
+        """Demais bancos: bulk_create em lotes, ignorando códigos já gravados."""
+        novos = {dados['cod_afericao'] for dados in lote}
+        novos -= set(Afericao.objects.filter(pk__in=novos).values_list('pk', flat=True))
+        Afericao.objects.bulk_create(
+            [Afericao(**dados) for dados in lote],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        return len(novos)
+
+    # --- Execução ---
+
+    def handle(self, *args, **options):
+        arquivo = options['arquivo'] or os.path.join(settings.BASE_DIR, 'data', 'bd_afericoes.csv')
+        if not os.path.exists(arquivo):
+            raise CommandError(f'Arquivo não encontrado: {arquivo}')
+        chunk_size = options['chunk_size']
+        caminho_checkpoint = f'{arquivo}.checkpoint'
+        caminho_rejeitados = options['rejeitados'] or f'{arquivo}.rejeitados.csv'
+
+        ja_processadas = 0
+        if options['retomar'] and os.path.exists(caminho_checkpoint):
+            with open(caminho_checkpoint) as f:
+                ja_processadas = int(f.read().strip() or 0)
+            self.stdout.write(self.style.WARNING(f'Retomando após a linha {ja_processadas}.'))
+
+        gravar = self._gravar_copy if connection.vendor == 'postgresql' else self._gravar_bulk_create
+
+        # Tabelas de apoio pequenas, carregadas uma vez
+        crs = set(CentroResponsabilidade.objects.values_list('cod_cr', flat=True))
+        perfis = dict(PerfilUsuario.objects.values_list('cpf', 'pk'))
+
+        processadas = ja_processadas
+        inseridas = rejeitadas = 0
+        modo_rejeitados = 'a' if ja_processadas else 'w'
+        with open(arquivo, mode='r', encoding='utf-8-sig', newline='') as f, \
+                open(caminho_rejeitados, mode=modo_rejeitados, encoding='utf-8', newline='') as f_rej:
+            reader = csv.DictReader(f)
+            rejeitados = csv.DictWriter(
+                f_rej, fieldnames=list(reader.fieldnames or []) + ['Erro'], extrasaction='ignore'
+            )
+            if not ja_processadas:
+                rejeitados.writeheader()
+
+            linhas = islice(reader, ja_processadas, None)
+            while chunk := list(islice(linhas, chunk_size)):
+                agora = timezone.now()
+                lote = []
+                for row in chunk:
+                    try:
+                        dados = self._converter(row, crs, perfis)
+                    except LinhaInvalida as erro:
+                        rejeitados.writerow({**row, 'Erro': str(erro)})
+                        rejeitadas += 1
+                        continue
+                    dados['atualizado_em'] = agora
+                    lote.append(dados)
+
+                with transaction.atomic():
+                    inseridas += gravar(lote) if lote else 0
+                processadas += len(chunk)
+
+                # Checkpoint só depois do commit do lote
+                f_rej.flush()
+                with open(caminho_checkpoint, 'w') as f_ck:
+                    f_ck.write(str(processadas))
+                self.stdout.write(
+                    f'  {processadas} linhas lidas, {inseridas} inseridas, {rejeitadas} rejeitadas'
+                )
+
+        os.remove(caminho_checkpoint)
+        invalidar_afericoes()
+
+        if not options['sem_consolidado']:
+            # O COPY/bulk_create não passa pelo save(): refaz o consolidado mensal
+            call_command('recalcular_desempenho_mensal', stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Importação finalizada: {inseridas} aferições inseridas, {rejeitadas} linhas rejeitadas '
+            f'(ver {caminho_rejeitados}).'
+        ))
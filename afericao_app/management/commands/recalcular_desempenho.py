@@ -0,0 +1,63 @@
+from functools import reduce
+from operator import or_
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from afericao_app.cache import invalidar_afericoes
+from afericao_app.models import Afericao
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula no banco os campos 'desempenho_*' das aferições já gravadas, "
+        'em UPDATEs por lote (sem carregar as linhas no Python).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Aferições atualizadas por UPDATE (padrão: 5000)'
+        )
+        parser.add_argument(
+            '--todas', action='store_true',
+            help='Reescreve todas as aferições, não só as vazias ou divergentes da fórmula'
+        )
+        parser.add_argument(
+            '--sem-consolidado', action='store_true',
+            help='Não recalcula o Desempenho Mensal ao final'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        expressoes = Afericao.expressoes_desempenho()
+
+        pendentes = Afericao.objects.all()
+        if not options['todas']:
+            pendentes = pendentes.filter(reduce(or_, (
+                Q(**{f'{campo}__isnull': True}) | ~Q(**{campo: expressao})
+                for campo, expressao in expressoes.items()
+            )))
+
+        # Percorre pela chave primária: cada UPDATE é curto e trava poucas linhas
+        total = 0
+        ultimo = None
+        while True:
+            lote = pendentes.order_by('pk')
+            if ultimo is not None:
+                lote = lote.filter(pk__gt=ultimo)
+            chaves = list(lote.values_list('pk', flat=True)[:chunk_size])
+            if not chaves:
+                break
+            # 'atualizado_em' avisa o /api/sync/ (o update() não aplica o auto_now)
+            total += Afericao.objects.filter(pk__in=chaves).update(
+                atualizado_em=timezone.now(), **expressoes
+            )
+            ultimo = chaves[-1]
+            self.stdout.write(f'  {total} aferições atualizadas (até {ultimo})')
+
+        if total:
+            invalidar_afericoes()
+            if not options['sem_consolidado']:
+                call_command('recalcular_desempenho_mensal', stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(f'Desempenho recalculado: {total} aferições.'))
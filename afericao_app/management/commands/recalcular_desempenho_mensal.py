@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from afericao_app.models import Afericao, DesempenhoMensal
+
+class Command(BaseCommand):
+    help = 'Refaz do zero a tabela de Desempenho Mensal a partir de todas as aferições'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Quantidade de linhas consolidadas inseridas por lote (padrão: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.stdout.write(self.style.SUCCESS('Recalculando o Desempenho Mensal...'))
+
+        # Uma única consulta agrupada (CR, secretaria, mês) faz todo o trabalho
+        # no banco; o Python só recebe uma linha por grupo.
+        grupos = (
+            Afericao.objects
+            .annotate(mes=TruncMonth(
+                'data_afericao',
+                output_field=DateField(),
+                tzinfo=timezone.get_default_timezone(),
+            ))
+            .values(
+                'centro_responsabilidade_id',
+                'centro_responsabilidade__secretaria_responsavel',
+                'mes',
+            )
+            .annotate(
+                qtd_afericoes=Count('pk'),
+                soma_desempenho_serv=Sum('desempenho_serv', default=0),
+                soma_desempenho_mat_qt=Sum('desempenho_mat_qt', default=0),
+                soma_desempenho_mat_ql=Sum('desempenho_mat_ql', default=0),
+                soma_desempenho_mat_rep=Sum('desempenho_mat_rep', default=0),
+            )
+            .order_by()
+        )
+
+        total = 0
+        with transaction.atomic():
+            DesempenhoMensal.objects.all().delete()
+
+            lote = []
+            for grupo in grupos.iterator(chunk_size=batch_size):
+                lote.append(DesempenhoMensal(
+                    centro_responsabilidade_id=grupo['centro_responsabilidade_id'],
+                    secretaria_responsavel=grupo['centro_responsabilidade__secretaria_responsavel'],
+                    mes=grupo['mes'],
+                    qtd_afericoes=grupo['qtd_afericoes'],
+                    soma_desempenho_serv=grupo['soma_desempenho_serv'],
+                    soma_desempenho_mat_qt=grupo['soma_desempenho_mat_qt'],
+                    soma_desempenho_mat_ql=grupo['soma_desempenho_mat_ql'],
+                    soma_desempenho_mat_rep=grupo['soma_desempenho_mat_rep'],
+                ))
+                if len(lote) >= batch_size:
+                    DesempenhoMensal.objects.bulk_create(lote)
+                    total += len(lote)
+                    lote = []
+
+            if lote:
+                DesempenhoMensal.objects.bulk_create(lote)
+                total += len(lote)
+
+        self.stdout.write(self.style.SUCCESS(f'Desempenho Mensal recalculado: {total} linhas.'))
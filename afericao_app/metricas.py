@@ -0,0 +1,229 @@
+# /opt/galp-backend/afericao_app/metricas.py
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .banco import estatisticas_conexoes
+
+# --- Métricas por rota (formato texto do Prometheus) ---
+# Latência, consultas SQL (quantidade e tempo) e tamanho da resposta de cada
+# requisição, por rota: o nome da URL, que nos ViewSets do DRF é
+# '<basename>-<ação>' (ex: 'afericoes-list', 'afericoes-check-exists').
+#
+# Os valores ficam na memória de cada processo. Com vários workers, cada um
+# responde pelas suas requisições no /metrics; o Prometheus soma as séries.
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LIMITES_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+LIMITES_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_lock = threading.Lock()
+
+
+def _rotulos(nomes, valores):
+    pares = ','.join(
+        '{}="{}"'.format(nome, str(valor).replace('\\', r'\\').replace('"', r'\"'))
+        for nome, valor in zip(nomes, valores)
+    )
+    return '{' + pares + '}' if pares else ''
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+
+    def __init__(self, nome, ajuda, rotulos):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, rotulos
+        self.series = {}
+
+    def incrementar(self, valores, quantidade=1):
+        self.series[valores] = self.series.get(valores, 0) + quantidade
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} counter']
+        for valores, total in sorted(self.series.items()):
+            linhas.append(f'{self.nome}{_rotulos(self.rotulos, valores)} {_numero(total)}')
+        return linhas
+
+
+class Histograma:
+    """
+    Histograma com limites fixos. Cada série guarda a contagem por faixa
+    (não acumulada, para que observar custe um 'bisect' e uma soma) e só a
+    exportação acumula, como o Prometheus espera.
+    """
+
+    def __init__(self, nome, ajuda, rotulos, limites):
+        self.nome, self.ajuda, self.rotulos, self.limites = nome, ajuda, rotulos, limites
+        self.series = {}
+
+    def observar(self, valores, valor):
+        serie = self.series.get(valores)
+        if serie is None:
+            serie = self.series[valores] = [[0] * (len(self.limites) + 1), 0]
+        serie[0][bisect_left(self.limites, valor)] += 1
+        serie[1] += valor
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} histogram']
+        for valores, (faixas, soma) in sorted(self.series.items()):
+            acumulado = 0
+            for limite, quantidade in zip(self.limites + ('+Inf',), faixas):
+                acumulado += quantidade
+                rotulos = _rotulos(self.rotulos + ('le',), valores + (limite,))
+                linhas.append(f'{self.nome}_bucket{rotulos} {acumulado}')
+            rotulos = _rotulos(self.rotulos, valores)
+            linhas.append(f'{self.nome}_sum{rotulos} {_numero(soma)}')
+            linhas.append(f'{self.nome}_count{rotulos} {acumulado}')
+        return linhas
+
+
+REQUISICOES = Contador(
+    'galp_http_requisicoes_total', 'Requisições atendidas.', ('rota', 'metodo', 'status')
+)
+DURACAO = Histograma(
+    'galp_http_duracao_segundos', 'Tempo de resposta da requisição.', ('rota', 'metodo'), LIMITES_SEGUNDOS
+)
+RESPOSTA = Histograma(
+    'galp_http_resposta_bytes', 'Tamanho do corpo da resposta.', ('rota', 'metodo'), LIMITES_BYTES
+)
+SQL_CONSULTAS = Histograma(
+    'galp_sql_consultas', 'Consultas SQL por requisição.', ('rota', 'metodo'), LIMITES_CONSULTAS
+)
+SQL_DURACAO = Histograma(
+    'galp_sql_duracao_segundos', 'Tempo total em SQL por requisição.', ('rota', 'metodo'), LIMITES_SEGUNDOS
+)
+METRICAS = (REQUISICOES, DURACAO, RESPOSTA, SQL_CONSULTAS, SQL_DURACAO)
+
+
+def limpar():
+    """Zera todas as séries (usado nos testes)."""
+    with _lock:
+        for metrica in METRICAS:
+            metrica.series.clear()
+
+
+def exportar():
+    """Todas as métricas no formato texto do Prometheus (versão 0.0.4)."""
+    with _lock:
+        linhas = [linha for metrica in METRICAS for linha in metrica.exportar()]
+
+    # Pool de conexões (DB_POOL=True): o mesmo que 'estatisticas_conexoes' informa
+    pools = [
+        f"galp_db_pool{_rotulos(('alias', 'metrica'), (alias, chave))} {_numero(valor)}"
+        for alias, dados in estatisticas_conexoes().items()
+        for chave, valor in sorted((dados['pool'] or {}).items())
+    ]
+    if pools:
+        linhas += [
+            '# HELP galp_db_pool Estatísticas do pool de conexões (psycopg_pool).',
+            '# TYPE galp_db_pool gauge',
+        ] + pools
+    return '\n'.join(linhas) + '\n'
+
+
+# --- Coleta ---
+# As consultas são medidas por um execute_wrapper instalado em toda conexão
+# ao ser aberta (ver 'instalar' e signals.py), e não na conexão da thread
+# que atende a requisição: no ASGI o ORM roda em threads do sync_to_async,
+# cada uma com as suas conexões. A medição da requisição chega a essas
+# threads por uma ContextVar, que o asgiref copia para elas.
+
+_medicao_atual = ContextVar('galp_medicao', default=None)
+
+
+def medir_consulta(execute, sql, params, many, context):
+    """execute_wrapper das conexões: conta a consulta na medição em curso, se houver."""
+    medicao = _medicao_atual.get()
+    if medicao is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicao.contar(time.perf_counter() - inicio)
+
+
+def instalar(connection):
+    """Instala 'medir_consulta' em uma conexão (uma vez só)."""
+    if medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(medir_consulta)
+
+
+class _Medicao:
+    """Cronometra uma requisição e as consultas SQL feitas durante ela."""
+
+    def __init__(self):
+        self.consultas = 0
+        self.tempo_sql = 0.0
+        self.inicio = time.perf_counter()
+        # Consultas de threads diferentes podem terminar ao mesmo tempo
+        self._lock = threading.Lock()
+
+    def contar(self, duracao):
+        with self._lock:
+            self.consultas += 1
+            self.tempo_sql += duracao
+
+    @contextmanager
+    def sql(self):
+        """Dentro do bloco, as consultas deste contexto contam nesta medição."""
+        token = _medicao_atual.set(self)
+        try:
+            yield self
+        finally:
+            _medicao_atual.reset(token)
+
+    def registrar(self, request, response):
+        duracao = time.perf_counter() - self.inicio
+        match = request.resolver_match
+        rota = (match.url_name or match.route) if match else 'nao_resolvida'
+        valores = (rota, request.method)
+        # Em streaming o tamanho só é conhecido se o servidor informar
+        tamanho = None if response.streaming else len(response.content)
+
+        with _lock:
+            REQUISICOES.incrementar(valores + (response.status_code,))
+            DURACAO.observar(valores, duracao)
+            SQL_CONSULTAS.observar(valores, self.consultas)
+            SQL_DURACAO.observar(valores, self.tempo_sql)
+            if tamanho is not None:
+                RESPOSTA.observar(valores, tamanho)
+
+
+class MetricasMiddleware:
+    """
+    Registra as métricas de cada requisição. Deve ser o primeiro da lista
+    MIDDLEWARE, para que a latência inclua os demais middlewares.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        medicao = _Medicao()
+        with medicao.sql():
+            response = self.get_response(request)
+        medicao.registrar(request, response)
+        return response
+
+    async def __acall__(self, request):
+        medicao = _Medicao()
+        with medicao.sql():
+            response = await self.get_response(request)
+        medicao.registrar(request, response)
+        return response
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('afericao_app', '0004_alter_afericao_data_afericao'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='afericao',
+            index=models.Index(fields=['-data_afericao', 'cod_afericao'], name='afericao_data_cod_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='afericao',
+            index=models.Index(fields=['fiscal', '-data_afericao'], name='afericao_fiscal_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='afericao',
+            index=models.Index(fields=['centro_responsabilidade', 'data_afericao'], name='afericao_cr_data_idx'),
+        ),
+    ]
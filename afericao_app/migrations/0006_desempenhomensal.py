@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('afericao_app', '0005_afericao_indices_compostos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DesempenhoMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('secretaria_responsavel', models.CharField(max_length=100)),
+                ('mes', models.DateField(help_text='Primeiro dia do mês (fuso America/Sao_Paulo)')),
+                ('qtd_afericoes', models.IntegerField(default=0)),
+                ('soma_desempenho_serv', models.FloatField(default=0)),
+                ('soma_desempenho_mat_qt', models.FloatField(default=0)),
+                ('soma_desempenho_mat_ql', models.FloatField(default=0)),
+                ('soma_desempenho_mat_rep', models.FloatField(default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('centro_responsabilidade', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='desempenhos_mensais', to='afericao_app.centroresponsabilidade')),
+            ],
+            options={
+                'verbose_name': 'Desempenho Mensal',
+                'verbose_name_plural': 'Desempenhos Mensais',
+                'ordering': ['-mes', 'centro_responsabilidade'],
+                'indexes': [models.Index(fields=['secretaria_responsavel', 'mes'], name='desempenho_secretaria_mes_idx'), models.Index(fields=['mes'], name='desempenho_mes_idx')],
+                'constraints': [models.UniqueConstraint(fields=('centro_responsabilidade', 'secretaria_responsavel', 'mes'), name='desempenho_mensal_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('afericao_app', '0006_desempenhomensal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='afericao',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='centroresponsabilidade',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='RegistroExclusao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(help_text="Ex: 'afericao', 'centroresponsabilidade'", max_length=50)),
+                ('chave', models.CharField(help_text='Chave primária do registro excluído', max_length=50)),
+                ('excluido_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Registro de Exclusão',
+                'verbose_name_plural': 'Registros de Exclusão',
+                'indexes': [models.Index(fields=['modelo', 'excluido_em'], name='exclusao_modelo_data_idx')],
+            },
+        ),
+    ]
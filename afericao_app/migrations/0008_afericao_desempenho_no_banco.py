@@ -0,0 +1,91 @@
+from django.db import migrations
+
+# Os campos 'desempenho_*' passam a ser calculados pelo banco em qualquer
+# gravação (save, bulk_create, QuerySet.update, COPY, SQL manual).
+# Fórmula: nota * 100.0 / 5 (a mesma de Afericao.calcular_desempenho).
+#
+# A migração não reescreve as linhas existentes (seria um único UPDATE na
+# tabela inteira); depois dela, rode 'manage.py recalcular_desempenho'.
+#
+# Atenção (SQLite): migrações que recriam a tabela de aferições descartam
+# os gatilhos; nesse caso, reaplique este SQL na migração seguinte.
+
+POSTGRESQL = [
+    """
+    CREATE OR REPLACE FUNCTION afericao_calcular_desempenho() RETURNS trigger AS $$
+    BEGIN
+        NEW.desempenho_serv := NEW.serv_nota * 100.0 / 5;
+        NEW.desempenho_mat_qt := NEW.mat_qt_nota * 100.0 / 5;
+        NEW.desempenho_mat_ql := NEW.mat_ql_nota * 100.0 / 5;
+        NEW.desempenho_mat_rep := NEW.mat_rep_nota * 100.0 / 5;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER afericao_desempenho
+    BEFORE INSERT OR UPDATE ON afericao_app_afericao
+    FOR EACH ROW EXECUTE FUNCTION afericao_calcular_desempenho();
+    """,
+]
+POSTGRESQL_REVERSO = [
+    'DROP TRIGGER IF EXISTS afericao_desempenho ON afericao_app_afericao;',
+    'DROP FUNCTION IF EXISTS afericao_calcular_desempenho();',
+]
+
+# O SQLite não altera NEW em gatilhos BEFORE: corrige a linha logo após a
+# gravação (sem recursive_triggers, o UPDATE interno não dispara de novo).
+_SQLITE_CORRECAO = """
+    UPDATE afericao_app_afericao SET
+        desempenho_serv = NEW.serv_nota * 100.0 / 5,
+        desempenho_mat_qt = NEW.mat_qt_nota * 100.0 / 5,
+        desempenho_mat_ql = NEW.mat_ql_nota * 100.0 / 5,
+        desempenho_mat_rep = NEW.mat_rep_nota * 100.0 / 5
+    WHERE cod_afericao = NEW.cod_afericao;
+"""
+SQLITE = [
+    f"""
+    CREATE TRIGGER afericao_desempenho_insert
+    AFTER INSERT ON afericao_app_afericao
+    BEGIN {_SQLITE_CORRECAO} END;
+    """,
+    f"""
+    CREATE TRIGGER afericao_desempenho_update
+    AFTER UPDATE OF serv_nota, mat_qt_nota, mat_ql_nota, mat_rep_nota,
+        desempenho_serv, desempenho_mat_qt, desempenho_mat_ql, desempenho_mat_rep
+    ON afericao_app_afericao
+    BEGIN {_SQLITE_CORRECAO} END;
+    """,
+]
+SQLITE_REVERSO = [
+    'DROP TRIGGER IF EXISTS afericao_desempenho_insert;',
+    'DROP TRIGGER IF EXISTS afericao_desempenho_update;',
+]
+
+SQL = {'postgresql': (POSTGRESQL, POSTGRESQL_REVERSO), 'sqlite': (SQLITE, SQLITE_REVERSO)}
+
+
+def _executar(schema_editor, indice):
+    # Outros bancos ficam sem gatilho: o save() e o comando cobrem o cálculo
+    comandos = SQL.get(schema_editor.connection.vendor)
+    for sql in (comandos[indice] if comandos else []):
+        schema_editor.execute(sql)
+
+
+def criar_gatilhos(apps, schema_editor):
+    _executar(schema_editor, 0)
+
+
+def remover_gatilhos(apps, schema_editor):
+    _executar(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('afericao_app', '0007_sincronizacao'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_gatilhos, remover_gatilhos),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('afericao_app', '0008_afericao_desempenho_no_banco'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertaGestor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('motivo', models.CharField(choices=[('nota_servico', 'Nota de serviço baixa'), ('falta_postos', 'Postos ocupados abaixo do previsto')], max_length=20)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('enviado', 'Enviado'), ('descartado', 'Descartado'), ('falhou', 'Falhou')], default='pendente', max_length=20)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('ultimo_erro', models.TextField(blank=True, null=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('enviado_em', models.DateTimeField(blank=True, null=True)),
+                ('afericao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alertas', to='afericao_app.afericao')),
+                ('gestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alertas_recebidos', to='afericao_app.perfilusuario')),
+            ],
+            options={
+                'verbose_name': 'Alerta ao Gestor',
+                'verbose_name_plural': 'Alertas aos Gestores',
+                'indexes': [models.Index(condition=models.Q(('status', 'pendente')), fields=['criado_em'], name='alerta_pendente_idx')],
+                'constraints': [models.UniqueConstraint(fields=('afericao', 'motivo'), name='alerta_afericao_motivo_unico')],
+            },
+        ),
+    ]
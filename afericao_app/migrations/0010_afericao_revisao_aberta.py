@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('afericao_app', '0009_alertagestor'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='afericao',
+            name='status_revisao',
+            field=models.BooleanField(default=False, help_text='Marcado quando o prazo de revisão (D+1) termina'),
+        ),
+        migrations.AddIndex(
+            model_name='afericao',
+            index=models.Index(condition=models.Q(('status_revisao', False)), fields=['data_afericao'], name='afericao_revisao_aberta_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Busca textual nas observações (afericao_app/busca.py), só no PostgreSQL:
+# um gatilho mantém a coluna 'busca' (tsvector em português) a cada
+# INSERT e a cada UPDATE das observações; as linhas existentes são
+# preenchidas aqui e um índice GIN atende o '@@' da busca.
+#
+# Nos demais bancos a coluna fica vazia e a busca usa icontains.
+
+_VETOR = "to_tsvector('portuguese', concat_ws(' ', {0}postos_obs, {0}mat_obs, {0}maq_obs, {0}epi_obs))"
+
+POSTGRESQL = [
+    f"""
+    CREATE OR REPLACE FUNCTION afericao_atualizar_busca() RETURNS trigger AS $$
+    BEGIN
+        NEW.busca := {_VETOR.format('NEW.')};
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER afericao_busca
+    BEFORE INSERT OR UPDATE OF postos_obs, mat_obs, maq_obs, epi_obs, busca
+    ON afericao_app_afericao
+    FOR EACH ROW EXECUTE FUNCTION afericao_atualizar_busca();
+    """,
+    # Aferições sem nenhuma observação ficam com NULL: não casam com nada
+    f"""
+    UPDATE afericao_app_afericao SET busca = {_VETOR.format('')}
+    WHERE concat_ws('', postos_obs, mat_obs, maq_obs, epi_obs) <> '';
+    """,
+    'CREATE INDEX afericao_busca_idx ON afericao_app_afericao USING gin (busca);',
+]
+POSTGRESQL_REVERSO = [
+    'DROP INDEX IF EXISTS afericao_busca_idx;',
+    'DROP TRIGGER IF EXISTS afericao_busca ON afericao_app_afericao;',
+    'DROP FUNCTION IF EXISTS afericao_atualizar_busca();',
+]
+
+
+def criar_busca(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in POSTGRESQL:
+            schema_editor.execute(sql)
+
+
+def remover_busca(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in POSTGRESQL_REVERSO:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('afericao_app', '0010_afericao_revisao_aberta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='afericao',
+            name='busca',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(criar_busca, remover_busca),
+    ]
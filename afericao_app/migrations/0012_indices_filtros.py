@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('afericao_app', '0011_afericao_busca'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='afericao',
+            index=models.Index(fields=['serv_nota', '-data_afericao'], name='afericao_serv_nota_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='afericao',
+            index=models.Index(fields=['uso_epi', '-data_afericao'], name='afericao_uso_epi_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='afericao',
+            index=models.Index(fields=['uso_maq', '-data_afericao'], name='afericao_uso_maq_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='centroresponsabilidade',
+            index=models.Index(fields=['secretaria_responsavel'], name='cr_secretaria_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('afericao_app', '0012_indices_filtros'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registroexclusao',
+            name='fiscal',
+            field=models.ForeignKey(blank=True, help_text='Fiscal da aferição excluída', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='afericao_app.perfilusuario'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('afericao_app', '0013_registroexclusao_fiscal'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='afericao',
+            index=models.Index(condition=models.Q(('status_revisao', True)), fields=['-data_afericao'], name='afericao_revisao_fechada_idx'),
+        ),
+    ]
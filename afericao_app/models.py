@@ -1,7 +1,12 @@
-from django.db import models
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .utils import intervalo_mes, mes_local
+
 # --- Modelo de Usuários ---
 # Expande o User padrão do Django com base no BD_Usuários.csv [cite: 5]
 
@@ -70,9 +75,18 @@ class CentroResponsabilidade(models.Model):
         help_text="Gestor a ser notificado por e-mail" # Novo requisito SMGCP
     )
 
+    # Controle técnico para a sincronização incremental dos apps (/api/sync/)
+    atualizado_em = models.DateTimeField(auto_now=True, db_index=True)
+
     def __str__(self):
         return f"{self.cod_cr} - {self.nome_cr}"
 
+    class Meta:
+        indexes = [
+            # Filtro por secretaria da listagem de aferições (JOIN com o CR)
+            models.Index(fields=['secretaria_responsavel'], name='cr_secretaria_idx'),
+        ]
+
 # --- Modelo Principal de Dados ---
 # Mapeamento do BD_Afericoes.csv [cite: 1] e do Formulário [cite: 6-8]
 
@@ -99,7 +113,9 @@ class Afericao(models.Model):
     fiscal = models.ForeignKey(PerfilUsuario, on_delete=models.PROTECT, help_text="Fiscal que realizou a aferição")
     centro_responsabilidade = models.ForeignKey(CentroResponsabilidade, on_delete=models.PROTECT)
     
-    status_revisao = models.BooleanField(default=False, help_text="Controla se a aferição ainda pode ser revisada")
+    # False enquanto a aferição pode ser revisada; o comando 'fechar_revisoes'
+    # marca True quando o prazo D+1 termina, e a API recusa novas edições.
+    status_revisao = models.BooleanField(default=False, help_text="Marcado quando o prazo de revisão (D+1) termina")
 
     # 1. Equipe (Baseado na Seção 2 do formulário [cite: 7])
     postos_prev = models.IntegerField(help_text="Postos previstos (puxado do CR)")
@@ -125,38 +141,309 @@ class Afericao(models.Model):
 
     # Campos de Desempenho (Calculados automaticamente)
     # Fórmulas baseadas no Modelo de Negócio [cite: 8]
+    # Quem grava é o banco: um gatilho (migração 0008) recalcula os campos em
+    # todo INSERT/UPDATE, inclusive bulk_create, QuerySet.update() e COPY.
+    # Linhas antigas são acertadas com o comando 'recalcular_desempenho'.
     desempenho_serv = models.FloatField(null=True, blank=True, editable=False)
     desempenho_mat_qt = models.FloatField(null=True, blank=True, editable=False)
     desempenho_mat_ql = models.FloatField(null=True, blank=True, editable=False)
     desempenho_mat_rep = models.FloatField(null=True, blank=True, editable=False)
 
+    # Campo de desempenho -> nota de origem
+    NOTAS_DESEMPENHO = {
+        'desempenho_serv': 'serv_nota',
+        'desempenho_mat_qt': 'mat_qt_nota',
+        'desempenho_mat_ql': 'mat_ql_nota',
+        'desempenho_mat_rep': 'mat_rep_nota',
+    }
+
+    # Controle técnico para a sincronização incremental dos apps (/api/sync/).
+    # Diferente de 'data_ultima_revisao', é preenchido também na criação.
+    atualizado_em = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Texto das observações preparado para a busca (?q=, ver busca.py).
+    # Só no PostgreSQL: um gatilho (migração 0011) preenche a coluna, que
+    # tem índice GIN. Nos demais bancos fica vazia.
+    busca = SearchVectorField(null=True, editable=False)
+
     def __str__(self):
         return f"Aferição {self.cod_afericao} em {self.data_afericao.strftime('%d/%m/%Y')}"
 
+    @classmethod
+    def expressoes_desempenho(cls):
+        """
+        As fórmulas de desempenho como expressões do banco (nota * 100 / 5),
+        para recalcular várias linhas em um único UPDATE.
+        """
+        return {campo: F(nota) * 100.0 / 5 for campo, nota in cls.NOTAS_DESEMPENHO.items()}
+
+    def calcular_desempenho(self):
+        """
+        Calcula os campos de desempenho a partir das notas. [cite: 8]
+        Mesma fórmula (e mesmo arredondamento) do gatilho do banco, para que
+        a instância em memória já tenha os valores que serão gravados.
+        """
+        for campo, nota in self.NOTAS_DESEMPENHO.items():
+            valor = getattr(self, nota)
+            if valor:
+                setattr(self, campo, valor * 100 / 5)
+
+    def motivos_alerta(self):
+        """Motivos (ver AlertaGestor.MOTIVO_CHOICES) para avisar o gestor do contrato."""
+        motivos = []
+        if self.serv_nota <= settings.ALERTA_SERV_NOTA_MAXIMA:
+            motivos.append('nota_servico')
+        if self.postos_ocup < self.postos_prev:
+            motivos.append('falta_postos')
+        return motivos
+
     def save(self, *args, **kwargs):
         """
         Sobrescreve o método save para calcular os campos de desempenho
         automaticamente antes de salvar. [cite: 8]
         """
-        if self.serv_nota:
-            self.desempenho_serv = (self.serv_nota / 5) * 100
-        
-        if self.mat_qt_nota:
-            self.desempenho_mat_qt = (self.mat_qt_nota / 5) * 100
-        
-        if self.mat_ql_nota:
-            self.desempenho_mat_ql = (self.mat_ql_nota / 5) * 100
-            
-        if self.mat_rep_nota:
-            self.desempenho_mat_rep = (self.mat_rep_nota / 5) * 100
+        self.calcular_desempenho()
 
         # Atualiza a data da revisão se o objeto estiver sendo modificado (não criado)
-        if not self._state.adding:
+        revisao = not self._state.adding
+        if revisao:
             self.data_ultima_revisao = timezone.now()
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            meses = {(self.centro_responsabilidade_id, mes_local(self.data_afericao))}
+            if revisao:
+                # Se o CR ou o mês mudou, o consolidado antigo também perde a aferição
+                anterior = (
+                    Afericao.objects.filter(pk=self.pk)
+                    .values_list('centro_responsabilidade_id', 'data_afericao')
+                    .first()
+                )
+                if anterior is not None:
+                    meses.add((anterior[0], mes_local(anterior[1])))
+            super().save(*args, **kwargs)
+            # Mantém o consolidado mensal do CR em dia (relatórios de desempenho);
+            # sempre na mesma ordem, para gravações simultâneas não travarem uma à outra
+            for cod_cr, mes in sorted(meses):
+                DesempenhoMensal.recalcular(cod_cr, mes)
+            # Alertas por e-mail entram na fila junto com a aferição
+            AlertaGestor.enfileirar([self], revisao=revisao)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            DesempenhoMensal.recalcular(self.centro_responsabilidade_id, mes_local(self.data_afericao))
+        return resultado
 
     class Meta:
         verbose_name = "Aferição"
         verbose_name_plural = "Aferições"
-        ordering = ['-data_afericao']
\ No newline at end of file
+        ordering = ['-data_afericao']
+        indexes = [
+            # Listagem geral paginada por cursor (coordenadores/gestores)
+            models.Index(fields=['-data_afericao', 'cod_afericao'], name='afericao_data_cod_idx'),
+            # Listagem do fiscal: WHERE fiscal = ? ORDER BY data_afericao DESC
+            models.Index(fields=['fiscal', '-data_afericao'], name='afericao_fiscal_data_idx'),
+            # check_exists e filtros por CR + período
+            models.Index(fields=['centro_responsabilidade', 'data_afericao'], name='afericao_cr_data_idx'),
+            # Filtros da listagem por nota e por uso de EPI/máquinas, já na
+            # ordem da paginação (data decrescente)
+            models.Index(fields=['serv_nota', '-data_afericao'], name='afericao_serv_nota_data_idx'),
+            models.Index(fields=['uso_epi', '-data_afericao'], name='afericao_uso_epi_data_idx'),
+            models.Index(fields=['uso_maq', '-data_afericao'], name='afericao_uso_maq_data_idx'),
+            # Só as aferições ainda abertas para revisão (poucos dias de dados):
+            # o fechamento D+1 custa o mesmo com qualquer tamanho de histórico
+            models.Index(
+                fields=['data_afericao'],
+                condition=Q(status_revisao=False),
+                name='afericao_revisao_aberta_idx',
+            ),
+            # E as já fechadas ('?status_revisao=true', quase todo o histórico),
+            # na ordem da listagem
+            models.Index(
+                fields=['-data_afericao'],
+                condition=Q(status_revisao=True),
+                name='afericao_revisao_fechada_idx',
+            ),
+        ]
+
+# --- Consolidado Mensal de Desempenho ---
+# Alimenta o endpoint /api/relatorios/desempenho/ sem varrer as aferições.
+
+class DesempenhoMensal(models.Model):
+    """
+    Soma dos campos 'desempenho_*' das aferições de um CR em um mês.
+
+    Guardamos somas e quantidade (e não médias) para que o relatório possa
+    reagrupar por secretaria ou por período somando linhas, sem distorcer
+    a média. A tabela é mantida pelo 'Afericao.save()' e pode ser refeita
+    do zero com o comando 'recalcular_desempenho_mensal'.
+    """
+    centro_responsabilidade = models.ForeignKey(
+        CentroResponsabilidade,
+        on_delete=models.CASCADE,
+        related_name='desempenhos_mensais'
+    )
+    # Copiado do CR para filtrar/agrupar por secretaria sem JOIN
+    secretaria_responsavel = models.CharField(max_length=100)
+    mes = models.DateField(help_text="Primeiro dia do mês (fuso America/Sao_Paulo)")
+
+    qtd_afericoes = models.IntegerField(default=0)
+    soma_desempenho_serv = models.FloatField(default=0)
+    soma_desempenho_mat_qt = models.FloatField(default=0)
+    soma_desempenho_mat_ql = models.FloatField(default=0)
+    soma_desempenho_mat_rep = models.FloatField(default=0)
+
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.centro_responsabilidade_id} - {self.mes:%m/%Y}"
+
+    @classmethod
+    def recalcular(cls, cod_cr, mes):
+        """
+        Refaz a linha de um único (CR, mês) a partir das aferições dele.
+
+        A agregação percorre só as aferições daquele CR no mês, pelo índice
+        (centro_responsabilidade, data_afericao), então o custo não depende
+        do tamanho do histórico. O CR é travado (SELECT ... FOR UPDATE) para
+        que duas gravações simultâneas no mesmo CR não se sobrescrevam.
+        """
+        inicio, fim = intervalo_mes(mes)
+        with transaction.atomic():
+            secretaria = (
+                CentroResponsabilidade.objects.select_for_update()
+                .values_list('secretaria_responsavel', flat=True)
+                .get(pk=cod_cr)
+            )
+            totais = Afericao.objects.filter(
+                centro_responsabilidade_id=cod_cr,
+                data_afericao__gte=inicio,
+                data_afericao__lt=fim,
+            ).aggregate(
+                qtd_afericoes=Count('pk'),
+                soma_desempenho_serv=Sum('desempenho_serv', default=0),
+                soma_desempenho_mat_qt=Sum('desempenho_mat_qt', default=0),
+                soma_desempenho_mat_ql=Sum('desempenho_mat_ql', default=0),
+                soma_desempenho_mat_rep=Sum('desempenho_mat_rep', default=0),
+            )
+
+            existentes = cls.objects.filter(centro_responsabilidade_id=cod_cr, mes=inicio.date())
+            if not totais['qtd_afericoes']:
+                existentes.delete()
+                return
+            # Se a secretaria do CR mudou, a linha antiga deixa de valer
+            existentes.exclude(secretaria_responsavel=secretaria).delete()
+            cls.objects.update_or_create(
+                centro_responsabilidade_id=cod_cr,
+                secretaria_responsavel=secretaria,
+                mes=inicio.date(),
+                defaults=totais,
+            )
+
+    class Meta:
+        verbose_name = "Desempenho Mensal"
+        verbose_name_plural = "Desempenhos Mensais"
+        ordering = ['-mes', 'centro_responsabilidade']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['centro_responsabilidade', 'secretaria_responsavel', 'mes'],
+                name='desempenho_mensal_unico',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['secretaria_responsavel', 'mes'], name='desempenho_secretaria_mes_idx'),
+            models.Index(fields=['mes'], name='desempenho_mes_idx'),
+        ]
+
+
+# --- Registro de Exclusões (tombstones) ---
+# Permite que o /api/sync/ informe aos apps o que foi apagado.
+
+class RegistroExclusao(models.Model):
+    """
+    Marca a exclusão de um CR ou de uma Aferição, para que os apps
+    removam a cópia local na próxima sincronização.
+    Preenchido pelos sinais de post_delete (ver signals.py).
+    """
+    modelo = models.CharField(max_length=50, help_text="Ex: 'afericao', 'centroresponsabilidade'")
+    chave = models.CharField(max_length=50, help_text="Chave primária do registro excluído")
+    excluido_em = models.DateTimeField(auto_now_add=True)
+    # Só nas aferições: o fiscal recebe apenas as exclusões das suas (ver views.exclusoes_visiveis)
+    fiscal = models.ForeignKey(
+        PerfilUsuario, on_delete=models.CASCADE, null=True, blank=True, related_name='+',
+        help_text="Fiscal da aferição excluída",
+    )
+
+    def __str__(self):
+        return f"{self.modelo} {self.chave} excluído em {self.excluido_em:%d/%m/%Y %H:%M}"
+
+    class Meta:
+        verbose_name = "Registro de Exclusão"
+        verbose_name_plural = "Registros de Exclusão"
+        indexes = [
+            models.Index(fields=['modelo', 'excluido_em'], name='exclusao_modelo_data_idx'),
+        ]
+
+
+# --- Fila de Alertas por E-mail (outbox) ---
+# Gravada na mesma transação da aferição; o comando 'enviar_alertas' envia
+# os e-mails depois, fora das requisições, então o SMTP nunca atrasa o app.
+
+class AlertaGestor(models.Model):
+    """
+    Alerta de uma aferição para o gestor do contrato do CR (Requisito SMGCP).
+    Os pendentes de um mesmo gestor são enviados juntos em um resumo.
+    """
+    MOTIVO_CHOICES = [
+        ('nota_servico', 'Nota de serviço baixa'),
+        ('falta_postos', 'Postos ocupados abaixo do previsto'),
+    ]
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('enviado', 'Enviado'),
+        ('descartado', 'Descartado'),
+        ('falhou', 'Falhou'),
+    ]
+
+    afericao = models.ForeignKey(Afericao, on_delete=models.CASCADE, related_name='alertas')
+    gestor = models.ForeignKey(PerfilUsuario, on_delete=models.CASCADE, related_name='alertas_recebidos')
+    motivo = models.CharField(max_length=20, choices=MOTIVO_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pendente')
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    ultimo_erro = models.TextField(blank=True, null=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    enviado_em = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_motivo_display()} - {self.afericao_id} ({self.status})"
+
+    @classmethod
+    def enfileirar(cls, afericoes, revisao=False):
+        """
+        Cria os alertas das aferições já gravadas, sem enviar nada.
+        Só entram CRs com gestor de contrato; repetir não duplica.
+        Na revisão, os pendentes que deixaram de valer são descartados.
+        """
+        novos = []
+        for afericao in afericoes:
+            motivos = afericao.motivos_alerta()
+            if revisao:
+                cls.objects.filter(afericao=afericao, status='pendente').exclude(
+                    motivo__in=motivos
+                ).update(status='descartado')
+            gestor_id = afericao.centro_responsabilidade.gestor_contrato_id
+            if gestor_id:
+                novos += [cls(afericao=afericao, gestor_id=gestor_id, motivo=motivo) for motivo in motivos]
+        if novos:
+            cls.objects.bulk_create(novos, ignore_conflicts=True)
+
+    class Meta:
+        verbose_name = "Alerta ao Gestor"
+        verbose_name_plural = "Alertas aos Gestores"
+        constraints = [
+            models.UniqueConstraint(fields=['afericao', 'motivo'], name='alerta_afericao_motivo_unico'),
+        ]
+        indexes = [
+            # A fila só lê os pendentes: índice parcial, pequeno mesmo com o histórico
+            models.Index(fields=['criado_em'], condition=Q(status='pendente'), name='alerta_pendente_idx'),
+        ]
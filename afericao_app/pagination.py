@@ -0,0 +1,68 @@
+# /opt/galp-backend/afericao_app/pagination.py
+
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class AfericaoCursorPagination(CursorPagination):
+    """
+    Paginação por cursor (keyset) para a listagem de aferições.
+
+    Em vez de OFFSET, cada página continua a partir da última linha da
+    anterior (WHERE data_afericao < ...), então o custo de uma página não
+    cresce com o tamanho da tabela. O 'cod_afericao' desempata aferições
+    com a mesma data, deixando a ordem estável.
+
+    O cursor é opaco para o frontend: basta seguir os links 'next'/'previous'.
+    """
+    ordering = ('-data_afericao', 'cod_afericao')
+
+    # Tamanho padrão da página, ajustável pelo frontend com '?page_size=N'
+    page_size = settings.AFERICOES_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.AFERICOES_MAX_PAGE_SIZE
+
+    def get_paginated_data(self, data):
+        """Corpo da resposta paginada (o mesmo do 'get_paginated_response')."""
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+
+class AfericaoBuscaPagination(PageNumberPagination):
+    """
+    Paginação dos resultados da busca textual (?q=). Eles vêm ordenados
+    por relevância, que não serve de cursor; como a busca devolve só as
+    aferições que casam com os termos, páginas numeradas bastam.
+    """
+    page_size = settings.AFERICOES_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.AFERICOES_MAX_PAGE_SIZE
+
+
+def pagina_por_chave(queryset, campo, posicao, tamanho):
+    """
+    Paginação por cursor (keyset) em ordem ('campo', pk), usada pelo
+    /api/sync/: 'campo' é uma data de alteração, que não é única, e a pk
+    desempata. 'posicao' é a da página anterior ([data ISO, pk]) ou None
+    para começar do início.
+
+    Devolve (linhas, posição da próxima página), com a posição None
+    quando não há mais linhas.
+    """
+    queryset = queryset.order_by(campo, 'pk')
+    if posicao is not None:
+        valor, pk = datetime.fromisoformat(posicao[0]), posicao[1]
+        queryset = queryset.filter(Q(**{campo + '__gt': valor}) | Q(**{campo: valor, 'pk__gt': pk}))
+
+    # Uma linha a mais indica se existe página seguinte
+    linhas = list(queryset[:tamanho + 1])
+    if len(linhas) <= tamanho:
+        return linhas, None
+    linhas = linhas[:tamanho]
+    return linhas, [getattr(linhas[-1], campo).isoformat(), linhas[-1].pk]
@@ -0,0 +1,132 @@
+# /opt/galp-backend/afericao_app/renderers.py
+
+from decimal import Decimal
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele, o JSON do próprio DRF
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack é opcional: sem ele, a API responde só JSON
+    msgpack = None
+
+# --- Renderização e leitura dos corpos da API ---
+# O orjson (em C) gera o mesmo JSON compacto em UTF-8 do JSONRenderer do
+# DRF, byte a byte, em uma fração do tempo. O que ele não conhece
+# (Decimal, textos traduzíveis, ...) passa pelo codificador do DRF, e
+# respostas com NaN, infinito ou número com expoente vão inteiras para o
+# JSONRenderer do DRF.
+#
+# MessagePack é o mesmo conteúdo em binário, menor e mais rápido de ler
+# no app: basta pedir 'Accept: application/msgpack' nas listagens de
+# aferições e de CRs.
+
+_CODIFICADOR = encoders.JSONEncoder()
+
+
+def _padrao(valor):
+    # Tipos que o orjson/msgpack não serializam: mesma conversão do DRF
+    return _CODIFICADOR.default(valor)
+
+
+def _float_fora_do_orjson(dados):
+    """
+    Diz se há um número que o orjson escreveria diferente do DRF: NaN e
+    infinitos (o orjson escreve 'null'; o DRF, com allow_nan=False, levanta
+    ValueError) e expoentes (o orjson escreve '1e16'; o DRF, '1e+16').
+    Percorre os dados sem recursão e para no primeiro encontrado.
+    """
+    pilha = [dados]
+    while pilha:
+        valores = pilha.pop()
+        tipo = type(valores)
+        if tipo is dict:
+            valores = valores.values()
+        elif tipo is not list and tipo is not tuple:
+            valores = (valores,)
+        for valor in valores:
+            tipo = type(valor)
+            if tipo is float or tipo is Decimal: # Decimal vira float no DRF
+                numero = float(valor)
+                # NaN falha em qualquer comparação; zero não tem expoente
+                if numero and not 1e-4 <= abs(numero) < 1e16:
+                    return True
+            elif tipo is dict or tipo is list or tipo is tuple:
+                pilha.append(valor)
+    return False
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer do DRF com o orjson. Com 'indent' (API navegável), usa o do DRF."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact or (
+            self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if _float_fora_do_orjson(data): # Raro: o DRF formata (ou recusa) o número
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            # Datas passam pelo DRF (milissegundos, 'Z' em UTC), não pelo orjson
+            ret = orjson.dumps(
+                data, default=_padrao, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            )
+        except orjson.JSONEncodeError: # Ex: inteiros acima de 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+        # Como o DRF: U+2028 e U+2029 escapados, para o JSON valer como JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser do DRF com o orjson (corpos em UTF-8)."""
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Respostas em MessagePack ('Accept: application/msgpack')."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_padrao)
+
+
+class MessagePackParser(BaseParser):
+    """Corpos em MessagePack ('Content-Type: application/msgpack')."""
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read())
+        except ValueError as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
+
+
+# Extras das listagens de aferições e de CRs (só com o msgpack instalado)
+RENDERIZADORES_BINARIOS = [MessagePackRenderer] if msgpack is not None else []
+LEITORES_BINARIOS = [MessagePackParser] if msgpack is not None else []
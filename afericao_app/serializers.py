@@ -1,7 +1,9 @@
 # /opt/galp-backend/afericao_app/serializers.py
 
+from django.conf import settings
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.utils import timezone
 from .models import PerfilUsuario, CentroResponsabilidade, Afericao
 
 class UserSerializer(serializers.ModelSerializer):
@@ -99,6 +101,22 @@ class AfericaoCreateSerializer(serializers.ModelSerializer):
             
         return Afericao.objects.create(**validated_data)
 
+class AfericaoLoteItemSerializer(AfericaoCreateSerializer):
+    """
+    Valida cada item do envio em lote (aferições coletadas offline).
+
+    Difere do AfericaoCreateSerializer apenas no que geraria uma consulta
+    por item: o CR chega como código simples (a view busca todos os CRs
+    do lote de uma vez) e o 'cod_afericao' não passa pelo validador de
+    unicidade (reenvios são tratados pela view como já existentes).
+    """
+    fiscal = None
+    centro_responsabilidade = serializers.IntegerField()
+
+    class Meta(AfericaoCreateSerializer.Meta):
+        fields = [campo for campo in AfericaoCreateSerializer.Meta.fields if campo != 'fiscal']
+        extra_kwargs = {'cod_afericao': {'validators': []}}
+
 class AfericaoListSerializer(serializers.ModelSerializer):
     """
     Serializer para LISTAR as aferições já feitas.
@@ -121,6 +139,73 @@ class AfericaoListSerializer(serializers.ModelSerializer):
             'desempenho_serv'
         ]
 
+    def __init__(self, *args, campos=None, **kwargs):
+        # 'campos': só estes campos na resposta (parâmetro '?campos=' da listagem)
+        super().__init__(*args, **kwargs)
+        if campos:
+            for campo in set(self.fields) - set(campos):
+                self.fields.pop(campo)
+
+class AfericaoFiltroSerializer(serializers.Serializer):
+    """
+    Valida os filtros da listagem e da exportação de aferições (query string).
+
+    Cada filtro corresponde a um índice da tabela (ver Afericao.Meta):
+    cr e período -> afericao_cr_data_idx; fiscal -> afericao_fiscal_data_idx;
+    notas, uso de EPI/máquinas -> os índices (campo, data); revisão ->
+    afericao_revisao_aberta_idx (false) ou afericao_revisao_fechada_idx
+    (true); secretaria -> cr_secretaria_idx.
+
+    Os filtros "amplos" casam com boa parte do histórico. Na listagem, para
+    quem não é da equipe (staff), eles exigem um período ('data_inicio') de
+    no máximo AFERICOES_FILTRO_MAX_DIAS dias, para que a consulta não varra
+    a tabela. A exportação (context 'limitar_periodo' False) não tem esse
+    limite: ela é em streaming e serve justamente para períodos longos.
+    """
+    cr = serializers.IntegerField(required=False)
+    secretaria = serializers.CharField(required=False, max_length=100)
+    fiscal = serializers.IntegerField(required=False)
+    data_inicio = serializers.DateField(required=False, input_formats=['%Y-%m-%d'])
+    data_fim = serializers.DateField(required=False, input_formats=['%Y-%m-%d'])
+    serv_nota_min = serializers.IntegerField(required=False, min_value=1, max_value=5)
+    serv_nota_max = serializers.IntegerField(required=False, min_value=1, max_value=5)
+    uso_epi = serializers.ChoiceField(required=False, choices=Afericao.USO_EPI_CHOICES)
+    uso_maq = serializers.ChoiceField(required=False, choices=Afericao.USO_MAQ_CHOICES)
+    status_revisao = serializers.BooleanField(required=False)
+
+    # Filtro -> lookup do ORM (o período é tratado à parte, no fuso local)
+    LOOKUPS = {
+        'cr': 'centro_responsabilidade_id',
+        'secretaria': 'centro_responsabilidade__secretaria_responsavel',
+        'fiscal': 'fiscal_id',
+        'serv_nota_min': 'serv_nota__gte',
+        'serv_nota_max': 'serv_nota__lte',
+        'uso_epi': 'uso_epi',
+        'uso_maq': 'uso_maq',
+        'status_revisao': 'status_revisao',
+    }
+    AMPLOS = {'secretaria', 'serv_nota_min', 'serv_nota_max', 'uso_epi', 'uso_maq', 'status_revisao'}
+
+    def validate(self, attrs):
+        inicio, fim = attrs.get('data_inicio'), attrs.get('data_fim')
+        if inicio and fim and inicio > fim:
+            raise serializers.ValidationError({'data_fim': "Deve ser igual ou posterior a 'data_inicio'."})
+        if attrs.get('serv_nota_min', 1) > attrs.get('serv_nota_max', 5):
+            raise serializers.ValidationError({'serv_nota_max': "Deve ser maior ou igual a 'serv_nota_min'."})
+
+        amplos = sorted(self.AMPLOS & attrs.keys())
+        if amplos and self.context.get('limitar_periodo', True) and not self.context.get('staff'):
+            limite = settings.AFERICOES_FILTRO_MAX_DIAS
+            if inicio is None:
+                raise serializers.ValidationError(
+                    {'data_inicio': f"Obrigatório com os filtros {', '.join(amplos)}."}
+                )
+            if ((fim or timezone.localdate()) - inicio).days >= limite:
+                raise serializers.ValidationError(
+                    {'data_inicio': f"Com os filtros {', '.join(amplos)}, o período é de no máximo {limite} dias."}
+                )
+        return attrs
+
 class AfericaoDetailSerializer(serializers.ModelSerializer):
     """
     Serializer completo para ver (GET), atualizar (PUT) ou
@@ -163,8 +248,43 @@ class AfericaoDetailSerializer(serializers.ModelSerializer):
             'centro_responsabilidade', 
             'data_afericao',
             'data_ultima_revisao',
+            'status_revisao', # Fechado apenas pelo comando 'fechar_revisoes'
             'desempenho_serv',
             'desempenho_mat_qt',
             'desempenho_mat_ql',
             'desempenho_mat_rep',
-        ]
\ No newline at end of file
+        ]
+
+class DesempenhoMensalSerializer(serializers.Serializer):
+    """
+    Serializer (somente leitura) do relatório de desempenho.
+
+    Recebe as linhas já agrupadas pela view (dicionários com a quantidade
+    e as somas) e devolve as médias de cada indicador.
+    """
+    cod_cr = serializers.IntegerField(source='centro_responsabilidade', required=False)
+    nome_cr = serializers.CharField(source='centro_responsabilidade__nome_cr', required=False)
+    secretaria_responsavel = serializers.CharField(required=False)
+    mes = serializers.DateField(format='%Y-%m', required=False)
+    qtd_afericoes = serializers.IntegerField()
+    media_desempenho_serv = serializers.SerializerMethodField()
+    media_desempenho_mat_qt = serializers.SerializerMethodField()
+    media_desempenho_mat_ql = serializers.SerializerMethodField()
+    media_desempenho_mat_rep = serializers.SerializerMethodField()
+
+    def _media(self, obj, campo):
+        if not obj['qtd_afericoes']:
+            return None
+        return round(obj[f'soma_{campo}'] / obj['qtd_afericoes'], 2)
+
+    def get_media_desempenho_serv(self, obj):
+        return self._media(obj, 'desempenho_serv')
+
+    def get_media_desempenho_mat_qt(self, obj):
+        return self._media(obj, 'desempenho_mat_qt')
+
+    def get_media_desempenho_mat_ql(self, obj):
+        return self._media(obj, 'desempenho_mat_ql')
+
+    def get_media_desempenho_mat_rep(self, obj):
+        return self._media(obj, 'desempenho_mat_rep')
@@ -0,0 +1,86 @@
+# /opt/galp-backend/afericao_app/signals.py
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from . import metricas
+from .authentication import esquecer_token, esquecer_tokens_do_usuario
+from .cache import invalidar_afericoes, invalidar_centros
+from .models import CentroResponsabilidade, Afericao, PerfilUsuario, RegistroExclusao
+
+
+# --- Sincronização: registro de exclusões (tombstones) ---
+
+@receiver(post_delete, sender=CentroResponsabilidade)
+@receiver(post_delete, sender=Afericao)
+def registrar_exclusao(sender, instance, **kwargs):
+    """
+    Guarda a chave do registro apagado para o /api/sync/ avisar os apps.
+    """
+    RegistroExclusao.objects.create(
+        modelo=sender._meta.model_name,
+        chave=str(instance.pk),
+        fiscal_id=instance.fiscal_id if sender is Afericao else None,
+    )
+
+
+# --- Cache da lista de Centros de Responsabilidade ---
+
+@receiver(post_save, sender=CentroResponsabilidade)
+@receiver(post_delete, sender=CentroResponsabilidade)
+@receiver(post_save, sender=PerfilUsuario)
+@receiver(post_delete, sender=PerfilUsuario)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidar_cache_centros(sender, **kwargs):
+    """
+    A lista de CRs exibe o nome do fiscal padrão (Perfil -> User), então
+    qualquer alteração nesses modelos invalida a lista em cache (e o
+    índice de CRs próximos, ver geo.py).
+
+    Só depois do COMMIT: antes dele, uma requisição concorrente leria as
+    linhas antigas e as guardaria sob a versão nova.
+    """
+    transaction.on_commit(invalidar_centros)
+
+
+# --- Cache de autenticação por token ---
+
+@receiver(post_delete, sender=Token)
+def esquecer_token_excluido(sender, instance, **kwargs):
+    """Logout ou exclusão do token: o token deixa de valer imediatamente."""
+    esquecer_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=PerfilUsuario)
+@receiver(post_delete, sender=PerfilUsuario)
+def esquecer_tokens_alterados(sender, instance, **kwargs):
+    """
+    O cache guarda o User e o Perfil junto com o token; se eles mudam
+    (ex: usuário desativado, perfil trocado), a entrada é descartada.
+    """
+    esquecer_tokens_do_usuario(instance.pk if sender is User else instance.user_id)
+
+
+# --- Cache do bootstrap (/api/me/bootstrap/) ---
+
+@receiver(post_save, sender=Afericao)
+@receiver(post_delete, sender=Afericao)
+def invalidar_cache_afericoes(sender, instance, **kwargs):
+    # Só depois do COMMIT, como na lista de CRs (ver invalidar_cache_centros)
+    fiscal_id = instance.fiscal_id
+    transaction.on_commit(lambda: invalidar_afericoes(fiscal_id))
+
+
+# --- Métricas: consultas SQL por requisição ---
+
+@receiver(connection_created)
+def medir_consultas(sender, connection, **kwargs):
+    """Toda conexão aberta, em qualquer thread, passa a ser medida (ver metricas.py)."""
+    metricas.instalar(connection)
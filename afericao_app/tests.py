@@ -1,3 +1,2086 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import os
+import random
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from importlib.util import find_spec
+from io import BytesIO, StringIO
+from unittest import mock, skipIf
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import banco
+from . import busca
+from . import compressao
+from . import exportacao
+from . import leitura
+from . import metricas
+from . import renderers
+from .cache import versao_afericoes
+from .geo import IndiceEspacial, distancia_km
+from .management.commands.importar_afericoes import Command
+from .models import PerfilUsuario, CentroResponsabilidade, Afericao, DesempenhoMensal, AlertaGestor
+from .pagination import AfericaoCursorPagination
+from .serializers import AfericaoDetailSerializer, AfericaoListSerializer
+from .utils import intervalo_local
+
+SAO_PAULO = ZoneInfo('America/Sao_Paulo')
+
+
+# --- Helpers de criação de dados ---
+
+def criar_perfil(cpf, perfil='Fiscal de Equipamento', nome='Fiscal Teste'):
+    primeiro_nome, _, ultimo_nome = nome.partition(' ')
+    user = User.objects.create_user(
+        username=cpf,
+        first_name=primeiro_nome,
+        last_name=ultimo_nome,
+    )
+    return PerfilUsuario.objects.create(user=user, cpf=cpf, perfil=perfil)
+
+
+def criar_cr(cod_cr, fiscal=None, secretaria='Gestão e Contratações Públicas', **extra):
+    return CentroResponsabilidade.objects.create(
+        cod_cr=cod_cr,
+        nome_cr=f'CR {cod_cr}',
+        secretaria_responsavel=secretaria,
+        postos_trab_previstos=10,
+        fiscal_padrao=fiscal,
+        **extra
+    )
+
+
+def criar_afericao(cr, fiscal, data=None, **extra):
+    data = data or datetime(2025, 11, 12, 10, 0, tzinfo=SAO_PAULO)
+    campos = {
+        'cod_afericao': f"{data:%Y%m%d}{cr.cod_cr}",
+        'data_afericao': data,
+        'fiscal': fiscal,
+        'centro_responsabilidade': cr,
+        'postos_prev': 10,
+        'postos_ocup': 10,
+        'serv_nota': 4,
+        'mat_qt_nota': 4,
+        'mat_ql_nota': 4,
+        'mat_rep_nota': 4,
+        'uso_maq': 'Sim',
+        'uso_epi': 'Sim',
+    }
+    campos.update(extra)
+    return Afericao.objects.create(**campos)
+
+
+# --- Orçamento de consultas (query budget) ---
+
+class QueryBudgetMixin:
+    """
+    Garante que o número de consultas SQL de um endpoint não cresce com o
+    tamanho do resultado (problema N+1).
+
+    Mede o endpoint com poucas linhas, adiciona mais linhas com 'popular'
+    e mede de novo: as duas contagens precisam ser iguais e caber no
+    orçamento ('max_queries').
+    """
+
+    def contar_queries(self, url, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(ctx.captured_queries), response
+
+    def assertQueryBudget(self, url, popular, max_queries, params=None, linhas_extras=5):
+        params = params or {}
+        antes, _ = self.contar_queries(url, **params)
+        # Como em produção, as gravações chegam ao COMMIT (e invalidam os caches)
+        with self.captureOnCommitCallbacks(execute=True):
+            popular(linhas_extras)
+        depois, _ = self.contar_queries(url, **params)
+
+        self.assertEqual(
+            antes, depois,
+            f'{url}: consultas cresceram com o resultado ({antes} -> {depois}).'
+        )
+        self.assertLessEqual(
+            depois, max_queries,
+            f'{url}: {depois} consultas excedem o orçamento de {max_queries}.'
+        )
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.fiscal = criar_perfil('11111111111', nome='Francisco Vieira')
+        self.coordenador = criar_perfil('22222222222', perfil='Coordenador', nome='Antonio Cleber')
+        self.proximo_cr = 900
+        self._criar_crs_com_afericoes(1)
+
+    def _criar_crs_com_afericoes(self, quantidade):
+        for _ in range(quantidade):
+            # Cada CR tem o seu próprio fiscal, para expor o N+1 em 'fiscal__user'
+            fiscal = criar_perfil(str(self.proximo_cr).zfill(11), nome=f'Fiscal {self.proximo_cr}')
+            cr = criar_cr(self.proximo_cr, fiscal=fiscal)
+            criar_afericao(cr, fiscal)
+            criar_afericao(cr, self.fiscal, data=datetime(2025, 11, 13, 9, 0, tzinfo=SAO_PAULO))
+            self.proximo_cr += 1
+
+    def test_lista_afericoes_coordenador(self):
+        self.client.force_authenticate(self.coordenador.user)
+        self.assertQueryBudget('/api/afericoes/', self._criar_crs_com_afericoes, max_queries=2)
+
+    def test_lista_afericoes_fiscal(self):
+        self.client.force_authenticate(self.fiscal.user)
+        self.assertQueryBudget('/api/afericoes/', self._criar_crs_com_afericoes, max_queries=2)
+
+    def test_lista_centros(self):
+        self.client.force_authenticate(self.fiscal.user)
+        self.assertQueryBudget('/api/centros/', self._criar_crs_com_afericoes, max_queries=1)
+
+    def test_lista_afericoes_exibe_nomes(self):
+        self.client.force_authenticate(self.coordenador.user)
+        _, response = self.contar_queries('/api/afericoes/')
+        item = response.json()['results'][0]
+        self.assertEqual(item['fiscal'], 'Francisco Vieira')
+        self.assertEqual(item['centro_responsabilidade'], '900 - CR 900')
+
+
+# --- Paginação por cursor ---
+
+class AfericaoPaginacaoTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.coordenador = criar_perfil('22222222222', perfil='Coordenador')
+        self.fiscal = criar_perfil('11111111111')
+        self.client.force_authenticate(self.coordenador.user)
+
+        # 5 CRs aferidos no mesmo instante (empate em data_afericao) e mais 3 em dias anteriores
+        data = datetime(2025, 11, 12, 10, 0, tzinfo=SAO_PAULO)
+        for cod in range(900, 905):
+            criar_afericao(criar_cr(cod), self.fiscal, data=data)
+        for dias in range(1, 4):
+            criar_afericao(criar_cr(910 + dias), self.fiscal, data=data - timedelta(days=dias))
+
+    def _percorrer(self, page_size):
+        codigos = []
+        url = f'/api/afericoes/?page_size={page_size}'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            corpo = response.json()
+            self.assertLessEqual(len(corpo['results']), page_size)
+            codigos.extend(item['cod_afericao'] for item in corpo['results'])
+            url = corpo['next']
+        return codigos
+
+    def test_percorre_todas_as_paginas_sem_repetir(self):
+        esperado = list(
+            Afericao.objects.order_by('-data_afericao', 'cod_afericao')
+            .values_list('cod_afericao', flat=True)
+        )
+        self.assertEqual(self._percorrer(page_size=2), esperado)
+        self.assertEqual(self._percorrer(page_size=3), esperado)
+
+    def test_cursor_e_opaco(self):
+        corpo = self.client.get('/api/afericoes/?page_size=2').json()
+        self.assertNotIn('count', corpo)
+        self.assertIn('cursor=', corpo['next'])
+        self.assertIsNone(corpo['previous'])
+
+    def test_page_size_limitado_ao_maximo(self):
+        with mock.patch.object(AfericaoCursorPagination, 'max_page_size', 3):
+            corpo = self.client.get('/api/afericoes/?page_size=100000').json()
+        self.assertEqual(len(corpo['results']), 3)
+
+
+# --- check_exists e índices ---
+
+class CheckExistsTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.fiscal = criar_perfil('11111111111')
+        self.client.force_authenticate(self.fiscal.user)
+        self.cr = criar_cr(900, fiscal=self.fiscal)
+        # 23:30 em São Paulo já é o dia seguinte em UTC
+        criar_afericao(self.cr, self.fiscal, data=datetime(2025, 11, 12, 23, 30, tzinfo=SAO_PAULO))
+
+    def _check(self, **params):
+        return self.client.get('/api/afericoes/check_exists/', params)
+
+    def test_dia_no_fuso_local(self):
+        self.assertTrue(self._check(cr=900, data='2025-11-12').json()['exists'])
+        self.assertFalse(self._check(cr=900, data='2025-11-13').json()['exists'])
+        self.assertFalse(self._check(cr=900, data='2025-11-11').json()['exists'])
+        self.assertFalse(self._check(cr=901, data='2025-11-12').json()['exists'])
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self._check(cr=900).status_code, 400)
+        self.assertEqual(self._check(cr='abc', data='2025-11-12').status_code, 400)
+        self.assertEqual(self._check(cr=900, data='12/11/2025').status_code, 400)
+
+
+class AfericaoIndicesTests(TestCase):
+    """
+    Regressão via EXPLAIN: as consultas quentes precisam usar os índices
+    compostos. No PostgreSQL a varredura sequencial é desligada para que o
+    planejador não a prefira só porque a tabela de teste é pequena.
+    """
+
+    def setUp(self):
+        self.fiscal = criar_perfil('11111111111')
+        self.cr = criar_cr(900, fiscal=self.fiscal)
+        criar_afericao(self.cr, self.fiscal)
+
+    def _plano(self, queryset):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_check_exists_usa_indice_cr_data(self):
+        inicio, fim = intervalo_local(datetime(2025, 11, 12).date())
+        plano = self._plano(Afericao.objects.filter(
+            centro_responsabilidade_id=900,
+            data_afericao__gte=inicio,
+            data_afericao__lt=fim,
+        ))
+        self.assertIn('afericao_cr_data_idx', plano)
+
+    def test_listagem_do_fiscal_usa_indice_fiscal_data(self):
+        plano = self._plano(
+            Afericao.objects.filter(fiscal=self.fiscal).order_by('-data_afericao')[:50]
+        )
+        self.assertIn('afericao_fiscal_data_idx', plano)
+
+    def test_filtros_da_listagem_usam_indices(self):
+        for filtro, indice in [
+            ({'uso_epi': 'Não'}, 'afericao_uso_epi_data_idx'),
+            ({'uso_maq': 'Não'}, 'afericao_uso_maq_data_idx'),
+            ({'serv_nota': 1}, 'afericao_serv_nota_data_idx'),
+            ({'status_revisao': True}, 'afericao_revisao_fechada_idx'),
+            ({'status_revisao': False}, 'afericao_revisao_aberta_idx'),
+        ]:
+            plano = self._plano(Afericao.objects.filter(**filtro).order_by('-data_afericao')[:50])
+            self.assertIn(indice, plano, filtro)
+        plano = self._plano(CentroResponsabilidade.objects.filter(secretaria_responsavel='Saúde'))
+        self.assertIn('cr_secretaria_idx', plano)
+
+    def test_fechamento_d1_usa_indice_parcial(self):
+        corte, _ = intervalo_local(timezone.localdate())
+        plano = self._plano(Afericao.objects.filter(status_revisao=False, data_afericao__lt=corte)[:5000])
+        self.assertIn('afericao_revisao_aberta_idx', plano)
+
+
+# --- Consolidado mensal de desempenho ---
+
+class DesempenhoMensalTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.fiscal = criar_perfil('11111111111')
+        self.coordenador = criar_perfil('22222222222', perfil='Coordenador')
+        self.cr = criar_cr(900, fiscal=self.fiscal)
+        self.outro_cr = criar_cr(901, secretaria='Saúde')
+        self.nov = datetime(2025, 11, 12, 10, 0, tzinfo=SAO_PAULO)
+
+    def _linha(self, cr, mes):
+        return DesempenhoMensal.objects.get(centro_responsabilidade=cr, mes=mes)
+
+    def test_atualiza_ao_criar_revisar_e_excluir(self):
+        a1 = criar_afericao(self.cr, self.fiscal, data=self.nov, serv_nota=5)
+        criar_afericao(self.cr, self.fiscal, data=self.nov + timedelta(days=1), serv_nota=3)
+        linha = self._linha(self.cr, date(2025, 11, 1))
+        self.assertEqual(linha.qtd_afericoes, 2)
+        self.assertAlmostEqual(linha.soma_desempenho_serv, 160)
+
+        a1.serv_nota = 1
+        a1.save()
+        self.assertAlmostEqual(self._linha(self.cr, date(2025, 11, 1)).soma_desempenho_serv, 80)
+
+        a1.delete()
+        self.assertEqual(self._linha(self.cr, date(2025, 11, 1)).qtd_afericoes, 1)
+
+    def test_revisao_que_muda_cr_ou_mes_acerta_os_dois(self):
+        afericao = criar_afericao(self.cr, self.fiscal, data=self.nov, serv_nota=5)
+        criar_afericao(self.cr, self.fiscal, data=self.nov + timedelta(days=1), serv_nota=3)
+
+        afericao.data_afericao = self.nov - timedelta(days=30)
+        afericao.save()
+        self.assertEqual(self._linha(self.cr, date(2025, 11, 1)).qtd_afericoes, 1)
+        self.assertAlmostEqual(self._linha(self.cr, date(2025, 11, 1)).soma_desempenho_serv, 60)
+        self.assertEqual(self._linha(self.cr, date(2025, 10, 1)).qtd_afericoes, 1)
+
+        afericao.centro_responsabilidade = self.outro_cr
+        afericao.save()
+        self.assertFalse(DesempenhoMensal.objects.filter(centro_responsabilidade=self.cr, mes=date(2025, 10, 1)).exists())
+        self.assertAlmostEqual(self._linha(self.outro_cr, date(2025, 10, 1)).soma_desempenho_serv, 100)
+
+    def test_virada_do_mes_no_fuso_local(self):
+        # 30/11 22:00 em São Paulo já é dezembro em UTC
+        criar_afericao(self.cr, self.fiscal, data=datetime(2025, 11, 30, 22, 0, tzinfo=SAO_PAULO))
+        self.assertEqual(self._linha(self.cr, date(2025, 11, 1)).qtd_afericoes, 1)
+        self.assertFalse(DesempenhoMensal.objects.filter(mes=date(2025, 12, 1)).exists())
+
+    def test_comando_recalcular_reproduz_o_incremental(self):
+        criar_afericao(self.cr, self.fiscal, data=self.nov, serv_nota=2)
+        criar_afericao(self.outro_cr, self.fiscal, data=self.nov - timedelta(days=30), serv_nota=5)
+        criar_afericao(self.outro_cr, self.fiscal, data=datetime(2025, 11, 30, 22, 0, tzinfo=SAO_PAULO))
+        campos = ('centro_responsabilidade_id', 'secretaria_responsavel', 'mes',
+                  'qtd_afericoes', 'soma_desempenho_serv', 'soma_desempenho_mat_rep')
+        incremental = sorted(DesempenhoMensal.objects.values_list(*campos))
+
+        DesempenhoMensal.objects.all().delete()
+        call_command('recalcular_desempenho_mensal', stdout=StringIO())
+        self.assertEqual(sorted(DesempenhoMensal.objects.values_list(*campos)), incremental)
+
+    def test_endpoint_agrupa_por_secretaria(self):
+        criar_afericao(self.cr, self.fiscal, data=self.nov, serv_nota=5)
+        criar_afericao(self.cr, self.fiscal, data=self.nov - timedelta(days=30), serv_nota=3)
+        criar_afericao(self.outro_cr, self.fiscal, data=self.nov, serv_nota=1)
+        self.client.force_authenticate(self.coordenador.user)
+
+        response = self.client.get('/api/relatorios/desempenho/', {'agrupar': 'secretaria'})
+        self.assertEqual(response.status_code, 200)
+        por_secretaria = {linha['secretaria_responsavel']: linha for linha in response.json()}
+        self.assertEqual(por_secretaria['Saúde']['media_desempenho_serv'], 20.0)
+        self.assertEqual(por_secretaria['Gestão e Contratações Públicas']['qtd_afericoes'], 2)
+        self.assertEqual(por_secretaria['Gestão e Contratações Públicas']['media_desempenho_serv'], 80.0)
+
+        response = self.client.get('/api/relatorios/desempenho/', {'mes_inicio': '2025-11', 'cr': 900})
+        self.assertEqual(response.json(), [{
+            'cod_cr': 900, 'nome_cr': 'CR 900',
+            'secretaria_responsavel': 'Gestão e Contratações Públicas', 'mes': '2025-11',
+            'qtd_afericoes': 1, 'media_desempenho_serv': 100.0, 'media_desempenho_mat_qt': 80.0,
+            'media_desempenho_mat_ql': 80.0, 'media_desempenho_mat_rep': 80.0,
+        }])
+        self.assertEqual(
+            self.client.get('/api/relatorios/desempenho/', {'agrupar': 'ano'}).status_code, 400
+        )
+
+    def test_fiscal_ve_apenas_os_seus_crs(self):
+        criar_afericao(self.cr, self.fiscal, data=self.nov)
+        criar_afericao(self.outro_cr, self.fiscal, data=self.nov)
+        self.client.force_authenticate(self.fiscal.user)
+        linhas = self.client.get('/api/relatorios/desempenho/').json()
+        self.assertEqual([linha['cod_cr'] for linha in linhas], [900])
+
+    def test_endpoint_nao_le_as_afericoes(self):
+        self.client.force_authenticate(self.coordenador.user)
+        meses = iter(range(1, 13))
+
+        def popular(quantidade):
+            for _ in range(quantidade):
+                criar_afericao(self.cr, self.fiscal, data=datetime(2024, next(meses), 5, tzinfo=SAO_PAULO))
+
+        popular(1)
+        self.assertQueryBudget('/api/relatorios/desempenho/', popular, max_queries=2)
+
+
+# --- Exportação ---
+
+class ExportacaoTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.fiscal = criar_perfil('11111111111', nome='Francisco Vieira')
+        self.outro_fiscal = criar_perfil('33333333333')
+        self.coordenador = criar_perfil('22222222222', perfil='Coordenador')
+        self.cr = criar_cr(900, fiscal=self.fiscal)
+        self.cr_saude = criar_cr(901, secretaria='Saúde')
+        criar_afericao(self.cr, self.fiscal, data=datetime(2025, 11, 12, 23, 30, tzinfo=SAO_PAULO))
+        criar_afericao(self.cr, self.fiscal, data=datetime(2025, 10, 1, 8, 0, tzinfo=SAO_PAULO))
+        criar_afericao(self.cr_saude, self.outro_fiscal, data=datetime(2025, 11, 13, 8, 0, tzinfo=SAO_PAULO))
+
+    def _csv(self, **params):
+        response = self.client.get('/api/afericoes/export/', params)
+        self.assertEqual(response.status_code, 200, getattr(response, 'content', b''))
+        self.assertTrue(response.streaming)
+        conteudo = b''.join(response.streaming_content).decode('utf-8-sig')
+        return list(csv.DictReader(StringIO(conteudo), delimiter=';'))
+
+    def test_csv_com_escopo_do_fiscal(self):
+        self.client.force_authenticate(self.fiscal.user)
+        linhas = self._csv()
+        self.assertEqual([linha['Cod_Afericao'] for linha in linhas], ['20251112900', '20251001900'])
+        self.assertEqual(linhas[0]['Data_Afericao'], '2025-11-12 23:30:00')
+        self.assertEqual(linhas[0]['Nome_Fiscal_Primeiro'], 'Francisco')
+        self.assertEqual(linhas[0]['Desempenho_Serv'], '80.0')
+
+    def test_filtros_de_periodo_e_secretaria(self):
+        self.client.force_authenticate(self.coordenador.user)
+        linhas = self._csv(data_inicio='2025-11-01', data_fim='2025-11-12')
+        self.assertEqual([linha['Cod_Afericao'] for linha in linhas], ['20251112900'])
+        linhas = self._csv(secretaria='Saúde')
+        self.assertEqual([linha['Cod_Afericao'] for linha in linhas], ['20251113901'])
+
+    def test_filtros_amplos_sem_limite_de_periodo(self):
+        # O limite de período é da listagem: quem não é staff exporta anos inteiros
+        self.client.force_authenticate(self.coordenador.user)
+        self.assertFalse(self.coordenador.user.is_staff)
+        linhas = self._csv(secretaria='Saúde', data_inicio='2020-01-01', data_fim='2025-12-31')
+        self.assertEqual([linha['Cod_Afericao'] for linha in linhas], ['20251113901'])
+        linhas = self._csv(serv_nota_min=1)
+        self.assertEqual(len(linhas), 3)
+        response = self.client.get('/api/afericoes/', {'secretaria': 'Saúde'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_parametros_invalidos(self):
+        self.client.force_authenticate(self.coordenador.user)
+        self.assertEqual(self.client.get('/api/afericoes/export/', {'formato': 'pdf'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/afericoes/export/', {'data_inicio': '01/11/2025'}).status_code, 400)
+
+    @skipIf(exportacao.Workbook is None, 'openpyxl não instalado')
+    def test_xlsx(self):
+        from openpyxl import load_workbook
+
+        self.client.force_authenticate(self.coordenador.user)
+        response = self.client.get('/api/afericoes/export/', {'formato': 'xlsx'})
+        self.assertEqual(response.status_code, 200)
+        planilha = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        linhas = list(planilha.values)
+        self.assertEqual(linhas[0], tuple(exportacao.CABECALHO))
+        self.assertEqual(len(linhas), 4)
+
+
+# --- Envio em lote ---
+
+class AfericaoLoteTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.fiscal = criar_perfil('11111111111')
+        self.client.force_authenticate(self.fiscal.user)
+        for cod in range(900, 910):
+            criar_cr(cod, fiscal=self.fiscal)
+
+    def _item(self, cod_cr, dia=12, **extra):
+        item = {
+            'cod_afericao': f'202511{dia:02d}{cod_cr}',
+            'centro_responsabilidade': cod_cr,
+            'data_afericao': f'2025-11-{dia:02d}T10:00:00-03:00',
+            'postos_prev': 10,
+            'postos_ocup': 8,
+            'serv_nota': 3,
+            'mat_qt_nota': 4,
+            'mat_ql_nota': 5,
+            'mat_rep_nota': 2,
+            'uso_maq': 'Sim',
+            'uso_epi': 'Parcial',
+        }
+        item.update(extra)
+        return item
+
+    def _enviar(self, itens):
+        return self.client.post('/api/afericoes/lote/', itens, format='json')
+
+    def test_resultado_por_item(self):
+        response = self._enviar([
+            self._item(900),
+            self._item(901, serv_nota=9),
+            self._item(999),
+            self._item(902),
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [resultado['status'] for resultado in response.json()],
+            ['criada', 'invalida', 'invalida', 'criada'],
+        )
+        self.assertIn('serv_nota', response.json()[1]['erros'])
+
+        afericao = Afericao.objects.get(pk='20251112900')
+        self.assertEqual(afericao.fiscal, self.fiscal)
+        self.assertEqual(afericao.desempenho_serv, 60.0)
+        self.assertEqual(afericao.desempenho_mat_rep, 40.0)
+        self.assertEqual(
+            DesempenhoMensal.objects.get(centro_responsabilidade_id=902).qtd_afericoes, 1
+        )
+
+    def test_reenvio_e_idempotente(self):
+        criar_afericao(CentroResponsabilidade.objects.get(pk=900), self.fiscal, serv_nota=5)
+        response = self._enviar([self._item(900), self._item(901), self._item(901)])
+        self.assertEqual(
+            [resultado['status'] for resultado in response.json()],
+            ['existente', 'criada', 'existente'],
+        )
+        self.assertEqual(Afericao.objects.get(pk='20251112900').serv_nota, 5)
+
+        response = self._enviar([self._item(901)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['status'], 'existente')
+        self.assertEqual(Afericao.objects.count(), 2)
+
+    def test_envio_simultaneo_do_mesmo_codigo(self):
+        gestor = criar_perfil('55555555555', perfil='Gestor Contrato')
+        CentroResponsabilidade.objects.update(gestor_contrato=gestor)
+        cr = CentroResponsabilidade.objects.get(pk=900)
+        original = Afericao.objects.bulk_create
+
+        def outro_envio_grava_antes(afericoes, **kwargs):
+            # Outro aparelho grava o mesmo código, com outra nota, entre a
+            # busca dos existentes e o INSERT deste lote
+            criar_afericao(cr, self.fiscal, serv_nota=5)
+            return original(afericoes, **kwargs)
+
+        with mock.patch.object(Afericao.objects, 'bulk_create', side_effect=outro_envio_grava_antes):
+            response = self._enviar([self._item(900, serv_nota=1), self._item(901, serv_nota=1)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([resultado['status'] for resultado in response.json()], ['existente', 'criada'])
+        self.assertEqual(Afericao.objects.get(pk='20251112900').serv_nota, 5)
+        # Sem alertas pela nota 1 que este lote não gravou
+        self.assertEqual(
+            sorted(AlertaGestor.objects.values_list('afericao_id', 'motivo')),
+            [('20251112901', 'falta_postos'), ('20251112901', 'nota_servico')],
+        )
+        self.assertEqual(DesempenhoMensal.objects.get(centro_responsabilidade_id=900).qtd_afericoes, 1)
+
+    def test_consultas_nao_crescem_com_o_lote(self):
+        def contar(itens):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self._enviar(itens).status_code, 201)
+            return len(ctx.captured_queries)
+
+        # Mesmo CR e mês: o consolidado é recalculado uma única vez
+        contar([self._item(900, dia=1)])
+        pequeno = contar([self._item(900, dia=2)])
+        grande = contar([self._item(900, dia=dia) for dia in range(3, 13)])
+        self.assertEqual(pequeno, grande)
+
+    def test_cache_invalidado_so_apos_o_commit(self):
+        for gravar in (lambda: self._enviar([self._item(900)]),
+                       lambda: criar_afericao(CentroResponsabilidade.objects.get(pk=901), self.fiscal)):
+            versao = versao_afericoes(self.fiscal.pk)
+            with self.captureOnCommitCallbacks(execute=True):
+                gravar()
+                # Antes do COMMIT, uma leitura ainda guardaria os dados antigos
+                self.assertEqual(versao_afericoes(self.fiscal.pk), versao)
+            self.assertNotEqual(versao_afericoes(self.fiscal.pk), versao)
+
+    def test_corpo_invalido(self):
+        self.assertEqual(self._enviar({'cod_afericao': 'x'}).status_code, 400)
+        with self.settings(AFERICOES_LOTE_MAX=2):
+            self.assertEqual(self._enviar([self._item(900)] * 3).status_code, 400)
+
+
+# --- Sincronização incremental ---
+
+@override_settings(SYNC_MARGEM=timedelta(0))
+class SyncTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.fiscal = criar_perfil('11111111111')
+        self.outro_fiscal = criar_perfil('33333333333')
+        self.client.force_authenticate(self.fiscal.user)
+        self.cr = criar_cr(900, fiscal=self.fiscal)
+        self.outro_cr = criar_cr(901)
+        self.afericao = criar_afericao(self.cr, self.fiscal)
+        criar_afericao(self.outro_cr, self.outro_fiscal)
+
+    def _sync(self, token=None):
+        response = self.client.get('/api/sync/', {'since': token} if token else {})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_carga_completa_respeita_escopo_do_fiscal(self):
+        corpo = self._sync()
+        self.assertTrue(corpo['completo'])
+        self.assertEqual([cr['cod_cr'] for cr in corpo['centros']['alterados']], [900, 901])
+        self.assertEqual([a['cod_afericao'] for a in corpo['afericoes']['alterados']], ['20251112900'])
+
+    def test_delta_traz_apenas_mudancas(self):
+        token = self._sync()['token']
+        self.assertEqual(self._sync(token)['afericoes']['alterados'], [])
+
+        self.afericao.serv_nota = 2
+        self.afericao.save()
+        self.outro_cr.nome_cr = 'Almoxarifado'
+        self.outro_cr.save()
+        criar_cr(902).delete()
+
+        corpo = self._sync(token)
+        self.assertFalse(corpo['completo'])
+        self.assertEqual([a['cod_afericao'] for a in corpo['afericoes']['alterados']], ['20251112900'])
+        self.assertEqual([cr['cod_cr'] for cr in corpo['centros']['alterados']], [901])
+        self.assertEqual(corpo['centros']['excluidos'], [902])
+
+    def test_exclusao_de_afericao(self):
+        token = self._sync()['token']
+        Afericao.objects.filter(pk=self.afericao.pk).delete()
+        corpo = self._sync(token)
+        self.assertEqual(corpo['afericoes']['excluidos'], ['20251112900'])
+
+    def test_margem_reenvia_gravacoes_recentes(self):
+        with self.settings(SYNC_MARGEM=timedelta(minutes=1)):
+            token = self._sync()['token']
+        corpo = self._sync(token)
+        self.assertEqual([a['cod_afericao'] for a in corpo['afericoes']['alterados']], ['20251112900'])
+
+    def test_token_invalido(self):
+        response = self.client.get('/api/sync/', {'since': 'adulterado'})
+        self.assertEqual(response.status_code, 400)
+
+    def _paginas(self, token=None):
+        """Segue as páginas até 'continua' vir False; devolve as páginas."""
+        paginas = [self._sync(token)]
+        while paginas[-1]['continua']:
+            paginas.append(self._sync(paginas[-1]['token']))
+        return paginas
+
+    def test_carga_completa_e_delta_paginados(self):
+        for cod in range(910, 913):
+            criar_afericao(criar_cr(cod), self.fiscal)
+        with self.settings(SYNC_PAGE_SIZE=2, SYNC_MARGEM=timedelta(0)):
+            paginas = self._paginas()
+            self.assertTrue(all(pagina['completo'] for pagina in paginas))
+            self.assertTrue(all(
+                len(pagina['centros']['alterados']) + len(pagina['afericoes']['alterados']) <= 2
+                for pagina in paginas
+            ))
+            centros = [cr['cod_cr'] for pagina in paginas for cr in pagina['centros']['alterados']]
+            afericoes = [a['cod_afericao'] for pagina in paginas for a in pagina['afericoes']['alterados']]
+            self.assertEqual(centros, [900, 901, 910, 911, 912])
+            self.assertEqual(sorted(afericoes), ['20251112900', '20251112910', '20251112911', '20251112912'])
+
+            # O último token vale para o delta, também paginado
+            Afericao.objects.filter(pk__in=['20251112910', '20251112911', '20251112912']).delete()
+            with self.assertNumQueries(3): # uma por etapa, cada uma com LIMIT
+                corpo = self._sync(paginas[-1]['token'])
+            self.assertTrue(corpo['continua'])
+            self.assertEqual(len(corpo['afericoes']['excluidos']), 2)
+            ultima = self._sync(corpo['token'])
+            self.assertFalse(ultima['continua'])
+            self.assertEqual(
+                sorted(corpo['afericoes']['excluidos'] + ultima['afericoes']['excluidos']),
+                ['20251112910', '20251112911', '20251112912'],
+            )
+
+    def test_exclusoes_no_escopo_do_fiscal(self):
+        token = self._sync()['token']
+        Afericao.objects.exclude(pk=self.afericao.pk).delete()
+        self.assertEqual(self._sync(token)['afericoes']['excluidos'], [])
+
+        coordenador = criar_perfil('22222222222', perfil='Coordenador')
+        self.client.force_authenticate(coordenador.user)
+        self.assertEqual(self._sync(token)['afericoes']['excluidos'], ['20251112901'])
+
+
+# --- Cache e ETag da lista de CRs ---
+
+class CentrosCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.fiscal = criar_perfil('11111111111', nome='Francisco Vieira')
+        self.client.force_authenticate(self.fiscal.user)
+        self.cr = criar_cr(900, fiscal=self.fiscal)
+
+    def test_304_sem_consultar_o_banco(self):
+        response = self.client.get('/api/centros/')
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"centros-'))
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/centros/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_lista_servida_do_cache(self):
+        self.client.get('/api/centros/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/centros/')
+        self.assertEqual(response.json()[0]['fiscal_padrao'], 'Francisco Vieira')
+
+    def test_invalidado_por_alteracoes(self):
+        etag = self.client.get('/api/centros/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cr.nome_cr = 'Prédio Sede'
+            self.cr.save()
+        response = self.client.get('/api/centros/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['nome_cr'], 'Prédio Sede')
+
+        # O nome do fiscal vem do User
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.fiscal.user.first_name = 'Chico'
+            self.fiscal.user.save()
+        response = self.client.get('/api/centros/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()[0]['fiscal_padrao'], 'Chico Vieira')
+
+    def test_versao_so_muda_apos_o_commit(self):
+        etag = self.client.get('/api/centros/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.cr.nome_cr = 'Prédio Sede'
+            self.cr.save()
+            # Antes do COMMIT, quem lê ainda recebe a versão (e a lista) antiga
+            self.assertEqual(self.client.get('/api/centros/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.client.get('/api/centros/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+# --- CRs mais próximos ---
+
+class CentrosProximosTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.fiscal = criar_perfil('11111111111')
+        self.client.force_authenticate(self.fiscal.user)
+        # Praça da Sé e dois CRs a leste, um sem coordenadas
+        criar_cr(900, latitude=-23.5503, longitude=-46.6339)
+        criar_cr(901, latitude=-23.5503, longitude=-46.6200)
+        criar_cr(902, latitude=-23.5503, longitude=-46.5000)
+        criar_cr(903)
+
+    def test_indice_igual_a_forca_bruta(self):
+        sorteio = random.Random(42)
+        pontos = [
+            (sorteio.uniform(-24.0, -23.3), sorteio.uniform(-46.9, -46.3), chave, chave)
+            for chave in range(3000)
+        ]
+        indice = IndiceEspacial(pontos)
+        for lat, lon in [(-23.55, -46.63), (-23.3, -46.9), (-22.0, -45.0), (-24.5, -46.6)]:
+            esperado = sorted(pontos, key=lambda p: (distancia_km(lat, lon, p[0], p[1]), p[2]))[:10]
+            obtido = indice.proximos(lat, lon, 10)
+            self.assertEqual([dados for _, dados in obtido], [p[3] for p in esperado])
+        self.assertEqual(len(indice.proximos(-23.55, -46.63, 5000)), 3000)
+
+    def test_endpoint(self):
+        response = self.client.get('/api/centros/proximos/', {'lat': -23.5503, 'lon': -46.6339, 'k': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([cr['cod_cr'] for cr in response.json()], [900, 901])
+        self.assertEqual(response.json()[0]['distancia_km'], 0)
+        self.assertAlmostEqual(response.json()[1]['distancia_km'], 1.417, places=2)
+
+        # Índice já montado: sem consultas ao banco
+        with self.assertNumQueries(0):
+            self.client.get('/api/centros/proximos/', {'lat': -23.55, 'lon': -46.5})
+
+    def test_refeito_quando_um_cr_muda(self):
+        self.client.get('/api/centros/proximos/', {'lat': -23.5503, 'lon': -46.5})
+        CentroResponsabilidade.objects.filter(pk=903).update(latitude=-23.5503, longitude=-46.5001)
+        with self.captureOnCommitCallbacks(execute=True):
+            CentroResponsabilidade.objects.get(pk=903).save()  # sinal troca a versão no COMMIT
+        response = self.client.get('/api/centros/proximos/', {'lat': -23.5503, 'lon': -46.5001, 'k': 1})
+        self.assertEqual(response.json()[0]['cod_cr'], 903)
+
+    def test_parametros_invalidos(self):
+        for params in [{}, {'lat': 'abc', 'lon': 1}, {'lat': 91, 'lon': 0},
+                       {'lat': 0, 'lon': 0, 'k': 0}, {'lat': 0, 'lon': 0, 'k': 1000}]:
+            self.assertEqual(self.client.get('/api/centros/proximos/', params).status_code, 400)
+
+
+
+# --- Mapa de CRs agrupados ---
+
+class CentrosMapaTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.fiscal = criar_perfil('11111111111')
+        self.coordenador = criar_perfil('22222222222', perfil='Coordenador')
+        self.client.force_authenticate(self.coordenador.user)
+        # Dois CRs vizinhos no centro e um na zona leste
+        self.cr1 = criar_cr(900, latitude=-23.5503, longitude=-46.6339)
+        self.cr2 = criar_cr(901, latitude=-23.5510, longitude=-46.6330)
+        self.cr3 = criar_cr(902, latitude=-23.5400, longitude=-46.4700)
+        dia = datetime(2025, 11, 10, 10, 0, tzinfo=SAO_PAULO)
+        criar_afericao(self.cr1, self.fiscal, data=dia, serv_nota=1)
+        criar_afericao(self.cr1, self.fiscal, data=dia + timedelta(days=1), serv_nota=5)  # a última vale
+        criar_afericao(self.cr2, self.fiscal, data=dia, serv_nota=3)
+        self.params = {'zoom': 12, 'bbox': '-47.0,-24.0,-46.0,-23.0'}
+
+    def test_grupos_por_celula(self):
+        response = self.client.get('/api/centros/mapa/', self.params)
+        self.assertEqual(response.status_code, 200)
+        clusters = sorted(response.json()['clusters'], key=lambda c: c['qtd_centros'])
+        self.assertEqual(len(clusters), 2)
+        self.assertEqual(clusters[0]['cod_cr'], 902)
+        self.assertIsNone(clusters[0]['media_desempenho_serv'])
+        self.assertEqual(clusters[1], {
+            'latitude': -23.55065, 'longitude': -46.63345, 'qtd_centros': 2, 'qtd_avaliados': 2,
+            'media_desempenho_serv': 80.0, 'min_desempenho_serv': 60.0, 'cod_cr': None,
+        })
+
+        # Zoom máximo: cada CR vira o seu próprio grupo
+        response = self.client.get('/api/centros/mapa/', {**self.params, 'zoom': 20})
+        self.assertEqual(len(response.json()['clusters']), 3)
+
+    def test_arrastar_o_mapa_nao_consulta_o_banco(self):
+        self.client.get('/api/centros/mapa/', self.params)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/centros/mapa/', {'zoom': 12, 'bbox': '-46.5,-23.6,-46.4,-23.5'})
+        self.assertEqual([c['cod_cr'] for c in response.json()['clusters']], [902])
+
+        # Nova aferição troca a versão (no COMMIT): o mapa é refeito
+        with self.captureOnCommitCallbacks(execute=True):
+            criar_afericao(self.cr3, self.fiscal, serv_nota=2)
+        response = self.client.get('/api/centros/mapa/', {'zoom': 12, 'bbox': '-46.5,-23.6,-46.4,-23.5'})
+        self.assertEqual(response.json()['clusters'][0]['min_desempenho_serv'], 40.0)
+
+    def test_acesso_e_parametros(self):
+        for params in [{}, {'zoom': 12}, {'zoom': 'x', 'bbox': '0,0,1,1'},
+                       {'zoom': 21, 'bbox': '0,0,1,1'}, {'zoom': 5, 'bbox': '1,0,0,1'}]:
+            self.assertEqual(self.client.get('/api/centros/mapa/', params).status_code, 400)
+
+        self.client.force_authenticate(self.fiscal.user)
+        self.assertEqual(self.client.get('/api/centros/mapa/', self.params).status_code, 403)
+
+
+# --- Autenticação por token com cache ---
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        caches['auth'].clear()
+        self.client = APIClient()
+        self.fiscal = criar_perfil('11111111111')
+        self.cr = criar_cr(900, fiscal=self.fiscal)
+        criar_afericao(self.cr, self.fiscal)
+        self.token = Token.objects.create(user=self.fiscal.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_e_perfil_vem_do_cache(self):
+        with self.assertNumQueries(2): # token+user+perfil, listagem
+            self.assertEqual(self.client.get('/api/afericoes/').status_code, 200)
+        with self.assertNumQueries(1): # só a listagem
+            self.assertEqual(self.client.get('/api/afericoes/').status_code, 200)
+
+    def test_criacao_usa_perfil_da_requisicao(self):
+        self.client.get('/api/centros/')
+        response = self.client.post('/api/afericoes/', {
+            'cod_afericao': '20251113900', 'centro_responsabilidade': 900,
+            'data_afericao': '2025-11-13T10:00:00-03:00', 'postos_prev': 10, 'postos_ocup': 10,
+            'serv_nota': 5, 'mat_qt_nota': 5, 'mat_ql_nota': 5, 'mat_rep_nota': 5,
+            'uso_maq': 'Não', 'uso_epi': 'Sim',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Afericao.objects.get(pk='20251113900').fiscal, self.fiscal)
+
+    def test_logout_invalida_na_hora(self):
+        self.assertEqual(self.client.get('/api/centros/').status_code, 200)
+        self.assertEqual(self.client.post('/api/logout/').status_code, 204)
+        self.assertEqual(self.client.get('/api/centros/').status_code, 401)
+
+    def test_usuario_desativado_perde_acesso(self):
+        self.assertEqual(self.client.get('/api/centros/').status_code, 200)
+        self.fiscal.user.is_active = False
+        self.fiscal.user.save()
+        self.assertEqual(self.client.get('/api/centros/').status_code, 401)
+
+    def test_token_invalido(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token inexistente')
+        self.assertEqual(self.client.get('/api/centros/').status_code, 401)
+
+
+# --- Bootstrap pós-login ---
+
+class BootstrapTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        caches['auth'].clear()
+        self.client = APIClient()
+        self.fiscal = criar_perfil('11111111111', nome='Francisco Vieira')
+        self.token = Token.objects.create(user=self.fiscal.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.cr_hoje = criar_cr(900, fiscal=self.fiscal)
+        self.cr_pendente = criar_cr(901, fiscal=self.fiscal)
+        criar_cr(902)
+        self.agora = timezone.localtime()
+        criar_afericao(self.cr_hoje, self.fiscal, data=self.agora)
+        criar_afericao(self.cr_pendente, self.fiscal, data=self.agora - timedelta(days=3))
+
+    def _bootstrap(self, **params):
+        response = self.client.get('/api/me/bootstrap/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_conteudo(self):
+        corpo = self._bootstrap()
+        self.assertEqual(corpo['user_profile']['cpf'], '11111111111')
+        self.assertEqual([cr['cod_cr'] for cr in corpo['centros']], [900, 901])
+        self.assertEqual(len(corpo['afericoes_recentes']), 2)
+        self.assertEqual(corpo['hoje']['centros_aferidos'], [900])
+        self.assertEqual(corpo['hoje']['centros_pendentes'], [901])
+        self.assertEqual(len(self._bootstrap(n=1)['afericoes_recentes']), 1)
+
+    def test_consultas_fixas_e_cache_por_usuario(self):
+        for cod in range(910, 920):
+            criar_afericao(criar_cr(cod, fiscal=self.fiscal), self.fiscal, data=self.agora)
+        with self.assertNumQueries(4): # token, CRs, recentes, aferidos hoje
+            self._bootstrap()
+        with self.assertNumQueries(1): # só os aferidos hoje
+            self._bootstrap()
+
+    def test_nova_afericao_invalida_o_cache(self):
+        self.assertEqual(self._bootstrap()['hoje']['centros_pendentes'], [901])
+        criar_afericao(self.cr_pendente, self.fiscal, data=self.agora)
+        self.assertEqual(self._bootstrap()['hoje']['centros_pendentes'], [])
+
+    def test_afericao_de_outro_fiscal_entra_em_hoje(self):
+        self.assertEqual(self._bootstrap()['hoje']['centros_aferidos'], [900])
+        criar_afericao(self.cr_pendente, criar_perfil('33333333333'), data=self.agora)
+        hoje = self._bootstrap()['hoje']
+        self.assertEqual(hoje['centros_aferidos'], [900, 901])
+        self.assertEqual(hoje['centros_pendentes'], [])
+
+
+# --- Carga inicial em lote ---
+
+class CarregarDadosIniciaisBulkTests(TestCase):
+
+    USUARIOS = (
+        'CPF_Usuario,Nome_Usuario,E-mail,Telefone,Perfil,Secretaria_Empresa\n'
+        '27841280831,Francisco Vieira,francisco@exemplo.gov.br,11 9999-0000,Fiscal de Equipamento,SMGCP\n'
+        '26705387890,Antonio Cleber,cleber@exemplo.gov.br,11 9999-1111,Coordenador,Empresa\n'
+    )
+    CRS = (
+        'Cod_CR,Nome_CR,Endereco_CR,Latitude,Longitude,Secretaria_Responsavel,Postos_trab_previstos,'
+        'CPF_Fiscal,Nome_Fiscal,CPF_Coordenador,Nome_Coordenador\n'
+        '900,Prédio Sede,Av. Narciso Yague,"-23,519","-46,185",SMGCP,20,27841280831,,26705387890,\n'
+        ',Linha vazia,,,,,,,,,\n'
+        '901,Almoxarifado,Rua Flaviano,,,SMGCP,,27841280831,,,\n'
+    )
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.diretorio.cleanup)
+        os.mkdir(os.path.join(self.diretorio.name, 'data'))
+        self._escrever('bd_usuarios.csv', self.USUARIOS)
+        self._escrever('bd_cr.csv', self.CRS)
+
+    def _escrever(self, nome, conteudo):
+        with open(os.path.join(self.diretorio.name, 'data', nome), 'w', encoding='utf-8') as f:
+            f.write(conteudo)
+
+    def _carregar(self, *args):
+        with self.settings(BASE_DIR=self.diretorio.name):
+            call_command('carregar_dados_iniciais', '--bulk', '--batch-size=1', *args, stdout=StringIO())
+
+    def test_carga_completa(self):
+        self._carregar('--workers=2')
+        fiscal = PerfilUsuario.objects.get(cpf='27841280831')
+        self.assertEqual(fiscal.user.get_full_name(), 'Francisco Vieira')
+        self.assertTrue(fiscal.user.check_password('27841280831'))
+
+        sede = CentroResponsabilidade.objects.get(pk=900)
+        self.assertEqual(sede.fiscal_padrao, fiscal)
+        self.assertEqual(sede.coordenador.cpf, '26705387890')
+        self.assertAlmostEqual(sede.latitude, -23.519)
+        self.assertEqual(CentroResponsabilidade.objects.get(pk=901).postos_trab_previstos, 0)
+
+    def test_recarga_atualiza_sem_trocar_senha(self):
+        self._carregar('--workers=1')
+        user = User.objects.get(username='27841280831')
+        user.set_password('nova-senha')
+        user.save()
+        caches['auth'].clear()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        self.assertEqual(client.get('/api/me/bootstrap/').json()['user_profile']['user']['last_name'], 'Vieira')
+
+        self._escrever('bd_usuarios.csv', self.USUARIOS.replace('Francisco Vieira', 'Francisco Junior'))
+        self._escrever('bd_cr.csv', self.CRS.replace('Almoxarifado', 'Almoxarifado Central'))
+        self._carregar('--workers=1')
+
+        user.refresh_from_db()
+        self.assertEqual(user.last_name, 'Junior')
+        self.assertTrue(user.check_password('nova-senha'))
+        # O bulk_create não dispara post_save: o comando tira o token do cache
+        self.assertEqual(client.get('/api/me/bootstrap/').json()['user_profile']['user']['last_name'], 'Junior')
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(CentroResponsabilidade.objects.get(pk=901).nome_cr, 'Almoxarifado Central')
+
+    def test_dry_run_nao_grava(self):
+        self._carregar('--dry-run')
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(CentroResponsabilidade.objects.exists())
+
+
+# --- Importação do histórico (BD_Afericoes.csv) ---
+
+class ImportarAfericoesTests(TestCase):
+
+    CABECALHO = (
+        'Cod_Afericao,Data_Afericao,Cod_CR,CPF_Fiscal,Postos_Prev,Postos_Ocup,Postos_Obs,'
+        'Serv_Nota,Mat_Qt_Nota,Mat_Ql_Nota,Mat_Rep_Nota,Mat_Obs,Uso_Maq,Maq_Obs,Uso_EPI,EPI_Obs,Status_Revisao\n'
+    )
+
+    def setUp(self):
+        self.fiscal = criar_perfil('11111111111')
+        criar_cr(900)
+        criar_cr(901)
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.diretorio.cleanup)
+        self.arquivo = os.path.join(self.diretorio.name, 'bd_afericoes.csv')
+
+    def _linha(self, cod_cr, dia, serv_nota='4', cpf='11111111111', data=None):
+        data = data or f'{dia:02d}/11/2025 10:30'
+        return (f'202511{dia:02d}{cod_cr},{data},{cod_cr},{cpf},10,"8,0",,'
+                f'{serv_nota},5,3,2,,sim,,Parcial,"EPI, incompleto",Não\n')
+
+    def _escrever(self, linhas):
+        with open(self.arquivo, 'w', encoding='utf-8') as f:
+            f.write(self.CABECALHO + ''.join(linhas))
+
+    def _importar(self, *args):
+        call_command('importar_afericoes', self.arquivo, '--chunk-size=2', *args, stdout=StringIO())
+
+    def _rejeitados(self):
+        with open(f'{self.arquivo}.rejeitados.csv', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+
+    def test_importa_e_rejeita_linhas_invalidas(self):
+        self._escrever([
+            self._linha(900, 1),
+            self._linha(901, 1, serv_nota='7'),
+            self._linha(902, 1),
+            self._linha(900, 2, cpf='99999999999'),
+            self._linha(900, 3, data='31/02/2025'),
+            self._linha(901, 4),
+            self._linha(900, 5, serv_nota='nan'),
+            self._linha(901, 5, serv_nota='inf'),
+        ])
+        self._importar()
+
+        self.assertEqual(
+            sorted(Afericao.objects.values_list('pk', flat=True)), ['20251101900', '20251104901']
+        )
+        afericao = Afericao.objects.get(pk='20251101900')
+        self.assertEqual(afericao.data_afericao, datetime(2025, 11, 1, 10, 30, tzinfo=SAO_PAULO))
+        self.assertEqual(afericao.postos_ocup, 8)
+        self.assertEqual(afericao.uso_maq, 'Sim')
+        self.assertEqual(afericao.epi_obs, 'EPI, incompleto')
+        self.assertEqual(afericao.desempenho_serv, 80.0)
+        self.assertEqual(afericao.desempenho_mat_rep, 40.0)
+        self.assertEqual(DesempenhoMensal.objects.get(centro_responsabilidade_id=900).qtd_afericoes, 1)
+
+        erros = [linha['Erro'] for linha in self._rejeitados()]
+        self.assertEqual(len(erros), 6)
+        self.assertIn('Serv_Nota fora de 1 a 5', erros[0])
+        self.assertIn('CR inexistente', erros[1])
+        self.assertIn('fiscal não cadastrado', erros[2])
+        self.assertIn('data inválida', erros[3])
+        self.assertIn("Serv_Nota inválido: 'nan'", erros[4])
+        self.assertIn("Serv_Nota inválido: 'inf'", erros[5])
+        self.assertFalse(os.path.exists(f'{self.arquivo}.checkpoint'))
+
+    def test_retoma_apos_interrupcao(self):
+        self._escrever([self._linha(900, dia) for dia in range(1, 7)])
+        original = Command._gravar_bulk_create
+        chamadas = []
+
+        def falhar_no_segundo_lote(comando, lote):
+            chamadas.append(len(lote))
+            if len(chamadas) == 2:
+                raise KeyboardInterrupt
+            return original(comando, lote)
+
+        with mock.patch.object(Command, '_gravar_bulk_create', falhar_no_segundo_lote):
+            with self.assertRaises(KeyboardInterrupt):
+                self._importar()
+        self.assertEqual(Afericao.objects.count(), 2)
+        with open(f'{self.arquivo}.checkpoint') as f:
+            self.assertEqual(f.read(), '2')
+
+        with mock.patch.object(Command, '_gravar_bulk_create', autospec=True, side_effect=original) as gravar:
+            self._importar('--retomar')
+        self.assertEqual(Afericao.objects.count(), 6)
+        self.assertEqual(sum(len(c.args[1]) for c in gravar.call_args_list), 4)
+
+    def test_reimportar_nao_duplica(self):
+        self._escrever([self._linha(900, 1), self._linha(901, 1)])
+        self._importar()
+        self._importar()
+        self.assertEqual(Afericao.objects.count(), 2)
+
+
+# --- Desempenho calculado pelo banco ---
+
+@skipIf(connection.vendor not in ('postgresql', 'sqlite'), 'Gatilho só existe no PostgreSQL e no SQLite')
+class DesempenhoNoBancoTests(TestCase):
+
+    def setUp(self):
+        self.fiscal = criar_perfil('11111111111')
+        self.cr = criar_cr(900, fiscal=self.fiscal)
+        self.afericao = criar_afericao(self.cr, self.fiscal, serv_nota=3, mat_rep_nota=2)
+
+    def _desempenho(self):
+        return Afericao.objects.values_list(
+            'desempenho_serv', 'desempenho_mat_qt', 'desempenho_mat_ql', 'desempenho_mat_rep'
+        ).get(pk=self.afericao.pk)
+
+    def _desativar_gatilho(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('ALTER TABLE afericao_app_afericao DISABLE TRIGGER afericao_desempenho')
+            else:
+                cursor.execute('DROP TRIGGER afericao_desempenho_update')
+
+    def test_calculado_em_qualquer_gravacao(self):
+        self.assertEqual(self._desempenho(), (60.0, 80.0, 80.0, 40.0))
+
+        # QuerySet.update() não passa pelo save()
+        Afericao.objects.filter(pk=self.afericao.pk).update(serv_nota=5, desempenho_mat_qt=0)
+        self.assertEqual(self._desempenho(), (100.0, 80.0, 80.0, 40.0))
+
+        # bulk_create também não, e sem calcular_desempenho() antes
+        Afericao.objects.bulk_create([Afericao(
+            cod_afericao='20251113900', data_afericao=self.afericao.data_afericao + timedelta(days=1),
+            fiscal=self.fiscal, centro_responsabilidade=self.cr, postos_prev=10, postos_ocup=10,
+            serv_nota=1, mat_qt_nota=2, mat_ql_nota=3, mat_rep_nota=4, uso_maq='Não', uso_epi='Sim',
+        )])
+        self.assertEqual(
+            Afericao.objects.values_list('desempenho_serv', 'desempenho_mat_rep').get(pk='20251113900'),
+            (20.0, 80.0),
+        )
+
+    def test_comando_corrige_linhas_antigas(self):
+        self._desativar_gatilho()
+        Afericao.objects.filter(pk=self.afericao.pk).update(desempenho_serv=None, desempenho_mat_rep=99)
+        criar_afericao(self.cr, self.fiscal, data=self.afericao.data_afericao + timedelta(days=1))
+        antes = Afericao.objects.get(pk=self.afericao.pk).atualizado_em
+
+        saida = StringIO()
+        call_command('recalcular_desempenho', '--chunk-size', '1', stdout=saida)
+        self.assertIn('Desempenho recalculado: 1 aferições.', saida.getvalue())
+        self.assertEqual(self._desempenho(), (60.0, 80.0, 80.0, 40.0))
+        self.assertGreater(Afericao.objects.get(pk=self.afericao.pk).atualizado_em, antes)
+        self.assertAlmostEqual(
+            DesempenhoMensal.objects.get(centro_responsabilidade=self.cr).soma_desempenho_serv, 140
+        )
+
+        # Nada divergente: segunda execução não toca nenhuma linha
+        call_command('recalcular_desempenho', stdout=saida)
+        self.assertIn('Desempenho recalculado: 0 aferições.', saida.getvalue())
+
+
+# --- Alertas aos gestores de contrato ---
+
+class AlertasGestorTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.fiscal = criar_perfil('11111111111')
+        self.client.force_authenticate(self.fiscal.user)
+        self.gestor = criar_perfil('22222222222', perfil='Gestor Contrato', nome='Maria Souza')
+        self.gestor.user.email = 'maria@example.com'
+        self.gestor.user.save()
+        self.outro_gestor = criar_perfil('33333333333', perfil='Gestor Contrato', nome='João Lima')
+        self.outro_gestor.user.email = 'joao@example.com'
+        self.outro_gestor.user.save()
+        self.cr = criar_cr(900, fiscal=self.fiscal, gestor_contrato=self.gestor)
+        self.outro_cr = criar_cr(901, fiscal=self.fiscal, gestor_contrato=self.outro_gestor)
+        self.cr_sem_gestor = criar_cr(902, fiscal=self.fiscal)
+
+    def _alertas(self):
+        return sorted(AlertaGestor.objects.values_list('afericao_id', 'motivo', 'status'))
+
+    def test_enfileirado_na_gravacao_sem_enviar(self):
+        response = self.client.post('/api/afericoes/', {
+            'cod_afericao': '20251112900', 'centro_responsabilidade': 900,
+            'data_afericao': '2025-11-12T10:00:00-03:00', 'postos_prev': 10, 'postos_ocup': 7,
+            'serv_nota': 2, 'mat_qt_nota': 4, 'mat_ql_nota': 4, 'mat_rep_nota': 4,
+            'uso_maq': 'Sim', 'uso_epi': 'Sim',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self._alertas(), [
+            ('20251112900', 'falta_postos', 'pendente'),
+            ('20251112900', 'nota_servico', 'pendente'),
+        ])
+        self.assertEqual(mail.outbox, [])
+
+        # CR sem gestor de contrato e aferição sem problema: nada na fila
+        criar_afericao(self.cr_sem_gestor, self.fiscal, serv_nota=1)
+        criar_afericao(self.outro_cr, self.fiscal)
+        self.assertEqual(AlertaGestor.objects.count(), 2)
+
+        # A revisão corrigiu a nota: o alerta ainda não enviado é descartado
+        afericao = Afericao.objects.get(pk='20251112900')
+        afericao.serv_nota = 4
+        afericao.save()
+        self.assertEqual(self._alertas(), [
+            ('20251112900', 'falta_postos', 'pendente'),
+            ('20251112900', 'nota_servico', 'descartado'),
+        ])
+
+    def test_envio_em_lote_enfileira(self):
+        item = {
+            'centro_responsabilidade': 901, 'data_afericao': '2025-11-12T10:00:00-03:00',
+            'postos_prev': 10, 'postos_ocup': 10, 'mat_qt_nota': 4, 'mat_ql_nota': 4,
+            'mat_rep_nota': 4, 'uso_maq': 'Sim', 'uso_epi': 'Sim',
+        }
+        self.client.post('/api/afericoes/lote/', [
+            {**item, 'cod_afericao': '20251112901', 'serv_nota': 1},
+            {**item, 'cod_afericao': '20251113901', 'serv_nota': 5},
+        ], format='json')
+        self.assertEqual(self._alertas(), [('20251112901', 'nota_servico', 'pendente')])
+
+    def test_comando_envia_um_resumo_por_gestor(self):
+        dia = datetime(2025, 11, 12, 10, 0, tzinfo=SAO_PAULO)
+        criar_afericao(self.cr, self.fiscal, data=dia, serv_nota=1, postos_ocup=5)
+        criar_afericao(self.cr, self.fiscal, data=dia + timedelta(days=1), serv_nota=2)
+        criar_afericao(self.outro_cr, self.fiscal, data=dia, postos_ocup=9)
+        sem_email = criar_perfil('44444444444', perfil='Gestor Contrato')
+        criar_afericao(criar_cr(903, gestor_contrato=sem_email), self.fiscal, data=dia, serv_nota=1)
+
+        from .management.commands import enviar_alertas
+        with mock.patch.object(enviar_alertas, 'get_connection', wraps=enviar_alertas.get_connection) as conexao:
+            call_command('enviar_alertas', stdout=StringIO())
+        conexao.assert_called_once()
+
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['joao@example.com', 'maria@example.com'])
+        resumo = next(m for m in mail.outbox if m.to == ['maria@example.com'])
+        self.assertEqual(resumo.subject, '[GALP] 3 alerta(s) de aferição')
+        self.assertIn('Olá, Maria Souza.', resumo.body)
+        self.assertIn('12/11/2025 | 900 - CR 900: Postos ocupados abaixo do previsto (5 de 10 postos ocupados)', resumo.body)
+        self.assertIn('13/11/2025 | 900 - CR 900: Nota de serviço baixa (nota 2 - Ruim)', resumo.body)
+
+        self.assertEqual(AlertaGestor.objects.filter(status='enviado').count(), 4)
+        self.assertEqual(AlertaGestor.objects.get(gestor=sem_email).status, 'descartado')
+
+        # Fila vazia: uma nova execução não envia nada
+        call_command('enviar_alertas', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+
+    @override_settings(ALERTAS_MAX_TENTATIVAS=2)
+    def test_falha_no_envio_volta_para_a_fila(self):
+        criar_afericao(self.cr, self.fiscal, serv_nota=1)
+        with mock.patch('django.core.mail.EmailMessage.send', side_effect=OSError('SMTP fora do ar')):
+            call_command('enviar_alertas', stdout=StringIO())
+            alerta = AlertaGestor.objects.get()
+            self.assertEqual((alerta.status, alerta.tentativas, alerta.ultimo_erro), ('pendente', 1, 'SMTP fora do ar'))
+
+            call_command('enviar_alertas', stdout=StringIO())
+            self.assertEqual(AlertaGestor.objects.get().status, 'falhou')
+
+
+# --- Fechamento das revisões (D+1) ---
+
+class FecharRevisoesTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.fiscal = criar_perfil('11111111111')
+        self.client.force_authenticate(self.fiscal.user)
+        self.cr = criar_cr(900, fiscal=self.fiscal)
+        hoje = timezone.localdate()
+
+        def as_10h(dias_atras):
+            dia = hoje - timedelta(days=dias_atras)
+            return timezone.make_aware(datetime(dia.year, dia.month, dia.day, 10, 0))
+
+        self.antigas = [criar_afericao(self.cr, self.fiscal, data=as_10h(dias)) for dias in (2, 3, 30)]
+        self.ontem = criar_afericao(self.cr, self.fiscal, data=as_10h(1))  # ainda em D+1
+        self.hoje = criar_afericao(self.cr, self.fiscal, data=as_10h(0))
+
+    def test_fecha_apenas_as_vencidas(self):
+        revisada_em = Afericao.objects.get(pk=self.antigas[0].pk).data_ultima_revisao
+        atualizado_em = Afericao.objects.get(pk=self.antigas[0].pk).atualizado_em
+
+        saida = StringIO()
+        call_command('fechar_revisoes', '--chunk-size', '2', stdout=saida)
+        self.assertIn('3 aferições fechadas', saida.getvalue())
+        self.assertEqual(
+            set(Afericao.objects.filter(status_revisao=True).values_list('pk', flat=True)),
+            {a.pk for a in self.antigas},
+        )
+        afericao = Afericao.objects.get(pk=self.antigas[0].pk)
+        self.assertEqual(afericao.data_ultima_revisao, revisada_em)
+        self.assertGreater(afericao.atualizado_em, atualizado_em)
+
+        # Nada mais a fechar: só a busca (vazia) no índice parcial
+        with self.assertNumQueries(1):
+            call_command('fechar_revisoes', stdout=saida)
+
+    def test_api_recusa_edicao_de_afericao_fechada(self):
+        call_command('fechar_revisoes', stdout=StringIO())
+
+        url = f'/api/afericoes/{self.antigas[0].pk}/'
+        response = self.client.patch(url, {'serv_nota': 1}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Afericao.objects.get(pk=self.antigas[0].pk).serv_nota, 4)
+        response = self.client.put(url, {**self.client.get(url).json(), 'serv_nota': 1}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+        # Dentro do prazo: a edição passa, e o app não consegue fechar/reabrir por conta própria
+        url = f'/api/afericoes/{self.ontem.pk}/'
+        response = self.client.patch(url, {'serv_nota': 1, 'status_revisao': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        afericao = Afericao.objects.get(pk=self.ontem.pk)
+        self.assertEqual((afericao.serv_nota, afericao.status_revisao), (1, False))
+
+
+# --- Leituras assíncronas (ASGI) ---
+
+class LeiturasAsyncTests(TestCase):
+    """
+    As views de views_async.py (servidas pelo urls_asgi) precisam responder
+    exatamente como as views síncronas do DRF nos mesmos endereços.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.fiscal = criar_perfil('11111111111')
+        self.token = Token.objects.create(user=self.fiscal.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.async_client = AsyncClient()
+        self.autorizacao = {'Authorization': f'Token {self.token.key}'}
+        cr = criar_cr(900, fiscal=self.fiscal)
+        criar_cr(901)
+        for dia in range(1, 6):
+            criar_afericao(cr, self.fiscal, data=datetime(2025, 11, dia, 10, 0, tzinfo=SAO_PAULO))
+
+    def _async_get(self, url, headers=None):
+        with override_settings(ROOT_URLCONF='galp_project.urls_asgi'):
+            return async_to_sync(self.async_client.get)(url, headers={**self.autorizacao, **(headers or {})})
+
+    def test_mesmas_respostas_que_as_views_sincronas(self):
+        urls = [
+            '/api/centros/',
+            '/api/afericoes/?page_size=2',
+            '/api/afericoes/check_exists/?cr=900&data=2025-11-03',
+            '/api/afericoes/check_exists/?cr=900&data=2025-11-30',
+            '/api/afericoes/check_exists/?cr=900',
+        ]
+        for url in urls:
+            sincrona, assincrona = self.client.get(url), self._async_get(url)
+            self.assertEqual(assincrona.status_code, sincrona.status_code, url)
+            self.assertEqual(assincrona.content, sincrona.content, url)
+            self.assertEqual(assincrona.get('Vary'), sincrona.get('Vary'), url)
+
+        # Os cursores também são os mesmos, nos dois sentidos
+        proxima = self.client.get('/api/afericoes/?page_size=2').json()['next']
+        pagina = self._async_get(proxima)
+        self.assertEqual(pagina.content, self.client.get(proxima).content)
+        anterior = pagina.json()['previous']
+        self.assertEqual(self._async_get(anterior).content, self.client.get(anterior).content)
+        self.assertEqual(self._async_get('/api/afericoes/?cursor=xyz').status_code, 404)
+
+    def test_paginas_com_datas_empatadas(self):
+        # Empates em data_afericao: o cursor desempata por cod_afericao, nos dois sentidos
+        empate = datetime(2025, 11, 3, 10, 0, tzinfo=SAO_PAULO)
+        for cod in range(902, 906):
+            criar_afericao(criar_cr(cod), self.fiscal, data=empate)
+        url, visitadas = '/api/afericoes/?page_size=2', []
+        while url:
+            sincrona, assincrona = self.client.get(url), self._async_get(url)
+            self.assertEqual(assincrona.content, sincrona.content, url)
+            visitadas.append(url)
+            url = sincrona.json()['next']
+        self.assertEqual(len(visitadas), 5)
+        url = sincrona.json()['previous']
+        while url:
+            sincrona, assincrona = self.client.get(url), self._async_get(url)
+            self.assertEqual(assincrona.content, sincrona.content, url)
+            url = sincrona.json()['previous']
+
+    def test_etag_e_autenticacao(self):
+        etag = self._async_get('/api/centros/')['ETag']
+        response = self._async_get('/api/centros/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Vary'], self.client.get('/api/centros/', HTTP_IF_NONE_MATCH=etag)['Vary'])
+
+        # Token ausente, inválido ou malformado: mesmo status, corpo e cabeçalho do DRF
+        inativo = criar_perfil('44444444444')
+        inativo.user.is_active = False
+        inativo.user.save()
+        anonimo, cliente = AsyncClient(), APIClient()
+        autorizacoes = [
+            None, 'Token invalido', 'Token', 'Token a b', 'Bearer x',
+            f'Token {Token.objects.create(user=inativo.user).key}',
+        ]
+        for autorizacao in autorizacoes:
+            headers = {'Authorization': autorizacao} if autorizacao else {}
+            cliente.credentials(**({'HTTP_AUTHORIZATION': autorizacao} if autorizacao else {}))
+            for url in ('/api/centros/', '/api/afericoes/'):
+                sincrona = cliente.get(url)
+                with override_settings(ROOT_URLCONF='galp_project.urls_asgi'):
+                    assincrona = async_to_sync(anonimo.get)(url, headers=headers)
+                self.assertEqual(assincrona.status_code, 401, autorizacao)
+                self.assertEqual(assincrona.status_code, sincrona.status_code, autorizacao)
+                self.assertEqual(assincrona.content, sincrona.content, autorizacao)
+                self.assertEqual(assincrona['WWW-Authenticate'], sincrona['WWW-Authenticate'])
+        self.assertEqual(assincrona.json(), {'detail': 'Usuário inativo ou removido.'})
+
+    def test_escrita_segue_para_a_view_sincrona(self):
+        with override_settings(ROOT_URLCONF='galp_project.urls_asgi'):
+            response = async_to_sync(self.async_client.post)('/api/afericoes/', {
+                'cod_afericao': '20251112901', 'centro_responsabilidade': 901,
+                'data_afericao': '2025-11-12T10:00:00-03:00', 'postos_prev': 10, 'postos_ocup': 10,
+                'serv_nota': 4, 'mat_qt_nota': 4, 'mat_ql_nota': 4, 'mat_rep_nota': 4,
+                'uso_maq': 'Sim', 'uso_epi': 'Sim',
+            }, content_type='application/json', headers=self.autorizacao)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Afericao.objects.filter(pk='20251112901').exists())
+
+
+class BenchmarkHttpTests(TestCase):
+
+    def test_mede_um_servidor_local(self):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                corpo = b'{"exists": true}'
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        servidor = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        self.addCleanup(servidor.shutdown)
+
+        saida = StringIO()
+        call_command(
+            'benchmark_http', f'http://127.0.0.1:{servidor.server_port}/api/x/?a=1',
+            '--concorrencia', '2', '--duracao', '0.3', '--pid', str(os.getpid()), '--json',
+            stdout=saida,
+        )
+        resultado = json.loads(saida.getvalue())
+        self.assertGreater(resultado['requisicoes'], 0)
+        self.assertEqual(resultado['erros'], 0)
+        self.assertGreater(resultado['rss_pico_mb'], 0)
+
+
+class ReplicaRouterTests(TestCase):
+    """
+    Relatórios, exportações e listagens leem da réplica; escritas e as
+    leituras do usuário logo após uma escrita ficam no primário.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.fiscal = criar_perfil('11111111111')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.fiscal.user)
+        cr = criar_cr(900, fiscal=self.fiscal)
+        criar_afericao(cr, self.fiscal)
+        self.router = banco.ReplicaRouter()
+
+    def _fora_da_transacao(self):
+        # O TestCase roda cada teste dentro de uma transação no primário
+        patcher = mock.patch.object(banco, 'transacao_aberta', return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _estado(self, user=None):
+        request = RequestFactory().get('/')
+        request.user = user or self.fiscal.user
+        estado = banco.EstadoRoteamento(request)
+        token = banco._estado.set(estado)
+        self.addCleanup(banco._estado.reset, token)
+        return estado
+
+    @override_settings(DB_REPLICA_ALIAS='replica')
+    def test_escolha_do_banco(self):
+        self._fora_da_transacao()
+        # Fora de uma requisição (comandos, shell) e fora das views marcadas: primário
+        self.assertEqual(self.router.db_for_read(Afericao), 'default')
+        estado = self._estado()
+        self.assertEqual(self.router.db_for_read(Afericao), 'default')
+
+        estado.replica = True
+        self.assertEqual(self.router.db_for_read(Afericao), 'replica')
+        with mock.patch.object(banco, 'transacao_aberta', return_value=True):
+            self.assertEqual(self.router.db_for_read(Afericao), 'default')
+
+        # Depois de uma escrita, a própria requisição volta ao primário
+        self.assertEqual(self.router.db_for_write(Afericao), 'default')
+        self.assertEqual(self.router.db_for_read(Afericao), 'default')
+
+    @override_settings(DB_REPLICA_ALIAS='replica')
+    def test_usuario_fixado_no_primario(self):
+        self._fora_da_transacao()
+        cache.set(banco.CHAVE_FIXACAO.format(user_id=self.fiscal.user.pk), True)
+        self._estado().replica = True
+        self.assertEqual(self.router.db_for_read(Afericao), 'default')
+
+        # Outro usuário continua lendo da réplica
+        self._estado(user=criar_perfil('22222222222').user).replica = True
+        self.assertEqual(self.router.db_for_read(Afericao), 'replica')
+
+    def test_sem_replica_tudo_no_primario(self):
+        self._estado().replica = True
+        self.assertEqual(self.router.db_for_read(Afericao), 'default')
+        self.assertTrue(self.router.allow_migrate('default', 'afericao_app'))
+        self.assertFalse(self.router.allow_migrate('replica', 'afericao_app'))
+
+    def test_views_marcadas(self):
+        marcadas = []
+
+        def db_for_read(router, model, **hints):
+            marcadas.append(banco._estado.get().replica)
+            return 'default'
+
+        with mock.patch.object(banco.ReplicaRouter, 'db_for_read', autospec=True, side_effect=db_for_read):
+            for url in ['/api/afericoes/', '/api/relatorios/desempenho/', '/api/centros/']:
+                marcadas.clear()
+                self.client.get(url)
+                self.assertTrue(marcadas and all(marcadas), url)
+
+            # A exportação fixa o banco antes de começar o streaming
+            with mock.patch('afericao_app.views.alias_leitura', side_effect=lambda: db_for_read(None, None)):
+                marcadas.clear()
+                b''.join(self.client.get('/api/afericoes/export/').streaming_content)
+                self.assertEqual(marcadas, [True])
+
+            marcadas.clear()
+            self.client.get('/api/me/bootstrap/')
+            self.assertTrue(marcadas and not any(marcadas))
+
+    @override_settings(DB_REPLICA_ALIAS='replica', DB_REPLICA_FIXACAO=30)
+    def test_escrita_fixa_o_usuario(self):
+        chave = banco.CHAVE_FIXACAO.format(user_id=self.fiscal.user.pk)
+        with mock.patch.object(banco.ReplicaRouter, 'db_for_read', return_value='default'):
+            self.client.get('/api/afericoes/')
+            self.assertIsNone(cache.get(chave))
+
+            afericao = Afericao.objects.get()
+            response = self.client.patch(f'/api/afericoes/{afericao.pk}/', {'serv_nota': 3}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(cache.get(chave))
+
+    def test_saude_do_banco(self):
+        self.assertEqual(self.client.get('/api/saude/banco/').status_code, 403)
+
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_authenticate(user=staff)
+        dados = self.client.get('/api/saude/banco/').json()
+        self.assertIn('default', dados)
+        self.assertIsNone(dados['default']['pool']) # Sem DB_POOL
+        self.assertIn('conn_max_age', dados['default'])
+
+
+@skipIf('replica' not in connections, "Sem alias 'replica' configurado (DB_REPLICA_HOST)")
+class ReplicaMesmoBancoTests(TransactionTestCase):
+    """
+    Com os dois aliases apontando para o mesmo banco (DB_REPLICA_HOST igual
+    ao DB_HOST), as listagens saem pela conexão da réplica. Os dados são
+    confirmados (TransactionTestCase) para que a outra conexão os veja.
+    """
+    databases = '__all__'
+
+    def test_listagem_pela_replica(self):
+        fiscal = criar_perfil('11111111111')
+        token = Token.objects.create(user=fiscal.user)
+        criar_afericao(criar_cr(900, fiscal=fiscal), fiscal)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = client.get('/api/afericoes/')
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertTrue(any('afericao' in q['sql'] for q in replica.captured_queries))
+
+
+class MetricasTests(TestCase):
+
+    def setUp(self):
+        metricas.limpar()
+        self.addCleanup(metricas.limpar)
+        self.fiscal = criar_perfil('11111111111')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.fiscal.user)
+        criar_afericao(criar_cr(900, fiscal=self.fiscal), self.fiscal)
+
+    def _metrics(self):
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(user=staff)
+        response = client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.content.decode()
+
+    def test_metricas_por_acao_do_viewset(self):
+        self.client.get('/api/afericoes/')
+        self.client.get('/api/afericoes/')
+        self.client.get('/api/afericoes/check_exists/', {'cr': 900, 'data': '2025-11-12'})
+        self.client.get('/api/afericoes/check_exists/')
+        self.client.get('/nao-existe/')
+
+        texto = self._metrics()
+        self.assertIn('galp_http_requisicoes_total{rota="afericoes-list",metodo="GET",status="200"} 2', texto)
+        self.assertIn('galp_http_requisicoes_total{rota="afericoes-check-exists",metodo="GET",status="200"} 1', texto)
+        self.assertIn('galp_http_requisicoes_total{rota="afericoes-check-exists",metodo="GET",status="400"} 1', texto)
+        self.assertIn('galp_http_requisicoes_total{rota="nao_resolvida",metodo="GET",status="404"} 1', texto)
+        self.assertIn('galp_http_duracao_segundos_count{rota="afericoes-list",metodo="GET"} 2', texto)
+        self.assertIn('galp_http_duracao_segundos_bucket{rota="afericoes-list",metodo="GET",le="+Inf"} 2', texto)
+        # check_exists válido faz uma consulta; sem parâmetros, nenhuma
+        self.assertIn('galp_sql_consultas_bucket{rota="afericoes-check-exists",metodo="GET",le="0"} 1', texto)
+        self.assertIn('galp_sql_consultas_bucket{rota="afericoes-check-exists",metodo="GET",le="1"} 2', texto)
+        self.assertIn('galp_http_resposta_bytes_count{rota="afericoes-list",metodo="GET"} 2', texto)
+        self.assertIn('# TYPE galp_sql_duracao_segundos histogram', texto)
+
+    def test_consultas_contadas_no_asgi(self):
+        # No ASGI o ORM roda em threads do sync_to_async, com conexões próprias
+        token = Token.objects.create(user=self.fiscal.user)
+        with override_settings(ROOT_URLCONF='galp_project.urls_asgi'):
+            response = async_to_sync(AsyncClient().get)(
+                '/api/afericoes/', headers={'Authorization': f'Token {token.key}'}
+            )
+        self.assertEqual(response.status_code, 200)
+        serie = metricas.SQL_CONSULTAS.series[('afericoes-list', 'GET')]
+        self.assertEqual(serie[0][0], 0) # nenhuma requisição com 0 consultas
+        self.assertGreater(serie[1], 0)
+        self.assertGreater(metricas.SQL_DURACAO.series[('afericoes-list', 'GET')][1], 0)
+
+    def test_somente_staff(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(APIClient().get('/metrics').status_code, 401)
+
+    def test_histograma_acumula_as_faixas(self):
+        histograma = metricas.Histograma('x', 'X.', ('rota',), (1, 5))
+        for valor in (0.5, 1, 3, 7):
+            histograma.observar(('a"b',), valor)
+        self.assertEqual(histograma.exportar(), [
+            '# HELP x X.', '# TYPE x histogram',
+            'x_bucket{rota="a\\"b",le="1"} 2',
+            'x_bucket{rota="a\\"b",le="5"} 3',
+            'x_bucket{rota="a\\"b",le="+Inf"} 4',
+            'x_sum{rota="a\\"b"} 11.5',
+            'x_count{rota="a\\"b"} 4',
+        ])
+
+
+class DadosSinteticosTests(TestCase):
+
+    def test_gera_massa_plausivel(self):
+        call_command(
+            'gerar_dados_sinteticos', '--centros', '4', '--fiscais', '2', '--coordenadores', '1',
+            '--afericoes', '30', '--chunk-size', '7', stdout=StringIO(),
+        )
+        self.assertEqual(CentroResponsabilidade.objects.count(), 4)
+        self.assertEqual(PerfilUsuario.objects.count(), 4)
+        self.assertEqual(Afericao.objects.count(), 30)
+        # Desempenho (gatilho do banco) e consolidado mensal preenchidos
+        self.assertFalse(Afericao.objects.filter(desempenho_serv__isnull=True).exists())
+        self.assertEqual(
+            sum(DesempenhoMensal.objects.values_list('qtd_afericoes', flat=True)), 30
+        )
+        # Cada fiscal afere os próprios CRs, em dias úteis
+        for afericao in Afericao.objects.select_related('centro_responsabilidade'):
+            self.assertEqual(afericao.fiscal_id, afericao.centro_responsabilidade.fiscal_padrao_id)
+            self.assertLess(timezone.localtime(afericao.data_afericao).weekday(), 5)
+
+        # Uma segunda massa não colide com a primeira
+        call_command(
+            'gerar_dados_sinteticos', '--centros', '2', '--fiscais', '1', '--coordenadores', '0',
+            '--afericoes', '5', '--sem-consolidado', stdout=StringIO(),
+        )
+        self.assertEqual(CentroResponsabilidade.objects.count(), 6)
+        self.assertEqual(Afericao.objects.count(), 35)
+        self.assertTrue(self.client.login(username=User.objects.last().username, password='galp-sintetico'))
+
+    def test_benchmark_e_baseline(self):
+        call_command(
+            'gerar_dados_sinteticos', '--centros', '3', '--fiscais', '1', '--coordenadores', '1',
+            '--afericoes', '10', stdout=StringIO(),
+        )
+        with tempfile.TemporaryDirectory() as pasta:
+            baseline = os.path.join(pasta, 'baseline.json')
+            saida = StringIO()
+            call_command(
+                'benchmark_endpoints', '--repeticoes', '3', '--aquecimento', '1',
+                '--endpoint', 'afericoes-list', '--endpoint', 'afericoes-check-exists',
+                '--salvar-baseline', baseline, '--json', stdout=saida,
+            )
+            resultados = json.loads(saida.getvalue())
+            self.assertEqual(len(resultados), 6) # 2 endpoints x 3 papéis
+            medida = resultados['afericoes-list:fiscal']
+            self.assertEqual(medida['erros'], 0)
+            self.assertGreater(medida['consultas'], 0)
+            self.assertGreater(medida['pico_memoria_kb'], 0)
+
+            # Mais consultas do que na baseline é regressão
+            with open(baseline) as f:
+                dados = json.load(f)
+            dados['afericoes-list:fiscal']['consultas'] = 0
+            with open(baseline, 'w') as f:
+                json.dump(dados, f)
+            with self.assertRaisesMessage(CommandError, 'afericoes-list:fiscal: consultas'):
+                call_command(
+                    'benchmark_endpoints', '--repeticoes', '3', '--endpoint', 'afericoes-list',
+                    '--papel', 'fiscal', '--baseline', baseline, '--tolerancia', '100', stdout=StringIO(),
+                )
+
+
+class AfericaoBuscaTests(TestCase):
+    """Busca textual (?q=) nas observações, com os filtros da listagem."""
+
+    def setUp(self):
+        self.fiscal = criar_perfil('11111111111')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.fiscal.user)
+        cr900, cr901 = criar_cr(900, fiscal=self.fiscal), criar_cr(901)
+        dia = lambda d: datetime(2025, 11, d, 10, 0, tzinfo=SAO_PAULO)
+        criar_afericao(cr900, self.fiscal, data=dia(3), postos_obs='Vazamento no banheiro masculino')
+        criar_afericao(cr900, self.fiscal, data=dia(4), mat_obs='Falta de papel toalha')
+        criar_afericao(cr901, self.fiscal, data=dia(5), epi_obs='Sem luvas; vazamento na copa')
+        criar_afericao(cr901, self.fiscal, data=dia(6), maq_obs='Enceradeira quebrada')
+        # De outro fiscal: fora do escopo
+        outro = criar_perfil('22222222222')
+        criar_afericao(cr901, outro, data=dia(7), postos_obs='Vazamento')
+
+    def _buscar(self, **params):
+        response = self.client.get('/api/afericoes/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_busca_nas_observacoes(self):
+        dados = self._buscar(q='vazamento')
+        self.assertEqual(dados['count'], 2) # Páginas numeradas, com total
+        self.assertEqual([a['cod_afericao'] for a in dados['results']], ['20251105901', '20251103900'])
+
+        # Todas as palavras precisam aparecer
+        self.assertEqual(self._buscar(q='falta papel')['count'], 1)
+        self.assertEqual(self._buscar(q='falta vazamento')['count'], 0)
+        self.assertEqual(self._buscar(q='enceradeira')['results'][0]['cod_afericao'], '20251106901')
+
+    def test_combinada_com_filtros(self):
+        self.assertEqual(self._buscar(q='vazamento', cr=900)['count'], 1)
+        self.assertEqual(self._buscar(q='vazamento', data_inicio='2025-11-04')['count'], 1)
+        self.assertEqual(self._buscar(q='vazamento', data_fim='2025-11-04')['count'], 1)
+
+        # Sem 'q', os filtros valem na listagem por cursor
+        dados = self._buscar(cr=901)
+        self.assertNotIn('count', dados)
+        self.assertEqual(len(dados['results']), 2)
+
+        self.assertEqual(self.client.get('/api/afericoes/', {'cr': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/afericoes/', {'data_inicio': '03/11/2025'}).status_code, 400)
+
+    @skipIf(not (find_spec('psycopg') or find_spec('psycopg2')), 'driver do PostgreSQL não instalado')
+    def test_postgresql_usa_o_vetor_e_ordena_por_relevancia(self):
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            queryset = busca.buscar(Afericao.objects.all(), 'vazamento -copa')
+        self.assertEqual(queryset.query.order_by, ('-relevancia', '-data_afericao', 'cod_afericao'))
+        self.assertIn('relevancia', queryset.query.annotations)
+
+    def test_view_async_igual_a_sincrona(self):
+        token = Token.objects.create(user=self.fiscal.user)
+        for params in ['?cr=900', '?q=vazamento', '?cr=x']:
+            sincrona = self.client.get('/api/afericoes/' + params)
+            with override_settings(ROOT_URLCONF='galp_project.urls_asgi'):
+                assincrona = async_to_sync(AsyncClient().get)(
+                    '/api/afericoes/' + params, headers={'Authorization': f'Token {token.key}'}
+                )
+            self.assertEqual(assincrona.status_code, sincrona.status_code, params)
+            self.assertEqual(assincrona.content, sincrona.content, params)
+
+
+
+class AfericaoFiltrosTests(TestCase):
+    """Filtros declarativos e '?campos=' da listagem de aferições."""
+
+    def setUp(self):
+        self.coordenador = criar_perfil('22222222222', perfil='Coordenador')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.coordenador.user)
+        self.fiscal = criar_perfil('11111111111')
+        self.outro = criar_perfil('33333333333')
+        cr900, cr901 = criar_cr(900, fiscal=self.fiscal), criar_cr(901, secretaria='Saúde')
+        dia = lambda d: datetime(2025, 11, d, 10, 0, tzinfo=SAO_PAULO)
+        criar_afericao(cr900, self.fiscal, data=dia(3), serv_nota=1, uso_epi='Não')
+        criar_afericao(cr900, self.fiscal, data=dia(4), serv_nota=3, uso_maq='Não', status_revisao=True)
+        criar_afericao(cr901, self.outro, data=dia(5), serv_nota=5, uso_epi='Parcial')
+        self.periodo = {'data_inicio': '2025-11-01', 'data_fim': '2025-11-30'}
+
+    def _codigos(self, **params):
+        response = self.client.get('/api/afericoes/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [a['cod_afericao'] for a in response.json()['results']]
+
+    def test_filtros(self):
+        self.assertEqual(self._codigos(fiscal=self.outro.pk), ['20251105901'])
+        self.assertEqual(self._codigos(secretaria='Saúde', **self.periodo), ['20251105901'])
+        self.assertEqual(self._codigos(serv_nota_max=3, **self.periodo), ['20251104900', '20251103900'])
+        self.assertEqual(self._codigos(serv_nota_min=2, serv_nota_max=4, **self.periodo), ['20251104900'])
+        self.assertEqual(self._codigos(uso_epi='Não', **self.periodo), ['20251103900'])
+        self.assertEqual(self._codigos(uso_maq='Não', **self.periodo), ['20251104900'])
+        self.assertEqual(self._codigos(status_revisao='true', **self.periodo), ['20251104900'])
+        self.assertEqual(
+            self._codigos(status_revisao='false', uso_epi='Parcial', **self.periodo), ['20251105901']
+        )
+
+    def test_parametros_invalidos(self):
+        for params in [
+            {'fiscal': 'x'},
+            {'serv_nota_max': 6, **self.periodo},
+            {'serv_nota_min': 4, 'serv_nota_max': 2, **self.periodo},
+            {'uso_epi': 'Talvez', **self.periodo},
+            {'data_inicio': '2025-11-10', 'data_fim': '2025-11-01'},
+        ]:
+            response = self.client.get('/api/afericoes/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_filtros_amplos_exigem_periodo_limitado(self):
+        response = self.client.get('/api/afericoes/', {'uso_epi': 'Não'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('data_inicio', response.json())
+        with override_settings(AFERICOES_FILTRO_MAX_DIAS=10):
+            self.assertEqual(self.client.get('/api/afericoes/', {'uso_epi': 'Não', **self.periodo}).status_code, 400)
+            self.assertEqual(
+                self._codigos(uso_epi='Não', data_inicio='2025-11-01', data_fim='2025-11-10'), ['20251103900']
+            )
+
+        # Filtros seletivos (CR, fiscal, período) não exigem nada
+        self.assertEqual(len(self._codigos(cr=900)), 2)
+
+        # A equipe (staff) pode consultar todo o histórico
+        self.coordenador.user.is_staff = True
+        self.coordenador.user.save()
+        self.assertEqual(self._codigos(uso_epi='Não'), ['20251103900'])
+
+    def test_campos(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/afericoes/', {'campos': 'cod_afericao,serv_nota'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0], {'cod_afericao': '20251105901', 'serv_nota': 5})
+        # Sem o fiscal e o CR na resposta, o SELECT não faz JOIN
+        sql = next(q['sql'] for q in ctx.captured_queries if 'afericao_app_afericao' in q['sql'])
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('postos_obs', sql)
+
+        dados = self.client.get('/api/afericoes/', {'campos': 'cod_afericao,fiscal'}).json()
+        self.assertEqual(dados['results'][-1], {'cod_afericao': '20251103900', 'fiscal': 'Fiscal Teste'})
+        self.assertEqual(self.client.get('/api/afericoes/', {'campos': 'senha'}).status_code, 400)
+
+    def test_view_async_igual_a_sincrona(self):
+        token = Token.objects.create(user=self.coordenador.user)
+        for params in ['?uso_epi=Não', '?uso_epi=Não&data_inicio=2025-11-01', '?campos=cod_afericao,fiscal']:
+            sincrona = self.client.get('/api/afericoes/' + params)
+            with override_settings(ROOT_URLCONF='galp_project.urls_asgi'):
+                assincrona = async_to_sync(AsyncClient().get)(
+                    '/api/afericoes/' + params, headers={'Authorization': f'Token {token.key}'}
+                )
+            self.assertEqual(assincrona.status_code, sincrona.status_code, params)
+            self.assertEqual(assincrona.content, sincrona.content, params)
+
+
+class AfericaoLeituraRapidaTests(TestCase):
+    """A leitura rápida (leitura.py) tem a mesma saída dos serializers."""
+
+    def setUp(self):
+        self.coordenador = criar_perfil('22222222222', perfil='Coordenador')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.coordenador.user)
+        fiscais = [
+            criar_perfil('11111111111', nome='Francisco Vieira'),
+            criar_perfil('33333333333', nome=''), # Sem nome: exibe o username
+            criar_perfil('44444444444', nome='Maria'),
+        ]
+        crs = [criar_cr(900 + i) for i in range(3)]
+        for i in range(9):
+            criar_afericao(
+                crs[i % 3], fiscais[i % 3],
+                data=datetime(2025, 11, 1 + i, 7 + i, 30, 15, 123456, tzinfo=SAO_PAULO),
+                serv_nota=1 + i % 5,
+                data_ultima_revisao=timezone.now() if i % 2 else None,
+                postos_obs='Falta' if i % 3 else None,
+                uso_epi=['Sim', 'Parcial', 'Não'][i % 3],
+            )
+        self.queryset = Afericao.objects.order_by('-data_afericao', 'cod_afericao')
+
+    def test_lista_igual_ao_serializer(self):
+        for fuso in ['America/Sao_Paulo', 'UTC']:
+            with self.subTest(fuso=fuso), override_settings(TIME_ZONE=fuso):
+                esperado = AfericaoListSerializer(self.queryset, many=True).data
+                rapida = leitura.representar_lista(leitura.valores_lista(self.queryset))
+                self.assertEqual(json.dumps(rapida), json.dumps(esperado))
+
+        campos = ['serv_nota', 'fiscal']
+        esperado = AfericaoListSerializer(self.queryset, many=True, campos=campos).data
+        rapida = leitura.representar_lista(leitura.valores_lista(self.queryset, campos), campos)
+        self.assertEqual(json.dumps(rapida), json.dumps(esperado))
+
+    def test_detalhe_igual_ao_serializer(self):
+        for afericao in self.queryset:
+            esperado = AfericaoDetailSerializer(afericao).data
+            response = self.client.get(f'/api/afericoes/{afericao.pk}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, JSONRenderer().render(esperado))
+        self.assertEqual(self.client.get('/api/afericoes/19990101900/').status_code, 404)
+
+    def test_benchmark(self):
+        saida = StringIO()
+        call_command('benchmark_serializacao', '--linhas', '5', '--repeticoes', '2', stdout=saida)
+        self.assertIn('leitura rápida', saida.getvalue())
+        Afericao.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command('benchmark_serializacao', stdout=StringIO())
+
+    def test_endpoint_igual_ao_serializer(self):
+        dados = self.client.get('/api/afericoes/').json()
+        esperado = json.loads(json.dumps(AfericaoListSerializer(self.queryset, many=True).data))
+        self.assertEqual(dados['results'], esperado)
+
+        # Fiscal: continua vendo só as suas, também no detalhe
+        fiscal = PerfilUsuario.objects.get(cpf='11111111111')
+        self.client.force_authenticate(user=fiscal.user)
+        self.assertEqual(len(self.client.get('/api/afericoes/').json()['results']), 3)
+        outra = Afericao.objects.exclude(fiscal=fiscal).first()
+        self.assertEqual(self.client.get(f'/api/afericoes/{outra.pk}/').status_code, 404)
+
+
+class RespostasTests(TestCase):
+    """Renderização com o orjson, compressão (gzip/brotli) e MessagePack."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.coordenador = criar_perfil('22222222222', perfil='Coordenador')
+        self.client.force_authenticate(user=self.coordenador.user)
+        fiscal = criar_perfil('11111111111', nome='Francisco Vieira')
+        for cod_cr in range(900, 960):
+            cr = criar_cr(cod_cr, fiscal=fiscal)
+            criar_afericao(cr, fiscal, postos_obs='Limpeza ótima — sem observações')
+
+    @skipIf(renderers.orjson is None, 'orjson não instalado')
+    def test_orjson_igual_ao_json_do_drf(self):
+        dados = {
+            'texto': 'Ação ção     "aspas" \\ \n',
+            'numeros': [1, -2.5, 80.0, 1 / 3, 10 ** 20],
+            'decimal': Decimal('12.50'),
+            'datas': [
+                datetime(2025, 11, 12, 10, 0, 0, 123456, tzinfo=SAO_PAULO),
+                datetime(2025, 11, 12, 13, 0, tzinfo=ZoneInfo('UTC')),
+            ],
+            'dia': date(2025, 11, 12),
+            'erro': ErrorDetail('Obrigatório.', code='required'),
+            'traduzivel': gettext_lazy('Não encontrado.'),
+            1: None,
+            'aninhado': {'lista': [True, False, None, {}]},
+        }
+        self.assertEqual(renderers.ORJSONRenderer().render(dados), JSONRenderer().render(dados))
+        # Com 'indent' (API navegável), usa o JSON do DRF
+        self.assertEqual(
+            renderers.ORJSONRenderer().render(dados, 'application/json; indent=2'),
+            JSONRenderer().render(dados, 'application/json; indent=2'),
+        )
+
+    @skipIf(renderers.orjson is None, 'orjson não instalado')
+    def test_orjson_recusa_nan_como_o_drf(self):
+        for valor in (float('nan'), float('inf'), -float('inf'), Decimal('NaN')):
+            dados = {'results': [{'lat': -23.5, 'nota': valor}]}
+            with self.subTest(valor=valor):
+                with self.assertRaises(ValueError) as esperado:
+                    JSONRenderer().render(dados)
+                with self.assertRaises(ValueError) as recebido:
+                    renderers.ORJSONRenderer().render(dados)
+                self.assertEqual(str(recebido.exception), str(esperado.exception))
+        # Expoentes no formato do Python ('1e+16', '1e-05'), não no do orjson
+        dados = {'numeros': [1e16, -2.5e300, 1e-05, 5e-324, 0.0001, 0.0, -0.0, Decimal('1E+20')]}
+        self.assertEqual(renderers.ORJSONRenderer().render(dados), JSONRenderer().render(dados))
+
+    def test_parser(self):
+        response = self.client.post('/api/afericoes/lote/', '[{"cod_afericao": "x"', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/afericoes/lote/', '[]', content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_aceita(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip;q=0.5, br;q=0, deflate')
+        self.assertTrue(compressao.aceita(request, 'gzip'))
+        self.assertFalse(compressao.aceita(request, 'br'))
+        self.assertTrue(compressao.aceita(request, 'deflate'))
+        self.assertTrue(compressao.aceita(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='*'), 'br'))
+        self.assertFalse(compressao.aceita(RequestFactory().get('/'), 'gzip'))
+
+    def test_gzip_por_tamanho(self):
+        normal = self.client.get('/api/afericoes/', {'page_size': 60})
+        self.assertNotIn('Content-Encoding', normal)
+
+        with mock.patch.object(compressao, 'brotli', None):
+            response = self.client.get('/api/afericoes/', {'page_size': 60}, HTTP_ACCEPT_ENCODING='gzip, br')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertIn('Accept-Encoding', response['Vary'])
+            self.assertEqual(gzip.decompress(response.content), normal.content)
+            self.assertLess(len(response.content), len(normal.content) / 5)
+
+            # Resposta grande: nível mais leve, mesmo conteúdo
+            with override_settings(COMPRESSAO_GRANDE_BYTES=1024):
+                grande = self.client.get('/api/afericoes/', {'page_size': 60}, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(gzip.decompress(grande.content), normal.content)
+
+            # Pequena demais para compensar
+            response = self.client.get('/api/afericoes/', {'page_size': 1}, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertNotIn('Content-Encoding', response)
+
+    @skipIf(compressao.brotli is None, 'brotli não instalado')
+    def test_brotli(self):
+        normal = self.client.get('/api/centros/')
+        response = self.client.get('/api/centros/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(compressao.brotli.decompress(response.content), normal.content)
+        # O ETag fica fraco e continua valendo para o 304
+        self.assertTrue(response['ETag'].startswith('W/'))
+        revalidacao = self.client.get('/api/centros/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidacao.status_code, 304)
+
+    @skipIf(renderers.msgpack is None, 'msgpack não instalado')
+    def test_messagepack(self):
+        json_ = self.client.get('/api/afericoes/')
+        response = self.client.get('/api/afericoes/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(renderers.msgpack.unpackb(response.content), json_.json())
+        self.assertLess(len(response.content), len(json_.content))
+
+        # CRs: cada formato tem o seu ETag
+        centros = self.client.get('/api/centros/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(renderers.msgpack.unpackb(centros.content), self.client.get('/api/centros/').json())
+        self.assertNotEqual(centros['ETag'], self.client.get('/api/centros/')['ETag'])
+        self.assertIn('Accept', centros['Vary'])
+
+        # Envio em lote em MessagePack
+        response = self.client.post(
+            '/api/afericoes/lote/', renderers.msgpack.packb([]), content_type='application/msgpack'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        # No ASGI, o pedido em MessagePack segue para a view síncrona
+        token = Token.objects.create(user=self.coordenador.user)
+        with override_settings(ROOT_URLCONF='galp_project.urls_asgi'):
+            assincrona = async_to_sync(AsyncClient().get)('/api/afericoes/', headers={
+                'Authorization': f'Token {token.key}', 'Accept': 'application/msgpack',
+            })
+        self.assertEqual(assincrona['Content-Type'], 'application/msgpack')
+        self.assertEqual(renderers.msgpack.unpackb(assincrona.content), json_.json())
+
+    def test_benchmark(self):
+        saida = StringIO()
+        call_command('benchmark_respostas', '--linhas', '20', '--repeticoes', '2', stdout=saida)
+        self.assertIn('gzip', saida.getvalue())
@@ -10,9 +10,12 @@ router = DefaultRouter()
 # 2. Registra nossos ViewSets. O DRF cuidará de criar as rotas
 # (ex: GET, POST, PUT, DELETE) automaticamente.
 # '/api/centros/' -> CentroResponsabilidadeViewSet
-router.register(r'centros', views.CentroResponsabilidadeViewSet)
+# (o basename nomeia as rotas: 'centros-list', 'centros-proximos'...)
+router.register(r'centros', views.CentroResponsabilidadeViewSet, basename='centros')
 # '/api/afericoes/' -> AfericaoViewSet
-router.register(r'afericoes', views.AfericaoViewSet)
+router.register(r'afericoes', views.AfericaoViewSet, basename='afericoes')
+# '/api/relatorios/desempenho/' -> RelatorioDesempenhoViewSet
+router.register(r'relatorios/desempenho', views.RelatorioDesempenhoViewSet, basename='relatorio-desempenho')
 
 # 3. Define as URLs do app
 urlpatterns = [
@@ -22,4 +25,18 @@ urlpatterns = [
     # Adiciona nossa URL de login customizada
     # '/api/login/' -> CustomAuthToken
     path('login/', views.CustomAuthToken.as_view(), name='api_login'),
+    # '/api/logout/' -> LogoutView (invalida o token)
+    path('logout/', views.LogoutView.as_view(), name='api_logout'),
+
+    # Tudo o que o app precisa após o login, em uma requisição
+    # '/api/me/bootstrap/' -> BootstrapView
+    path('me/bootstrap/', views.BootstrapView.as_view(), name='api_bootstrap'),
+
+    # Sincronização incremental dos apps de campo
+    # '/api/sync/?since=<token>' -> SyncView
+    path('sync/', views.SyncView.as_view(), name='api_sync'),
+
+    # Conexões e pool do banco (somente staff)
+    # '/api/saude/banco/' -> SaudeBancoView
+    path('saude/banco/', views.SaudeBancoView.as_view(), name='api_saude_banco'),
 ]
\ No newline at end of file
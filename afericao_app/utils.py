@@ -0,0 +1,67 @@
+# /opt/galp-backend/afericao_app/utils.py
+
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def intervalo_local(data_inicio, data_fim=None):
+    """
+    Converte datas do calendário local (America/Sao_Paulo, o TIME_ZONE do
+    projeto) em um intervalo semiaberto [inicio, fim) de timestamps.
+
+    Filtrar 'data_afericao__gte=inicio, data_afericao__lt=fim' compara a
+    coluna diretamente, então o banco pode usar os índices dela. Já
+    'data_afericao__date=...' envolve a coluna em uma conversão de fuso e
+    obriga uma varredura completa.
+
+    'data_fim' é inclusiva; se omitida, o intervalo cobre só 'data_inicio'.
+    """
+    data_fim = data_fim or data_inicio
+    fuso = timezone.get_default_timezone()
+    inicio = timezone.make_aware(datetime.combine(data_inicio, time.min), fuso)
+    fim = timezone.make_aware(datetime.combine(data_fim + timedelta(days=1), time.min), fuso)
+    return inicio, fim
+
+
+def mes_local(data_hora):
+    """Primeiro dia do mês (no fuso local) a que um timestamp pertence."""
+    return timezone.localdate(data_hora).replace(day=1)
+
+
+def intervalo_mes(mes):
+    """Intervalo [inicio, fim) de timestamps que cobre o mês de 'mes'."""
+    mes = mes.replace(day=1)
+    proximo_mes = (mes + timedelta(days=32)).replace(day=1)
+    return intervalo_local(mes, proximo_mes - timedelta(days=1))
+
+
+def float_br(s):
+    """
+    Converte um número no formato brasileiro ('1.234,56') para float.
+    Devolve None para valores vazios e levanta ValueError se for inválido.
+    """
+    if s is None:
+        return None
+    s_cleaned = s.strip()                    # 1. Remove espaços
+    if not s_cleaned:
+        return None
+    s_cleaned = s_cleaned.replace('.', '')   # 2. Remove separador de milhar
+    s_cleaned = s_cleaned.replace(',', '.')  # 3. Troca vírgula decimal por ponto
+    return float(s_cleaned)
+
+
+# --- Processos filhos (ProcessPoolExecutor com 'spawn') ---
+# O filho importa este módulo para achar as funções: ele não pode importar
+# modelos, que exigem o django.setup() feito pelo inicializador.
+
+def inicializar_worker():
+    """Prepara o Django em um processo filho."""
+    import django
+    django.setup()
+
+
+def hash_senha(senha):
+    """make_password em um processo filho: o PBKDF2 é puro CPU."""
+    from django.contrib.auth.hashers import make_password
+    return make_password(senha)
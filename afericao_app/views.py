@@ -1,19 +1,137 @@
 # /opt/galp-backend/afericao_app/views.py
 
-from rest_framework import viewsets, permissions, decorators
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework import viewsets, mixins, permissions, decorators
+from rest_framework.generics import get_object_or_404
+from rest_framework.views import APIView
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
-from .models import CentroResponsabilidade, Afericao, PerfilUsuario
+from . import busca
+from . import exportacao
+from . import geo
+from . import leitura
+from . import metricas
+from .authentication import get_perfil
+from .banco import alias_leitura, estatisticas_conexoes, leitura_na_replica
+from .cache import invalidar_afericoes, lista_centros, mapa_centros, versao_afericoes, versao_centros
+from .models import (
+    CentroResponsabilidade, Afericao, PerfilUsuario, DesempenhoMensal, RegistroExclusao, AlertaGestor
+)
+from .pagination import AfericaoBuscaPagination, AfericaoCursorPagination, pagina_por_chave
+from .renderers import LEITORES_BINARIOS, RENDERIZADORES_BINARIOS
+from .utils import intervalo_local, mes_local
 from .serializers import (
     CentroResponsabilidadeSerializer,
     AfericaoCreateSerializer,
+    AfericaoLoteItemSerializer,
     AfericaoListSerializer,
+    AfericaoFiltroSerializer,
     AfericaoDetailSerializer,
-    PerfilUsuarioSerializer
+    PerfilUsuarioSerializer,
+    DesempenhoMensalSerializer
 )
 
+# --- Escopo de aferições por perfil ---
+
+def afericoes_visiveis(request):
+    """
+    Aferições que o usuário logado pode ver: o Fiscal vê apenas as suas.
+    (Futuramente, Coordenadores/Gestores poderão ver todas)
+
+    O 'select_related' carrega fiscal (com o User) e CR no mesmo SELECT,
+    já que os serializers exibem o '__str__' de ambos. Assim a listagem
+    custa um número fixo de consultas, independente do número de linhas.
+    """
+    queryset = Afericao.objects.select_related(
+        'fiscal__user',
+        'centro_responsabilidade',
+    ).defer('busca').order_by('-data_afericao') # 'busca' só serve ao WHERE da busca
+
+    perfil = get_perfil(request)
+    if perfil is None:
+        # Se for um superuser ou alguém sem perfil, retorna vazio por segurança
+        return Afericao.objects.none()
+    if perfil.perfil == 'Fiscal de Equipamento':
+        # Fiscal vê apenas as suas aferições
+        return queryset.filter(fiscal=perfil)
+
+    # Padrão: Coordenadores/Gestores (a ser implementado) veem tudo
+    return queryset
+
+
+def exclusoes_visiveis(request):
+    """
+    Registros de exclusão no mesmo escopo de 'afericoes_visiveis': o
+    Fiscal só recebe as exclusões das suas aferições (as de CR valem para
+    todos, já que todos veem a lista de CRs).
+    """
+    queryset = RegistroExclusao.objects.all()
+    perfil = get_perfil(request)
+    if perfil is None:
+        return queryset.exclude(modelo='afericao')
+    if perfil.perfil == 'Fiscal de Equipamento':
+        return queryset.filter(~Q(modelo='afericao') | Q(fiscal=perfil))
+    return queryset
+
+
+def filtrar_afericoes(queryset, params, staff=False, limitar_periodo=True):
+    """
+    Filtros opcionais da listagem e da exportação (ver AfericaoFiltroSerializer):
+    'cr', 'secretaria', 'fiscal', 'data_inicio' e 'data_fim' (YYYY-MM-DD,
+    inclusivas, no fuso local), 'serv_nota_min'/'serv_nota_max', 'uso_epi',
+    'uso_maq' e 'status_revisao'.
+    Levanta ValidationError (400) se algum é inválido ou, com
+    'limitar_periodo' (listagem), se a consulta não tem o período exigido
+    para quem não é staff.
+    """
+    filtro = AfericaoFiltroSerializer(
+        data=params.dict(), context={'staff': staff, 'limitar_periodo': limitar_periodo}
+    )
+    filtro.is_valid(raise_exception=True)
+    dados = filtro.validated_data
+
+    queryset = queryset.filter(**{
+        AfericaoFiltroSerializer.LOOKUPS[nome]: valor
+        for nome, valor in dados.items() if nome in AfericaoFiltroSerializer.LOOKUPS
+    })
+    if 'data_inicio' in dados:
+        inicio, _ = intervalo_local(dados['data_inicio'])
+        queryset = queryset.filter(data_afericao__gte=inicio)
+    if 'data_fim' in dados:
+        _, fim = intervalo_local(dados['data_fim'])
+        queryset = queryset.filter(data_afericao__lt=fim)
+    return queryset
+
+
+def campos_listagem(params):
+    """
+    '?campos=cod_afericao,data_afericao,serv_nota': a listagem devolve só
+    estes campos (ver AfericaoListSerializer.Meta.fields) e o SELECT lê só
+    as colunas e faz só os JOINs que eles pedem (ver leitura.py).
+    Devolve a lista de campos (None = todos).
+    """
+    if not params.get('campos'):
+        return None
+    campos = [campo.strip() for campo in params['campos'].split(',') if campo.strip()]
+    invalidos = [campo for campo in campos if campo not in AfericaoListSerializer.Meta.fields]
+    if invalidos or not campos:
+        raise ValidationError({'campos': f"Use entre: {', '.join(AfericaoListSerializer.Meta.fields)}."})
+    return campos
+
 # --- 1. View de Autenticação (Login) ---
 
 class CustomAuthToken(ObtainAuthToken):
@@ -45,6 +163,18 @@ class CustomAuthToken(ObtainAuthToken):
             'user_profile': perfil_data
         })
 
+class LogoutView(APIView):
+    """
+    Endpoint de logout: apaga o token do usuário, que deixa de valer
+    imediatamente (inclusive no cache de autenticação).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        if isinstance(request.auth, Token):
+            request.auth.delete()
+        return Response(status=204)
+
 # --- 2. ViewSet para Centros de Responsabilidade ---
 
 class CentroResponsabilidadeViewSet(viewsets.ReadOnlyModelViewSet):
@@ -54,9 +184,117 @@ class CentroResponsabilidadeViewSet(viewsets.ReadOnlyModelViewSet):
     
     O frontend usará isso para mostrar a lista de locais para o fiscal.
     """
-    queryset = CentroResponsabilidade.objects.all().order_by('nome_cr')
+    # 'select_related' traz o fiscal padrão e o User dele no mesmo SELECT,
+    # evitando uma consulta extra por CR ao renderizar 'fiscal_padrao'.
+    queryset = (
+        CentroResponsabilidade.objects
+        .select_related('fiscal_padrao__user')
+        .order_by('nome_cr')
+    )
     serializer_class = CentroResponsabilidadeSerializer
     permission_classes = [permissions.IsAuthenticated] # Só usuários logados podem ver
+    # JSON ou, com 'Accept: application/msgpack', MessagePack (ver renderers.py)
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + RENDERIZADORES_BINARIOS
+
+    @leitura_na_replica
+    def list(self, request, *args, **kwargs):
+        """
+        A lista é a mesma para todos e muda pouco: fica em cache sob uma
+        versão invalidada pelos sinais de CR/Perfil/User (ver signals.py).
+
+        A versão vira um ETag forte. Se o app envia 'If-None-Match' com a
+        versão atual, responde 304 sem consultar o banco nem serializar.
+        Cada formato (JSON, MessagePack, ...) tem o seu ETag.
+        """
+        versao = versao_centros()
+        formato = request.accepted_renderer.format
+        etag = quote_etag(f"centros-{versao['versao']}" + ('' if formato == 'json' else f'-{formato}'))
+        last_modified = int(versao['modificado_em'])
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            dados = lista_centros(
+                versao,
+                lambda: self.get_serializer(self.filter_queryset(self.get_queryset()), many=True).data,
+            )
+            response = Response(dados)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Dados autenticados: o navegador pode guardar, mas sempre revalida
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    @decorators.action(detail=False, methods=['get'])
+    def proximos(self, request):
+        """
+        Os 'k' CRs mais próximos de um ponto, com a distância em km.
+        Parâmetros: 'lat', 'lon' (graus decimais) e 'k' (opcional).
+
+        A busca usa um índice em grade mantido em memória (ver geo.py),
+        então não consulta o banco nem calcula a distância de todos os CRs.
+        """
+        try:
+            lat = float(request.query_params['lat'])
+            lon = float(request.query_params['lon'])
+            k = int(request.query_params.get('k', settings.CENTROS_PROXIMOS_K))
+        except (KeyError, ValueError):
+            return Response(
+                {"error": "Parâmetros 'lat' e 'lon' são obrigatórios e numéricos; 'k' deve ser inteiro."},
+                status=400
+            )
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return Response({"error": "Coordenadas fora da faixa válida."}, status=400)
+        if not 1 <= k <= settings.CENTROS_PROXIMOS_MAX_K:
+            return Response(
+                {"error": f"Parâmetro 'k' deve estar entre 1 e {settings.CENTROS_PROXIMOS_MAX_K}."},
+                status=400
+            )
+
+        return Response([
+            {**dados, 'distancia_km': round(distancia, 3)}
+            for distancia, dados in geo.indice_centros().proximos(lat, lon, k)
+        ])
+
+    @decorators.action(detail=False, methods=['get'])
+    def mapa(self, request):
+        """
+        CRs agrupados para o mapa dos coordenadores/gestores, coloridos pelo
+        desempenho da última aferição de cada CR.
+        Parâmetros: 'zoom' (0 a 20) e 'bbox' (oeste,sul,leste,norte).
+
+        Os grupos de cada zoom são calculados uma vez para o mapa inteiro e
+        ficam em cache (ver cache.mapa_centros); o 'bbox' só recorta esse
+        resultado, então arrastar o mapa não consulta o banco.
+        """
+        perfil = get_perfil(request)
+        if perfil is None or perfil.perfil == 'Fiscal de Equipamento':
+            raise PermissionDenied("Mapa disponível apenas para coordenadores e gestores.")
+
+        try:
+            zoom = int(request.query_params['zoom'])
+            oeste, sul, leste, norte = (float(v) for v in request.query_params['bbox'].split(','))
+        except (KeyError, ValueError):
+            return Response(
+                {"error": "Parâmetros 'zoom' (inteiro) e 'bbox' (oeste,sul,leste,norte) são obrigatórios."},
+                status=400
+            )
+        if not 0 <= zoom <= geo.ZOOM_MAX:
+            return Response({"error": f"Parâmetro 'zoom' deve estar entre 0 e {geo.ZOOM_MAX}."}, status=400)
+        if not (sul <= norte and oeste <= leste):
+            return Response({"error": "Parâmetro 'bbox' inválido."}, status=400)
+
+        clusters = mapa_centros(
+            zoom, lambda: geo.agrupar(mapa_centros('pontos', geo.pontos_mapa), zoom)
+        )
+        return Response({
+            'zoom': zoom,
+            'clusters': [
+                c for c in clusters
+                if sul <= c['latitude'] <= norte and oeste <= c['longitude'] <= leste
+            ],
+        })
 
 # --- 3. ViewSet para Aferições ---
 
@@ -66,6 +304,37 @@ class AfericaoViewSet(viewsets.ModelViewSet):
     """
     queryset = Afericao.objects.all().order_by('-data_afericao')
     permission_classes = [permissions.IsAuthenticated] # Só usuários logados
+    pagination_class = AfericaoCursorPagination # Paginação por cursor na listagem
+    # JSON ou MessagePack, nas respostas e nos envios (ver renderers.py)
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + RENDERIZADORES_BINARIOS
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES + LEITORES_BINARIOS
+
+    @leitura_na_replica
+    def list(self, request, *args, **kwargs):
+        """
+        Listagem paginada por cursor. Aceita os filtros de 'filtrar_afericoes',
+        'campos' (ver 'campos_listagem') e 'q', a busca textual nas observações
+        (ver busca.py): com ela, os resultados vêm por relevância, em páginas
+        numeradas.
+        """
+        queryset = filtrar_afericoes(self.get_queryset(), request.query_params, request.user.is_staff)
+        campos = campos_listagem(request.query_params)
+
+        texto = request.query_params.get('q', '').strip()
+        if texto:
+            queryset = busca.buscar(queryset, texto)
+            self.pagination_class = AfericaoBuscaPagination
+
+        # Leitura rápida: dicionários no formato do AfericaoListSerializer
+        page = self.paginate_queryset(leitura.valores_lista(queryset, campos))
+        return self.get_paginated_response(leitura.representar_lista(page, campos))
+
+    def retrieve(self, request, *args, **kwargs):
+        """Detalhe pela leitura rápida, no formato do AfericaoDetailSerializer."""
+        linha = get_object_or_404(
+            leitura.valores_detalhe(self.get_queryset()), pk=kwargs[self.lookup_url_kwarg or self.lookup_field]
+        )
+        return Response(leitura.representar_detalhe(linha))
 
     @decorators.action(detail=False, methods=['get'])
     def check_exists(self, request):
@@ -81,14 +350,174 @@ class AfericaoViewSet(viewsets.ModelViewSet):
                 status=400
             )
 
-        # Filtra pela data (ignorando a hora)
+        try:
+            cod_cr = int(cod_cr)
+            data = date.fromisoformat(data_str)
+        except ValueError:
+            return Response(
+                {"error": "Parâmetros inválidos: 'cr' deve ser numérico e 'data' no formato YYYY-MM-DD."},
+                status=400
+            )
+
+        # Filtra pelo dia inteiro no fuso local, como intervalo [início, fim).
+        # Assim o índice (centro_responsabilidade, data_afericao) é usado.
+        inicio, fim = intervalo_local(data)
         exists = Afericao.objects.filter(
-            centro_responsabilidade__cod_cr=cod_cr,
-            data_afericao__date=data_str
+            centro_responsabilidade_id=cod_cr,
+            data_afericao__gte=inicio,
+            data_afericao__lt=fim,
         ).exists()
 
         return Response({"exists": exists})
 
+    @decorators.action(detail=False, methods=['get'])
+    @leitura_na_replica
+    def export(self, request):
+        """
+        Exporta as aferições (CSV ou XLSX) para auditoria de contratos.
+
+        Respeita o mesmo escopo do 'get_queryset' (o fiscal exporta só as
+        suas). Parâmetros opcionais: 'formato' (csv | xlsx) e os filtros da
+        listagem ('filtrar_afericoes').
+
+        As linhas são lidas em lotes por um cursor no servidor e enviadas
+        conforme são geradas, então a memória fica constante mesmo para
+        milhões de linhas.
+        """
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in ('csv', 'xlsx'):
+            return Response({"error": "Parâmetro 'formato' deve ser 'csv' ou 'xlsx'."}, status=400)
+        if formato == 'xlsx' and exportacao.Workbook is None:
+            return Response({"error": "Exportação em XLSX indisponível (openpyxl não instalado)."}, status=400)
+
+        # As linhas são lidas depois que a view retorna: fixa o banco agora
+        # Sem o limite de período da listagem: a exportação é em streaming
+        queryset = filtrar_afericoes(
+            self.get_queryset().using(alias_leitura()), request.query_params, request.user.is_staff,
+            limitar_periodo=False,
+        )
+
+        nome_arquivo = f"afericoes_{timezone.localdate():%Y%m%d}.{formato}"
+        if formato == 'xlsx':
+            return FileResponse(
+                exportacao.gerar_xlsx(queryset),
+                as_attachment=True,
+                filename=nome_arquivo,
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            )
+
+        response = StreamingHttpResponse(
+            exportacao.gerar_csv(queryset),
+            content_type='text/csv; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+        return response
+
+    @decorators.action(detail=False, methods=['post'])
+    def lote(self, request):
+        """
+        Recebe várias aferições de uma vez (coletadas offline pelo fiscal).
+
+        Espera uma lista JSON com os mesmos campos do POST individual e
+        devolve um resultado por item, na mesma ordem:
+        'criada', 'existente' (o 'cod_afericao' já estava gravado, o reenvio
+        não altera nada) ou 'invalida' (com os erros de validação).
+
+        Todo o lote custa um número fixo de consultas: uma busca para os
+        CRs, uma para os códigos já existentes, um 'bulk_create' e uma
+        conferência do que ele de fato gravou.
+        """
+        itens = request.data
+        if not isinstance(itens, list):
+            return Response({"error": "Envie uma lista de aferições."}, status=400)
+        if len(itens) > settings.AFERICOES_LOTE_MAX:
+            return Response(
+                {"error": f"O lote aceita no máximo {settings.AFERICOES_LOTE_MAX} aferições."},
+                status=400
+            )
+
+        perfil = get_perfil(request)
+        if perfil is None:
+            return Response({"error": "Usuário sem perfil cadastrado."}, status=403)
+
+        # 1. Validação de cada item (sem consultas ao banco)
+        resultados = []
+        validos = []
+        for indice, item in enumerate(itens):
+            serializer = AfericaoLoteItemSerializer(data=item)
+            if serializer.is_valid():
+                validos.append((indice, serializer.validated_data))
+                resultados.append(None)
+            else:
+                resultados.append({
+                    'cod_afericao': item.get('cod_afericao') if isinstance(item, dict) else None,
+                    'status': 'invalida',
+                    'erros': serializer.errors,
+                })
+
+        # 2. Uma consulta para os CRs e outra para os códigos já gravados
+        crs = CentroResponsabilidade.objects.in_bulk(
+            {dados['centro_responsabilidade'] for _, dados in validos}
+        )
+        existentes = set(
+            Afericao.objects.filter(cod_afericao__in=[dados['cod_afericao'] for _, dados in validos])
+            .values_list('cod_afericao', flat=True)
+        )
+
+        novas = []
+        for indice, dados in validos:
+            cod_afericao = dados['cod_afericao']
+            cr = crs.get(dados['centro_responsabilidade'])
+            if cr is None:
+                resultados[indice] = {
+                    'cod_afericao': cod_afericao,
+                    'status': 'invalida',
+                    'erros': {'centro_responsabilidade': ["Centro de Responsabilidade inexistente."]},
+                }
+                continue
+            if cod_afericao in existentes:
+                resultados[indice] = {'cod_afericao': cod_afericao, 'status': 'existente'}
+                continue
+
+            # Mesmas regras do AfericaoCreateSerializer.create e do Afericao.save
+            dados = {**dados, 'centro_responsabilidade': cr}
+            if not dados.get('postos_prev'):
+                dados['postos_prev'] = cr.postos_trab_previstos
+            # Os 'desempenho_*' são calculados pelo banco na gravação
+            novas.append(Afericao(fiscal=perfil, **dados))
+            existentes.add(cod_afericao) # Repetido no mesmo lote conta como existente
+            resultados[indice] = {'cod_afericao': cod_afericao, 'status': 'criada'}
+        posicoes = {
+            resultado['cod_afericao']: indice for indice, resultado in enumerate(resultados)
+            if resultado['status'] == 'criada'
+        }
+
+        # 3. Gravação em uma única instrução; 'ignore_conflicts' cobre envios
+        # simultâneos do mesmo código.
+        with transaction.atomic():
+            Afericao.objects.bulk_create(novas, ignore_conflicts=True)
+            # Um envio simultâneo pode ter gravado o mesmo código antes: a linha
+            # é nossa só se tem o 'atualizado_em' que o bulk_create preencheu
+            gravadas = dict(
+                Afericao.objects.filter(cod_afericao__in=posicoes)
+                .values_list('cod_afericao', 'atualizado_em')
+            )
+            novas = [a for a in novas if gravadas.get(a.cod_afericao) == a.atualizado_em]
+            for cod_afericao in posicoes.keys() - {a.cod_afericao for a in novas}:
+                resultados[posicoes[cod_afericao]] = {'cod_afericao': cod_afericao, 'status': 'existente'}
+
+            # Nem os sinais de post_save: invalida o cache do bootstrap aqui,
+            # depois do COMMIT (antes dele, uma leitura guardaria os dados antigos)
+            transaction.on_commit(lambda: invalidar_afericoes(perfil.pk))
+            # O bulk_create não passa pelo save(): atualiza o consolidado aqui
+            for cod_cr, mes in {(a.centro_responsabilidade_id, mes_local(a.data_afericao)) for a in novas}:
+                DesempenhoMensal.recalcular(cod_cr, mes)
+            # Alertas só das linhas que este envio gravou, com os valores dele
+            AlertaGestor.enfileirar(novas)
+
+        status = 201 if novas else 200
+        return Response(resultados, status=status)
+
     def get_serializer_class(self):
         """
         Define qual serializer usar dependendo da ação.
@@ -104,27 +533,307 @@ class AfericaoViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """
         Filtra as aferições para que o Fiscal veja apenas as suas.
-        (Futuramente, Coordenadores/Gestores poderão ver todas)
+        (Ver 'afericoes_visiveis')
         """
-        user = self.request.user
-        
-        try:
-            perfil = user.perfilusuario
-            if perfil.perfil == 'Fiscal de Equipamento':
-                # Fiscal vê apenas as suas aferições
-                return Afericao.objects.filter(fiscal=perfil).order_by('-data_afericao')
-        except PerfilUsuario.DoesNotExist:
-            # Se for um superuser ou alguém sem perfil, retorna vazio por segurança
-            return Afericao.objects.none()
+        return afericoes_visiveis(self.request)
 
-        # Padrão: Coordenadores/Gestores (a ser implementado) veem tudo
-        return Afericao.objects.all().order_by('-data_afericao')
+    def perform_update(self, serializer):
+        """
+        Recusa a edição de aferições já fechadas para revisão (prazo D+1,
+        ver comando 'fechar_revisoes'). A linha é relida com trava para
+        que o fechamento não aconteça entre a verificação e a gravação.
+        """
+        with transaction.atomic():
+            fechada = (
+                Afericao.objects.select_for_update()
+                .values_list('status_revisao', flat=True)
+                .get(pk=serializer.instance.pk)
+            )
+            if fechada:
+                raise PermissionDenied("Prazo de revisão (D+1) encerrado para esta aferição.")
+            serializer.save()
 
     def perform_create(self, serializer):
         """
         Passa o 'request.user' (usuário logado) para o contexto
         do serializer, para que o HiddenField 'fiscal' funcione.
         """
-        # Busca o PerfilUsuario do usuário logado
-        perfil = PerfilUsuario.objects.get(user=self.request.user)
-        serializer.save(fiscal=perfil)
\ No newline at end of file
+        # PerfilUsuario do usuário logado (já carregado na autenticação)
+        perfil = get_perfil(self.request)
+        if perfil is None:
+            raise PermissionDenied("Usuário sem perfil cadastrado.")
+        serializer.save(fiscal=perfil)
+
+# --- 4. Relatório de Desempenho (consolidado mensal) ---
+
+class RelatorioDesempenhoViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    API endpoint (apenas leitura) com as médias de desempenho por
+    CR, secretaria e mês.
+
+    Lê somente a tabela DesempenhoMensal, nunca as aferições, então o custo
+    do relatório não cresce com o histórico guardado.
+
+    Parâmetros opcionais:
+    - cr, secretaria: filtros
+    - mes_inicio, mes_fim: período no formato YYYY-MM (inclusivos)
+    - agrupar: 'cr', 'secretaria' ou 'mes' (padrão: uma linha por CR e mês)
+    """
+    queryset = DesempenhoMensal.objects.all()
+    serializer_class = DesempenhoMensalSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    AGRUPAMENTOS = {
+        None: ['centro_responsabilidade', 'centro_responsabilidade__nome_cr', 'secretaria_responsavel', 'mes'],
+        'cr': ['centro_responsabilidade', 'centro_responsabilidade__nome_cr', 'secretaria_responsavel'],
+        'secretaria': ['secretaria_responsavel'],
+        'mes': ['mes'],
+    }
+
+    def _mes(self, nome):
+        valor = self.request.query_params.get(nome)
+        if not valor:
+            return None
+        try:
+            return datetime.strptime(valor, '%Y-%m').date()
+        except ValueError:
+            raise ValidationError({nome: "Use o formato YYYY-MM."})
+
+    def get_queryset(self):
+        """
+        Fiscais veem apenas os CRs em que são o fiscal padrão;
+        Coordenadores/Gestores veem todos.
+        """
+        queryset = DesempenhoMensal.objects.all()
+        perfil = get_perfil(self.request)
+        if perfil is None:
+            return queryset.none()
+        if perfil.perfil == 'Fiscal de Equipamento':
+            queryset = queryset.filter(centro_responsabilidade__fiscal_padrao=perfil)
+
+        params = self.request.query_params
+        if params.get('cr'):
+            queryset = queryset.filter(centro_responsabilidade_id=params['cr'])
+        if params.get('secretaria'):
+            queryset = queryset.filter(secretaria_responsavel=params['secretaria'])
+
+        mes_inicio = self._mes('mes_inicio')
+        mes_fim = self._mes('mes_fim')
+        if mes_inicio:
+            queryset = queryset.filter(mes__gte=mes_inicio)
+        if mes_fim:
+            queryset = queryset.filter(mes__lte=mes_fim)
+        return queryset
+
+    @leitura_na_replica
+    def list(self, request, *args, **kwargs):
+        agrupar = request.query_params.get('agrupar') or None
+        if agrupar not in self.AGRUPAMENTOS:
+            raise ValidationError({'agrupar': "Use 'cr', 'secretaria' ou 'mes'."})
+        campos = self.AGRUPAMENTOS[agrupar]
+
+        # Somar as somas (e não fazer média das médias) mantém a média correta
+        linhas = (
+            self.get_queryset()
+            .values(*campos)
+            .annotate(
+                qtd_afericoes=Sum('qtd_afericoes'),
+                soma_desempenho_serv=Sum('soma_desempenho_serv'),
+                soma_desempenho_mat_qt=Sum('soma_desempenho_mat_qt'),
+                soma_desempenho_mat_ql=Sum('soma_desempenho_mat_ql'),
+                soma_desempenho_mat_rep=Sum('soma_desempenho_mat_rep'),
+            )
+            .order_by(*campos)
+        )
+        serializer = self.get_serializer(linhas, many=True)
+        return Response(serializer.data)
+
+
+# --- 5. Sincronização Incremental (apps de campo) ---
+
+class SyncView(APIView):
+    """
+    Devolve apenas os CRs e Aferições criados, alterados ou excluídos
+    desde a última sincronização do app.
+
+    GET /api/sync/                -> carga completa + token
+    GET /api/sync/?since=<token>  -> só as mudanças desde o token + novo token
+
+    O token é opaco (assinado pelo servidor). Ele aponta um pouco antes
+    do início da consulta ('SYNC_MARGEM'), para não perder gravações que
+    ainda estavam em andamento; por isso o app pode receber de novo alguns
+    registros que já tem e deve tratá-los como atualização.
+
+    Cada resposta traz no máximo SYNC_PAGE_SIZE registros: primeiro os
+    CRs, depois as aferições e por fim as exclusões, lidos por cursor em
+    (data de alteração, pk), de modo que nenhuma página varre a tabela.
+    Com 'continua' True, o app pede de novo com o 'token' recebido até
+    'continua' vir False; esse último token é o da próxima sincronização.
+    Na carga completa, 'completo' vem True em todas as páginas.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    SALT = 'afericao_app.sync'
+    # Etapas da leitura, na ordem, e a data de alteração de cada uma
+    ETAPAS = (('centros', 'atualizado_em'), ('afericoes', 'atualizado_em'), ('exclusoes', 'excluido_em'))
+
+    def _ler_token(self, token):
+        try:
+            estado = signing.loads(token, salt=self.SALT)
+            # Token final: só a data. Token de página: o ponto em que a leitura parou
+            if isinstance(estado, str):
+                estado = {'desde': estado}
+            desde = estado['desde']
+            return {**estado, 'desde': datetime.fromisoformat(desde) if desde else None}
+        except (signing.BadSignature, TypeError, ValueError, KeyError):
+            raise ValidationError({'since': "Token de sincronização inválido."})
+
+    def get(self, request):
+        token = request.query_params.get('since')
+        estado = self._ler_token(token) if token else {'desde': None}
+        desde = estado['desde']
+        # O token da próxima sincronização é fixado na primeira página
+        proximo = estado.get('proximo') or (timezone.now() - settings.SYNC_MARGEM).isoformat()
+
+        consultas = {
+            'centros': CentroResponsabilidade.objects.select_related('fiscal_padrao__user'),
+            'afericoes': afericoes_visiveis(request),
+            # Na carga completa o app parte do zero: não há o que excluir
+            'exclusoes': exclusoes_visiveis(request) if desde else RegistroExclusao.objects.none(),
+        }
+        paginas = {nome: [] for nome, _ in self.ETAPAS}
+        etapa, posicao = estado.get('etapa', 0), estado.get('posicao')
+        restante = settings.SYNC_PAGE_SIZE
+        while etapa < len(self.ETAPAS) and restante > 0:
+            nome, campo = self.ETAPAS[etapa]
+            queryset = consultas[nome]
+            if desde:
+                queryset = queryset.filter(**{campo + '__gte': desde})
+            paginas[nome], posicao = pagina_por_chave(queryset, campo, posicao, restante)
+            restante -= len(paginas[nome])
+            if posicao is None:
+                etapa += 1
+
+        continua = etapa < len(self.ETAPAS)
+        if continua:
+            estado = {
+                'desde': desde.isoformat() if desde else None,
+                'proximo': proximo, 'etapa': etapa, 'posicao': posicao,
+            }
+        else:
+            estado = proximo
+
+        excluidos = {'centroresponsabilidade': [], 'afericao': []}
+        for exclusao in paginas['exclusoes']:
+            excluidos.setdefault(exclusao.modelo, []).append(exclusao.chave)
+
+        return Response({
+            'token': signing.dumps(estado, salt=self.SALT),
+            'completo': desde is None,
+            'continua': continua,
+            'centros': {
+                'alterados': CentroResponsabilidadeSerializer(paginas['centros'], many=True).data,
+                'excluidos': [int(chave) for chave in excluidos['centroresponsabilidade']],
+            },
+            'afericoes': {
+                'alterados': AfericaoListSerializer(paginas['afericoes'], many=True).data,
+                'excluidos': excluidos['afericao'],
+            },
+        })
+
+
+# --- 6. Bootstrap do App (pós-login) ---
+
+class BootstrapView(APIView):
+    """
+    Tudo o que o app precisa logo após o login, em uma única requisição:
+    perfil, CRs sob responsabilidade do fiscal (fiscal_padrao), as últimas
+    aferições e quais desses CRs já foram aferidos hoje.
+
+    Custa um número fixo de consultas (CRs, aferições recentes e
+    aferições de hoje). Perfil, CRs e recentes ficam em cache por usuário
+    até que os CRs ou as aferições visíveis para ele mudem; o bloco 'hoje'
+    conta aferições de qualquer fiscal nos CRs dele e é lido a cada
+    requisição (uma consulta pelo índice CR + data).
+
+    Parâmetro opcional: 'n' (quantidade de aferições recentes, máx. 100).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        perfil = get_perfil(request)
+        if perfil is None:
+            return Response({"error": "Usuário sem perfil cadastrado."}, status=403)
+
+        try:
+            n = min(int(request.query_params.get('n', settings.BOOTSTRAP_AFERICOES_RECENTES)), 100)
+        except ValueError:
+            return Response({"error": "Parâmetro 'n' deve ser numérico."}, status=400)
+
+        # O fiscal depende só das próprias aferições; os demais veem todas
+        escopo = perfil.pk if perfil.perfil == 'Fiscal de Equipamento' else None
+        chave = 'galp:bootstrap:{}:{}:{}:{}'.format(
+            perfil.pk, n, versao_centros()['versao'], versao_afericoes(escopo),
+        )
+        dados = cache.get(chave)
+        if dados is None:
+            dados = self._montar(request, perfil, n)
+            cache.set(chave, dados, timeout=settings.BOOTSTRAP_CACHE_TTL)
+        # Fora do cache: outro fiscal pode aferir estes CRs sem trocar a versão deste
+        centros = [cr['cod_cr'] for cr in dados['centros']]
+        return Response({**dados, 'hoje': self._hoje(centros, timezone.localdate())})
+
+    def _montar(self, request, perfil, n):
+        centros = (
+            CentroResponsabilidade.objects
+            .filter(fiscal_padrao=perfil)
+            .select_related('fiscal_padrao__user')
+            .order_by('nome_cr')
+        )
+        recentes = afericoes_visiveis(request).order_by('-data_afericao', 'cod_afericao')[:n]
+
+        return {
+            'user_profile': PerfilUsuarioSerializer(perfil).data,
+            'centros': CentroResponsabilidadeSerializer(centros, many=True).data,
+            'afericoes_recentes': AfericaoListSerializer(recentes, many=True).data,
+        }
+
+    def _hoje(self, centros, hoje):
+        inicio, fim = intervalo_local(hoje)
+        aferidos = set(
+            Afericao.objects.filter(
+                centro_responsabilidade__in=centros,
+                data_afericao__gte=inicio,
+                data_afericao__lt=fim,
+            ).values_list('centro_responsabilidade_id', flat=True)
+        )
+        return {
+            'data': hoje.isoformat(),
+            'centros_aferidos': sorted(aferidos),
+            'centros_pendentes': [cod_cr for cod_cr in centros if cod_cr not in aferidos],
+        }
+
+
+# --- 7. Saúde do Banco e Métricas ---
+
+class SaudeBancoView(APIView):
+    """
+    Conexões com o banco deste processo (primário e réplica) e, com
+    DB_POOL=True, as métricas do pool. Somente para a equipe (staff).
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(estatisticas_conexoes())
+
+
+class MetricasView(APIView):
+    """
+    Métricas por rota deste processo (latência, consultas SQL, tamanho das
+    respostas), no formato texto do Prometheus. Somente staff: o Prometheus
+    autentica com o token de um usuário staff ('Authorization: Token ...').
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(metricas.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,149 @@
+# /opt/galp-backend/afericao_app/views_async.py
+
+from datetime import date
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.urls import resolve
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, NotFound, ValidationError
+from rest_framework.request import Request
+
+from . import leitura
+from .authentication import autenticar_async
+from .banco import leitura_na_replica
+from .cache import lista_centros_async, versao_centros_async
+from .models import Afericao
+from .pagination import AfericaoCursorPagination
+from .renderers import ORJSONRenderer, RENDERIZADORES_BINARIOS
+from .serializers import CentroResponsabilidadeSerializer
+from .utils import intervalo_local
+from .views import CentroResponsabilidadeViewSet, afericoes_visiveis, campos_listagem, filtrar_afericoes
+
+# --- Leituras assíncronas (ASGI) ---
+# Versões 'async def' das leituras mais frequentes do app. Enquanto o banco
+# responde, o worker atende outras requisições, em vez de prender uma
+# thread por consulta. São servidas só pelo ASGI (galp_project/urls_asgi.py)
+# e respondem exatamente como as views do DRF de mesmo endereço.
+
+
+def _json(dados, status=200):
+    # Mesmo renderizador do DRF: o corpo é idêntico ao das views síncronas
+    return HttpResponse(ORJSONRenderer().render(dados), status=status, content_type='application/json')
+
+
+async def view_sincrona(request):
+    """Atende a requisição com a view do DRF de mesmo endereço (urls do WSGI)."""
+    match = resolve(request.path_info, urlconf='galp_project.urls')
+    return await sync_to_async(match.func)(request, *match.args, **match.kwargs)
+
+
+def leitura_async(view):
+    """
+    Autentica pelo token (mesmo cache da CachedTokenAuthentication) e
+    deixa 'request.user', 'request.auth' e 'request.perfil' prontos.
+    Métodos que não são GET e pedidos em outro formato que não JSON
+    (MessagePack) seguem para a view síncrona do DRF.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        binario = any(
+            renderizador.media_type in request.headers.get('Accept', '')
+            for renderizador in RENDERIZADORES_BINARIOS
+        )
+        if request.method != 'GET' or binario:
+            return await view_sincrona(request)
+
+        try:
+            token = await autenticar_async(request)
+            if token is None:
+                raise NotAuthenticated()
+        except (AuthenticationFailed, NotAuthenticated) as erro:
+            # Mesma resposta do DRF: a mensagem distingue token ausente de inválido
+            response = _json({'detail': erro.detail}, status=401)
+            response['WWW-Authenticate'] = 'Token'
+        else:
+            request.user, request.auth = token.user, token
+            request.perfil = getattr(token.user, 'perfilusuario', None)
+            response = await view(request, *args, **kwargs)
+        # Como nas views do DRF (mais de um renderizador), inclusive no 304 da
+        # lista de CRs: a mesma URL também responde em MessagePack
+        patch_vary_headers(response, ('Accept',))
+        return response
+    return wrapper
+
+
+@leitura_async
+async def check_exists(request):
+    """Mesmo que AfericaoViewSet.check_exists."""
+    cod_cr = request.GET.get('cr')
+    data_str = request.GET.get('data') # Formato YYYY-MM-DD
+
+    if not cod_cr or not data_str:
+        return _json({"error": "Parâmetros 'cr' e 'data' são obrigatórios."}, status=400)
+
+    try:
+        cod_cr = int(cod_cr)
+        data = date.fromisoformat(data_str)
+    except ValueError:
+        return _json(
+            {"error": "Parâmetros inválidos: 'cr' deve ser numérico e 'data' no formato YYYY-MM-DD."},
+            status=400
+        )
+
+    inicio, fim = intervalo_local(data)
+    exists = await Afericao.objects.filter(
+        centro_responsabilidade_id=cod_cr,
+        data_afericao__gte=inicio,
+        data_afericao__lt=fim,
+    ).aexists()
+    return _json({"exists": exists})
+
+
+@leitura_async
+@leitura_na_replica
+async def centros_list(request):
+    """Mesmo que CentroResponsabilidadeViewSet.list (cache + ETag/304)."""
+    versao = await versao_centros_async()
+    etag = quote_etag(f"centros-{versao['versao']}")
+    last_modified = int(versao['modificado_em'])
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        async def gerar():
+            centros = [cr async for cr in CentroResponsabilidadeViewSet.queryset.all()]
+            return CentroResponsabilidadeSerializer(centros, many=True).data
+
+        response = _json(await lista_centros_async(versao, gerar))
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@leitura_async
+@leitura_na_replica
+async def afericoes_list(request):
+    """Mesmo que AfericaoViewSet.list (escopo por perfil, filtros, campos e paginação por cursor)."""
+    if request.GET.get('q', '').strip():
+        # A busca textual é paginada por página numerada: fica com a view do DRF
+        return await view_sincrona(request)
+    try:
+        queryset = filtrar_afericoes(afericoes_visiveis(request), request.GET, request.user.is_staff)
+        campos = campos_listagem(request.GET)
+    except ValidationError as erro:
+        return _json(erro.detail, status=400)
+
+    # O próprio CursorPagination do DRF, em uma thread: cursores e links
+    # idênticos aos da view síncrona
+    paginator = AfericaoCursorPagination()
+    try:
+        pagina = await sync_to_async(paginator.paginate_queryset)(
+            leitura.valores_lista(queryset, campos), Request(request)
+        )
+    except NotFound as erro: # Cursor inválido
+        return _json({'detail': erro.detail}, status=404)
+    return _json(paginator.get_paginated_data(leitura.representar_lista(pagina, campos)))
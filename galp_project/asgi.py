@@ -5,6 +5,39 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+No GALP o ASGI roda ao lado do WSGI, não no lugar dele. Este processo usa
+'galp_project.urls_asgi', que atende com views assíncronas as leituras mais
+frequentes do app (GET de /api/centros/, /api/afericoes/ e
+/api/afericoes/check_exists/); qualquer outra rota funciona igual ao WSGI.
+
+Execução lado a lado (mesmo código, mesmo .env):
+
+    # WSGI: escrita, admin e o restante da API
+    gunicorn galp_project.wsgi:application --workers 4 --bind 127.0.0.1:8000
+
+    # ASGI: leituras assíncronas
+    uvicorn galp_project.asgi:application --workers 2 --port 8001
+    # (ou: gunicorn galp_project.asgi:application -k uvicorn.workers.UvicornWorker)
+
+E no nginx, só os GETs dessas três rotas vão para o ASGI:
+
+    location ~ ^/api/(centros|afericoes|afericoes/check_exists)/$ {
+        if ($request_method = GET) { proxy_pass http://127.0.0.1:8001; }
+        proxy_pass http://127.0.0.1:8000;
+    }
+    location / { proxy_pass http://127.0.0.1:8000; }
+
+Conexões com o banco: sem DB_POOL, este processo sempre usa
+CONN_MAX_AGE=0, qualquer que seja o DB_CONN_MAX_AGE do .env. As views
+assíncronas rodam o ORM em threads do sync_to_async, e uma conexão
+persistente fica presa a cada thread e nunca é fechada pelo fim da
+requisição (Django #33497): elas se acumulam até estourar o
+max_connections do PostgreSQL. Para reaproveitar conexões no ASGI, use
+DB_POOL=True.
+
+Para comparar os dois (requisições por segundo e memória dos workers),
+ver o comando 'manage.py benchmark_http'.
 """
 
 import os
@@ -12,5 +45,10 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'galp_project.settings')
+# Lido pelo settings.py (decouple): as leituras assíncronas só existem aqui
+os.environ.setdefault('ROOT_URLCONF', 'galp_project.urls_asgi')
+# Conexões persistentes se acumulam por thread no ASGI (ver acima); com
+# DB_POOL o settings.py já usa 0 e o pool reaproveita as conexões
+os.environ['DB_CONN_MAX_AGE'] = '0'
 
 application = get_asgi_application()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 from decouple import config, Csv
 
@@ -46,17 +47,21 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'afericao_app.metricas.MetricasMiddleware', # Primeiro: mede a requisição inteira (/metrics)
+    'afericao_app.compressao.CompressaoMiddleware', # gzip/brotli (ver compressao.py)
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'afericao_app.banco.RoteamentoBancoMiddleware', # Primário x réplica (ver banco.py)
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'galp_project.urls'
+# O processo ASGI troca para 'galp_project.urls_asgi' (ver asgi.py)
+ROOT_URLCONF = config('ROOT_URLCONF', default='galp_project.urls')
 
 TEMPLATES = [
     {
@@ -79,6 +84,17 @@ WSGI_APPLICATION = 'galp_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Pool de conexões do psycopg 3 (Django 5.1+, requer 'psycopg[pool]'): cada
+# processo mantém entre DB_POOL_MIN e DB_POOL_MAX conexões abertas; quem não
+# consegue uma em DB_POOL_TIMEOUT segundos recebe erro. As métricas do pool
+# ficam em /api/saude/banco/ (somente staff).
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+DB_POOL_OPCOES = {
+    'min_size': config('DB_POOL_MIN', default=2, cast=int),
+    'max_size': config('DB_POOL_MAX', default=10, cast=int),
+    'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -87,8 +103,74 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT'),
+        # Sem pool: cada worker mantém a conexão por DB_CONN_MAX_AGE segundos
+        # (0 = uma conexão por requisição) e a testa antes de reaproveitar.
+        # Só vale no WSGI: o galp_project/asgi.py força 0 (ver lá o porquê)
+        'CONN_MAX_AGE': 0 if DB_POOL else config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
+if DB_POOL:
+    DATABASES['default']['OPTIONS'] = {'pool': {**DB_POOL_OPCOES, 'name': 'galp-default'}}
+
+# Réplica de leitura (opcional). Relatórios, exportações e listagens leem
+# dela; escritas, e as leituras do usuário logo após uma escrita, ficam no
+# primário (ver afericao_app/banco.py). Os campos não informados repetem os
+# do primário: para testar localmente, basta DB_REPLICA_HOST=<mesmo host>.
+DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+DB_REPLICA_ALIAS = 'replica' if DB_REPLICA_HOST else None
+if DB_REPLICA_ALIAS:
+    DATABASES[DB_REPLICA_ALIAS] = {
+        **DATABASES['default'],
+        'NAME': config('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'HOST': DB_REPLICA_HOST,
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        # Nos testes, a réplica é o próprio banco de teste do primário
+        'TEST': {'MIRROR': 'default'},
+    }
+    if DB_POOL:
+        DATABASES[DB_REPLICA_ALIAS]['OPTIONS'] = {'pool': {**DB_POOL_OPCOES, 'name': 'galp-replica'}}
+
+DATABASE_ROUTERS = ['afericao_app.banco.ReplicaRouter']
+
+# Segundos em que as leituras de um usuário ficam no primário após ele gravar
+# algo (deve cobrir o atraso da réplica)
+DB_REPLICA_FIXACAO = config('DB_REPLICA_FIXACAO', default=5, cast=int)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# O padrão (memória local) vale só para um processo. Em produção, com vários
+# workers, use um cache compartilhado (ex: Redis) para que a invalidação
+# feita por um worker valha para todos:
+#   CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   CACHE_LOCATION=redis://127.0.0.1:6379/1
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='galp'),
+    }
+}
+
+# Cache da autenticação por token (afericao_app/authentication.py).
+# Cada entrada vale por AUTH_CACHE_TTL segundos; em memória local, o cache é
+# limitado a AUTH_CACHE_MAX_ENTRIES e descarta primeiro as menos usadas (LRU).
+# Com vários workers, um backend compartilhado (ex: Redis com
+# 'maxmemory-policy allkeys-lru') faz o logout valer em todos na hora;
+# em memória local os demais workers só esquecem o token após o TTL.
+AUTH_CACHE_BACKEND = config('AUTH_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+CACHES['auth'] = {
+    'BACKEND': AUTH_CACHE_BACKEND,
+    'LOCATION': config('AUTH_CACHE_LOCATION', default='galp-auth'),
+    'TIMEOUT': config('AUTH_CACHE_TTL', default=300, cast=int),
+}
+if AUTH_CACHE_BACKEND.endswith('LocMemCache'):
+    CACHES['auth']['OPTIONS'] = {
+        'MAX_ENTRIES': config('AUTH_CACHE_MAX_ENTRIES', default=5000, cast=int),
+    }
 
 
 # Password validation
@@ -137,19 +219,72 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Configurações do Django Rest Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'afericao_app.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # JSON com o orjson (ver afericao_app/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'afericao_app.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'afericao_app.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Compressão das respostas (ver afericao_app/compressao.py): tamanho mínimo
+# para comprimir, a partir de quando a resposta é "grande" (níveis mais leves)
+# e nível do brotli (0 a 11; acima de 5 o ganho não paga a CPU)
+COMPRESSAO_MIN_BYTES = config('COMPRESSAO_MIN_BYTES', default=1024, cast=int)
+COMPRESSAO_GRANDE_BYTES = config('COMPRESSAO_GRANDE_BYTES', default=262144, cast=int)
+COMPRESSAO_BROTLI_QUALIDADE = config('COMPRESSAO_BROTLI_QUALIDADE', default=5, cast=int)
+
+# Paginação da listagem de aferições (ver afericao_app/pagination.py)
+AFERICOES_PAGE_SIZE = config('AFERICOES_PAGE_SIZE', default=50, cast=int)
+AFERICOES_MAX_PAGE_SIZE = config('AFERICOES_MAX_PAGE_SIZE', default=500, cast=int)
+
+# Filtros da listagem/exportação de aferições: com os filtros amplos (notas,
+# uso de EPI/máquinas, revisão, secretaria), quem não é staff precisa informar
+# um período de no máximo tantos dias (ver AfericaoFiltroSerializer)
+AFERICOES_FILTRO_MAX_DIAS = config('AFERICOES_FILTRO_MAX_DIAS', default=92, cast=int)
+
+# CRs mais próximos (/api/centros/proximos/): quantidade padrão e máxima
+CENTROS_PROXIMOS_K = config('CENTROS_PROXIMOS_K', default=5, cast=int)
+CENTROS_PROXIMOS_MAX_K = config('CENTROS_PROXIMOS_MAX_K', default=50, cast=int)
+
+# Prazo de revisão das aferições (D+1): dias após a data da aferição em que
+# ainda é possível editar. Fechado pelo comando 'fechar_revisoes'.
+REVISAO_PRAZO_DIAS = config('REVISAO_PRAZO_DIAS', default=1, cast=int)
+
+# Quantidade máxima de aferições aceitas em um único envio em lote
+AFERICOES_LOTE_MAX = config('AFERICOES_LOTE_MAX', default=200, cast=int)
+
+# Bootstrap pós-login (/api/me/bootstrap/): quantidade padrão de aferições
+# recentes e por quanto tempo a resposta fica em cache por usuário
+BOOTSTRAP_AFERICOES_RECENTES = config('BOOTSTRAP_AFERICOES_RECENTES', default=20, cast=int)
+BOOTSTRAP_CACHE_TTL = config('BOOTSTRAP_CACHE_TTL', default=300, cast=int)
+
+# Sincronização incremental (/api/sync/): o token recua esta margem para não
+# perder gravações que ainda estavam em andamento quando ele foi emitido.
+SYNC_MARGEM = timedelta(seconds=config('SYNC_MARGEM_SEGUNDOS', default=60, cast=int))
+# Registros (CRs + aferições + exclusões) por página do /api/sync/
+SYNC_PAGE_SIZE = config('SYNC_PAGE_SIZE', default=500, cast=int)
+
 # Configuração de E-mail (para alertas)
 # Em desenvolvimento, usamos o console backend.
 # Em produção, trocaremos pelo SMTP real da Prefeitura.
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'galp-noreply@mogidascruzes.sp.gov.br'
 
+# Alertas aos gestores de contrato (fila enviada pelo comando 'enviar_alertas'):
+# nota de serviço que dispara o alerta (2 = Ruim) e tentativas antes de desistir
+ALERTA_SERV_NOTA_MAXIMA = config('ALERTA_SERV_NOTA_MAXIMA', default=2, cast=int)
+ALERTAS_MAX_TENTATIVAS = config('ALERTAS_MAX_TENTATIVAS', default=5, cast=int)
+
 # Configuração do CORS
 CORS_ALLOWED_ORIGINS = [
     "http://192.168.10.50:8080",
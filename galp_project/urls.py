@@ -3,6 +3,8 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from afericao_app.views import MetricasView
+
 urlpatterns = [
     # 1. Rota do Admin (que já usamos)
     path('admin/', admin.site.urls),
@@ -11,6 +13,9 @@ urlpatterns = [
     # Qualquer URL que comece com 'api/' será enviada
     # para o arquivo 'afericao_app/urls.py'
     path('api/', include('afericao_app.urls')),
+
+    # 3. Métricas no formato do Prometheus (somente staff)
+    path('metrics', MetricasView.as_view(), name='metrics'),
     
     # (Quando o frontend (Vue) estiver pronto, adicionaremos
     # uma rota aqui para servir o index.html dele)
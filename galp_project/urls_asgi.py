@@ -0,0 +1,16 @@
+# /opt/galp-backend/galp_project/urls_asgi.py
+
+from django.urls import path
+
+from afericao_app import views_async
+
+from .urls import urlpatterns as urlpatterns_wsgi
+
+# URLs do processo ASGI (ver asgi.py): as leituras mais frequentes usam as
+# views assíncronas; todo o resto cai nas mesmas rotas do WSGI. Os nomes
+# são os mesmos das rotas do DRF (rótulo 'rota' das métricas).
+urlpatterns = [
+    path('api/centros/', views_async.centros_list, name='centros-list'),
+    path('api/afericoes/', views_async.afericoes_list, name='afericoes-list'),
+    path('api/afericoes/check_exists/', views_async.check_exists, name='afericoes-check-exists'),
+] + urlpatterns_wsgi